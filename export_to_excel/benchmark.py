@@ -0,0 +1,326 @@
+"""
+Benchmark and golden-file regression harness for the Export to Excel action.
+
+Run from this directory with the action's requirements installed:
+
+    python benchmark.py                       # time extract_tables / build_workbook
+    python benchmark.py --tables 20 --rows 2000 --columns 12
+    python benchmark.py --check-golden        # compare sheets with golden/*.json
+    python benchmark.py --update-golden       # rewrite golden/*.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import random
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable
+
+from openpyxl import load_workbook
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from export_to_excel import Action  # noqa: E402
+
+GOLDEN_DIR = Path(__file__).resolve().parent / "golden"
+WORDS = (
+    "alpha beta gamma delta revenue margin region forecast customer pipeline "
+    "backlog churn cohort quota segment ticket latency uptime budget target"
+).split()
+FORMULA_LIKE = ("=SUM(A1:A9)", "+49 30 1234", "-", "@channel", "=HYPERLINK(\"x\")")
+CURRENCIES = ("$", "€", "£")
+
+
+def _random_text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _random_inline(rng: random.Random) -> str:
+    text = _random_text(rng, rng.randint(1, 4))
+    style = rng.randrange(6)
+    if style == 0:
+        return f"**{text}**"
+    if style == 1:
+        return f"`{text} | raw`"
+    if style == 2:
+        return f"[{text}](https://example.com/{rng.randrange(1000)})"
+    if style == 3:
+        return f"_{text}_"
+    if style == 4:
+        return text.replace(" ", " \\| ", 1)
+    return text
+
+
+def _column_factory(rng: random.Random, kind: str) -> Callable[[int], str]:
+    start = date(2024, 1, 1)
+    currency = rng.choice(CURRENCIES)
+
+    if kind == "integer":
+        return lambda row: f"{rng.randint(0, 2_000_000):,}"
+    if kind == "decimal":
+        return lambda row: f"{rng.uniform(-1000, 1000):.2f}"
+    if kind == "percent":
+        return lambda row: f"{rng.uniform(0, 100):.1f}%"
+    if kind == "currency":
+        return lambda row: f"{currency}{rng.uniform(0, 5000):,.2f}"
+    if kind == "date":
+        return lambda row: (start + timedelta(days=row)).isoformat()
+    if kind == "boolean":
+        return lambda row: rng.choice(("true", "false"))
+    if kind == "formula":
+        return lambda row: rng.choice(FORMULA_LIKE)
+    return lambda row: _random_inline(rng)
+
+
+def generate_markdown(
+    seed: int = 0, tables: int = 5, rows: int = 200, columns: int = 8
+) -> str:
+    """Build a synthetic assistant message with prose, code and wide tables."""
+    rng = random.Random(seed)
+    kinds = ("text", "integer", "decimal", "percent", "currency", "date", "boolean")
+    parts: list[str] = []
+
+    for table_index in range(1, tables + 1):
+        parts.append(f"## {_random_text(rng, 2).title()} {table_index}")
+        parts.append(" ".join(_random_inline(rng) for _ in range(12)))
+        parts.append("```python\nrows = [r for r in data if r | mask]\n```")
+
+        column_kinds = [rng.choice(kinds) for _ in range(columns - 1)] + ["formula"]
+        factories = [_column_factory(rng, kind) for kind in column_kinds]
+        header = [f"{kind.title()} {index}" for index, kind in enumerate(column_kinds)]
+        delimiters = [rng.choice(("---", ":--", "--:", ":-:")) for _ in header]
+        lines = ["| " + " | ".join(header) + " |", "|" + "|".join(delimiters) + "|"]
+        for row_index in range(rows):
+            lines.append(
+                "| " + " | ".join(factory(row_index) for factory in factories) + " |"
+            )
+        parts.append("\n".join(lines))
+
+    return "\n\n".join(parts)
+
+
+def _measure(callback: Callable[[], Any]) -> tuple[Any, float, int]:
+    # Timing and allocation tracing run separately: tracemalloc slows the
+    # interpreter down by several times and would distort rows/sec.
+    started = time.perf_counter()
+    result = callback()
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    try:
+        callback()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def run_benchmark(
+    tables: int, rows: int, columns: int, repeat: int, seed: int
+) -> list[dict[str, Any]]:
+    action = Action()
+    markdown_text = generate_markdown(seed, tables, rows, columns)
+    total_rows = tables * (rows + 1)
+    results: list[dict[str, Any]] = []
+
+    for _ in range(repeat):
+        extracted, extract_seconds, extract_peak = _measure(
+            lambda: action.extract_tables(markdown_text)
+        )
+        xlsx_bytes, build_seconds, build_peak = _measure(
+            lambda: action.build_workbook(extracted)
+        )
+        results.append(
+            {
+                "extract_seconds": extract_seconds,
+                "extract_rows_per_second": total_rows / extract_seconds,
+                "extract_peak_mib": extract_peak / 2**20,
+                "build_seconds": build_seconds,
+                "build_rows_per_second": total_rows / build_seconds,
+                "build_peak_mib": build_peak / 2**20,
+                "xlsx_kib": len(xlsx_bytes) / 1024,
+            }
+        )
+
+    return results
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _snapshot_cell(cell: Any) -> list[Any]:
+    link = cell.hyperlink.location if cell.hyperlink else None
+    return [_jsonable(cell.value), cell.number_format, link]
+
+
+def snapshot_workbook(xlsx_bytes: bytes) -> list[dict[str, Any]]:
+    """Reduce a workbook to the values, formats and structure worth pinning."""
+    workbook = load_workbook(io.BytesIO(xlsx_bytes))
+    sheets: list[dict[str, Any]] = []
+
+    for worksheet in workbook.worksheets:
+        sheets.append(
+            {
+                "title": worksheet.title,
+                "tables": dict(sorted(worksheet.tables.items())),
+                "freeze_panes": worksheet.freeze_panes,
+                "rows": [
+                    [_snapshot_cell(cell) for cell in row]
+                    for row in worksheet.iter_rows()
+                ],
+            }
+        )
+
+    return sheets
+
+
+def render_snapshot(sheets: list[dict[str, Any]]) -> str:
+    """Serialize a snapshot as JSON with one worksheet row per line."""
+    blocks: list[str] = []
+    for sheet in sheets:
+        fields = ", ".join(
+            f"{json.dumps(key)}: {json.dumps(value, ensure_ascii=False)}"
+            for key, value in sheet.items()
+            if key != "rows"
+        )
+        rows = ",\n    ".join(
+            json.dumps(row, ensure_ascii=False) for row in sheet["rows"]
+        )
+        blocks.append(f'  {{{fields}, "rows": [\n    {rows}\n  ]}}')
+    return "[\n" + ",\n".join(blocks) + "\n]\n"
+
+
+TYPED_CELLS_MESSAGE = """
+# Quarterly summary
+
+| Region | Revenue | Share | Closed | Won | Note |
+|:--|--:|--:|:-:|---|---|
+| EMEA | €1.234,50 | 12,5% | 05.01.2024 | true | **strong** |
+| APAC | €980,00 | 7% | 13.02.2024 | false | `=cmd|x` |
+| AMER | €12.000,75 | 80,5% | 01.03.2024 | TRUE | =SUM(B2:B4) |
+| LATAM | n/a | - | 02.03.2024 | false | +1 555 0100 |
+"""
+
+HTML_FALLBACK_MESSAGE = """
+## Raw markup
+
+<table>
+  <thead><tr><th>Item</th><th align="right">Qty</th></tr></thead>
+  <tbody>
+    <tr><td>Widget</td><td>3</td></tr>
+    <tr><td>@import</td><td>1,200</td></tr>
+  </tbody>
+</table>
+
+| Key | Value |
+|---|---|
+| a | 2024-05-01 |
+"""
+
+
+def _golden_cases() -> dict[str, Callable[[Action], bytes]]:
+    def typed_cells(action: Action) -> bytes:
+        return action.build_workbook(action.extract_tables(TYPED_CELLS_MESSAGE))
+
+    def html_fallback(action: Action) -> bytes:
+        return action.build_workbook(action.extract_tables(HTML_FALLBACK_MESSAGE))
+
+    def synthetic(action: Action) -> bytes:
+        markdown_text = generate_markdown(seed=7, tables=3, rows=8, columns=6)
+        return action.build_workbook(action.extract_tables(markdown_text))
+
+    def conversation(action: Action) -> bytes:
+        body = {
+            "messages": [
+                {"role": "user", "content": TYPED_CELLS_MESSAGE},
+                {"role": "assistant", "content": TYPED_CELLS_MESSAGE},
+                {"role": "assistant", "content": HTML_FALLBACK_MESSAGE},
+                {"role": "assistant", "content": TYPED_CELLS_MESSAGE},
+            ]
+        }
+        tables = list(action.iter_conversation_tables(body))
+        return action.build_workbook(tables, include_index=True)
+
+    return {
+        "typed_cells": typed_cells,
+        "html_fallback": html_fallback,
+        "synthetic": synthetic,
+        "conversation": conversation,
+    }
+
+
+def check_golden(update: bool = False) -> int:
+    GOLDEN_DIR.mkdir(exist_ok=True)
+    failures = 0
+
+    for name, build in _golden_cases().items():
+        snapshot = snapshot_workbook(build(Action()))
+        golden_path = GOLDEN_DIR / f"{name}.json"
+        rendered = render_snapshot(snapshot)
+
+        if update:
+            golden_path.write_text(rendered, encoding="utf-8")
+            print(f"updated {golden_path.name}")
+            continue
+
+        if not golden_path.exists():
+            print(f"MISSING {golden_path.name}")
+            failures += 1
+        elif golden_path.read_text(encoding="utf-8") != rendered:
+            print(f"CHANGED {golden_path.name}")
+            failures += 1
+        else:
+            print(f"ok      {golden_path.name}")
+
+    return 1 if failures else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tables", type=int, default=5)
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--columns", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check-golden", action="store_true")
+    parser.add_argument("--update-golden", action="store_true")
+    args = parser.parse_args()
+
+    if args.check_golden or args.update_golden:
+        return check_golden(update=args.update_golden)
+
+    results = run_benchmark(
+        args.tables, args.rows, args.columns, args.repeat, args.seed
+    )
+    print(
+        f"{args.tables} tables x {args.rows} rows x {args.columns} columns, "
+        f"{args.repeat} run(s)"
+    )
+    print(
+        f"{'run':>3} {'extract s':>10} {'rows/s':>10} {'peak MiB':>9} "
+        f"{'build s':>9} {'rows/s':>10} {'peak MiB':>9} {'xlsx KiB':>9}"
+    )
+    for index, result in enumerate(results, start=1):
+        print(
+            f"{index:>3} {result['extract_seconds']:>10.4f} "
+            f"{result['extract_rows_per_second']:>10.0f} "
+            f"{result['extract_peak_mib']:>9.1f} "
+            f"{result['build_seconds']:>9.4f} "
+            f"{result['build_rows_per_second']:>10.0f} "
+            f"{result['build_peak_mib']:>9.1f} "
+            f"{result['xlsx_kib']:>9.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
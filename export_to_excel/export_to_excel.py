@@ -11,20 +11,83 @@ icon_url: https://www.svgrepo.com/show/373590/excel2.svg
 
 from __future__ import annotations
 
+import asyncio
 import base64
+import csv
+import hashlib
+import html
 import io
 import json
 import re
-from typing import Any
+import unicodedata
+import uuid
+import zipfile
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Iterator
 
 import markdown
 from bs4 import BeautifulSoup, Tag
 from openpyxl import Workbook
+from openpyxl.formatting.rule import DataBarRule
 from openpyxl.styles import Alignment, Font
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.hyperlink import Hyperlink
+from openpyxl.worksheet.table import Table, TableStyleInfo
 from pydantic import BaseModel, Field
 
 INVALID_SHEET_TITLE_RE = re.compile(r"[:\\/?*\[\]]")
 FORMULA_PREFIXES = ("=", "+", "-", "@")
+CURRENCY_SYMBOLS = "$€£¥₹"
+NUMERIC_CELL_RE = re.compile(
+    rf"^(?P<sign>[-+\u2212])?\s*(?P<prefix>[{CURRENCY_SYMBOLS}])?\s*"
+    rf"(?P<inner_sign>[-+\u2212])?(?P<number>\d[\d,.' ]*\d|\d|[.,]\d+)"
+    rf"\s*(?P<suffix>%|[{CURRENCY_SYMBOLS}])?$"
+)
+GROUP_SEPARATOR_RE = re.compile(r"[ ']")
+DATE_HINT_RE = re.compile(
+    r"^(?:\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}|\d{1,2} [A-Za-z]{3}|[A-Za-z]{3})"
+)
+BOOLEAN_VALUES = {"true": True, "false": False}
+MISSING_VALUES = {"", "-", "–", "—", "n/a", "na", "nan", "null", "none"}
+MAX_EXACT_INTEGER_DIGITS = 15
+RAW_HTML_TABLE_RE = re.compile(r"<table[\s>]", re.IGNORECASE)
+FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+TABLE_DELIMITER_CELL_RE = re.compile(r"^:?-+:?$")
+INLINE_CODE_RE = re.compile(r"(`+)(.+?)(?<!`)\1(?!`)")
+IMAGE_RE = re.compile(r"!\[([^\]]*)\]\([^)]*\)")
+LINK_RE = re.compile(r"\[([^\]]+)\]\([^)]*\)")
+STRONG_RE = re.compile(r"(\*\*|__)(?=\S)(.+?)(?<=\S)\1")
+EMPHASIS_RE = re.compile(r"(?<![\w*])([*_])(?=\S)(.+?)(?<=\S)\1(?![\w*])")
+HTML_TAG_RE = re.compile(r"<[^>]+>")
+BACKSLASH_ESCAPE_RE = re.compile(r"\\([\\`*_{}\[\]()#+\-.!|])")
+TEXT_ALIGN_RE = re.compile(r"text-align:\s*(left|center|right)", re.IGNORECASE)
+ATX_HEADING_RE = re.compile(r"^ {0,3}#{1,6}\s+(.+?)(?:\s+#+)?\s*$")
+HTML_HEADING_RE = re.compile(r"^h[1-6]$")
+INDEX_SHEET_TITLE = "Index"
+TABLE_CACHE_MAX_ENTRIES = 512
+XLSX_MIME_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+ZIP_MIME_TYPE = "application/zip"
+ARCHIVE_EXTENSIONS = {"csv": "csv", "parquet": "parquet", "jsonl": "jsonl"}
+ARCHIVE_NAME_RE = re.compile(r"[^A-Za-z0-9._-]+")
+FORMAT_LITERAL_RE = re.compile(r'"([^"]*)"')
+FORMAT_DECIMALS_RE = re.compile(r"\.(0+)")
+DATA_BAR_COLOR = "638EC6"
+DATE_FORMATS = (
+    ("%Y-%m-%d", "yyyy-mm-dd"),
+    ("%Y-%m-%d %H:%M", "yyyy-mm-dd hh:mm"),
+    ("%Y-%m-%d %H:%M:%S", "yyyy-mm-dd hh:mm:ss"),
+    ("%Y-%m-%dT%H:%M", "yyyy-mm-dd hh:mm"),
+    ("%Y-%m-%dT%H:%M:%S", "yyyy-mm-dd hh:mm:ss"),
+    ("%Y/%m/%d", "yyyy-mm-dd"),
+    ("%m/%d/%Y", "mm/dd/yyyy"),
+    ("%d/%m/%Y", "dd/mm/yyyy"),
+    ("%d.%m.%Y", "dd.mm.yyyy"),
+    ("%d %b %Y", "d mmm yyyy"),
+    ("%d %B %Y", "d mmmm yyyy"),
+    ("%b %d, %Y", "mmm d, yyyy"),
+    ("%B %d, %Y", "mmmm d, yyyy"),
+)
 
 
 class Action:
@@ -37,12 +100,88 @@ class Action:
             default="message",
             description="Prefix used for the downloaded Excel file name.",
         )
+        export_scope: str = Field(
+            default="message",
+            description=(
+                "Export tables from the current assistant message only, or harvest "
+                "every assistant message in the conversation into one workbook."
+            ),
+            json_schema_extra={"enum": ["message", "conversation"]},
+        )
+        output_format: str = Field(
+            default="xlsx",
+            description=(
+                "Output format. `xlsx` builds a workbook; `csv`, `parquet` and "
+                "`jsonl` build a zip archive with one file per table."
+            ),
+            json_schema_extra={"enum": ["xlsx", "csv", "parquet", "jsonl"]},
+        )
+        format_as_table: bool = Field(
+            default=True,
+            description=(
+                "Emit each sheet as a native Excel table with banded rows and "
+                "autofilter when it has a single header row."
+            ),
+        )
+        table_style: str = Field(
+            default="TableStyleMedium2",
+            description="Built-in Excel table style used when `format_as_table` is on.",
+        )
+        numeric_data_bars: bool = Field(
+            default=False,
+            description="Add data bar conditional formats to numeric columns.",
+        )
+        generation_timeout_seconds: int = Field(
+            default=120,
+            ge=5,
+            le=1800,
+            description="Maximum seconds allowed for building the output file.",
+        )
+        delivery_mode: str = Field(
+            default="auto",
+            description=(
+                "`inline` embeds the file in the browser script, `file` stores it "
+                "as an Open WebUI file and downloads it by URL, `auto` stores "
+                "files above `inline_size_limit_kb`. Stored files are kept in the "
+                "user's Open WebUI files until deleted there. Without a user the "
+                "file is delivered inline."
+            ),
+            json_schema_extra={"enum": ["auto", "inline", "file"]},
+        )
+        inline_size_limit_kb: int = Field(
+            default=2048,
+            ge=16,
+            le=65536,
+            description=(
+                "Largest file (in KB) delivered inline when `delivery_mode` is `auto`."
+            ),
+        )
+        infer_cell_types: bool = Field(
+            default=True,
+            description=(
+                "Write numbers, percentages, currencies, dates and booleans as "
+                "native typed cells instead of text."
+            ),
+        )
 
     def __init__(self):
         self.valves = self.Valves()
+        self._table_cache: OrderedDict[str, list[dict[str, Any]]] = OrderedDict()
+
+    def _file_extension(self) -> str:
+        if self.valves.output_format in ARCHIVE_EXTENSIONS:
+            return f"{self.valves.output_format}.zip"
+        return "xlsx"
 
     def build_filename(self, message_id: str) -> str:
-        return f"{self.valves.filename_prefix}-{message_id}.xlsx"
+        return f"{self.valves.filename_prefix}-{message_id}.{self._file_extension()}"
+
+    def build_conversation_filename(self, body: dict) -> str:
+        chat_id = body.get("chat_id") or body.get("id")
+        return (
+            f"{self.valves.filename_prefix}-conversation-{chat_id}."
+            f"{self._file_extension()}"
+        )
 
     async def emit_error(self, message: str, __event_emitter__=None):
         if __event_emitter__:
@@ -142,19 +281,360 @@ class Action:
 
         return [(row, False) for row in table.find_all("tr")]
 
+    def _normalize_cell_text(self, value: str) -> str:
+        return " ".join(value.split())
+
     def _sanitize_cell_value(self, value: str) -> str:
-        normalized = " ".join(value.split())
+        normalized = self._normalize_cell_text(value)
         if normalized.lstrip().startswith(FORMULA_PREFIXES):
             return f"'{normalized}"
         return normalized
 
-    def extract_tables(self, markdown_text: str) -> list[dict[str, Any]]:
+    def _infer_decimal_separator(self, numbers: list[str]) -> str | None:
+        votes: set[str] = set()
+
+        for number in numbers:
+            has_dot = "." in number
+            has_comma = "," in number
+            if has_dot and has_comma:
+                votes.add("." if number.rfind(".") > number.rfind(",") else ",")
+            elif has_dot or has_comma:
+                separator = "." if has_dot else ","
+                if number.count(separator) > 1:
+                    votes.add("," if separator == "." else ".")
+                elif len(number.rsplit(separator, 1)[1]) != 3:
+                    votes.add(separator)
+
+        if len(votes) > 1:
+            return None
+        return votes.pop() if votes else "."
+
+    def _parse_number(
+        self, number: str, decimal_separator: str
+    ) -> tuple[float | int, int, bool] | None:
+        group_separator = "," if decimal_separator == "." else "."
+        integer_part, _, fraction = number.partition(decimal_separator)
+        if decimal_separator in fraction or group_separator in fraction:
+            return None
+        if fraction and not fraction.isdigit():
+            return None
+
+        groups = GROUP_SEPARATOR_RE.split(integer_part.replace(group_separator, " "))
+        grouped = len(groups) > 1
+        if grouped and (
+            not 1 <= len(groups[0]) <= 3 or any(len(group) != 3 for group in groups[1:])
+        ):
+            return None
+
+        digits = "".join(groups)
+        if digits and not digits.isdigit():
+            return None
+        if not digits and not fraction:
+            return None
+        if fraction:
+            return float(f"{digits or '0'}.{fraction}"), len(fraction), grouped
+        if len(digits) > MAX_EXACT_INTEGER_DIGITS or (
+            len(digits) > 1 and digits.startswith("0")
+        ):
+            return None
+        return int(digits), 0, grouped
+
+    def _type_numeric_column(
+        self, values: list[str]
+    ) -> tuple[list[Any], str] | None:
+        matches = [NUMERIC_CELL_RE.match(value) for value in values]
+        if not all(matches):
+            return None
+
+        decimal_separator = self._infer_decimal_separator(
+            [match.group("number") for match in matches]
+        )
+        if decimal_separator is None:
+            return None
+
+        kinds: set[str] = set()
+        converted: list[Any] = []
+        max_decimals = 0
+        any_grouped = False
+
+        for match in matches:
+            sign = match.group("sign")
+            inner_sign = match.group("inner_sign")
+            prefix = match.group("prefix")
+            suffix = match.group("suffix")
+            if sign and inner_sign:
+                return None
+            if prefix and suffix:
+                return None
+
+            parsed = self._parse_number(match.group("number"), decimal_separator)
+            if parsed is None:
+                return None
+            number, decimals, grouped = parsed
+            if (sign or inner_sign) in ("-", "\u2212"):
+                number = -number
+
+            if suffix == "%":
+                kinds.add("percent")
+                number = number / 100
+            elif prefix or suffix:
+                kinds.add(f"currency:{prefix or ''}:{suffix or ''}")
+            else:
+                kinds.add("number")
+
+            converted.append(number)
+            max_decimals = max(max_decimals, decimals)
+            any_grouped = any_grouped or grouped
+
+        if len(kinds) != 1:
+            return None
+
+        kind = kinds.pop()
+        decimals_format = f".{'0' * min(max_decimals, 10)}" if max_decimals else ""
+        base_format = f"{'#,##0' if any_grouped else '0'}{decimals_format}"
+
+        if kind == "percent":
+            return converted, f"0{decimals_format}%"
+        if kind.startswith("currency:"):
+            _, prefix, suffix = kind.split(":")
+            base_format = f"#,##0{decimals_format}"
+            if prefix:
+                return converted, f'"{prefix}"{base_format}'
+            return converted, f'{base_format} "{suffix}"'
+        return converted, base_format
+
+    def _type_date_column(
+        self, values: list[str]
+    ) -> tuple[list[Any], str] | None:
+        if not all(DATE_HINT_RE.match(value) for value in values):
+            return None
+
+        for date_format, number_format in DATE_FORMATS:
+            converted: list[Any] = []
+            for value in values:
+                try:
+                    converted.append(datetime.strptime(value, date_format))
+                except ValueError:
+                    break
+            else:
+                if "%H" not in date_format:
+                    converted = [value.date() for value in converted]
+                return converted, number_format
+
+        return None
+
+    def _type_column(self, values: list[str]) -> tuple[list[Any], str] | None:
+        lowered = [value.lower() for value in values]
+        if all(value in BOOLEAN_VALUES for value in lowered):
+            return [BOOLEAN_VALUES[value] for value in lowered], "General"
+
+        return self._type_numeric_column(values) or self._type_date_column(values)
+
+    def infer_table_types(
+        self, table: dict[str, Any], sanitize: bool = True
+    ) -> tuple[list[list[Any]], list[str | None]]:
+        rows = table["rows"]
+        header_rows = table["header_rows"]
+        typed_rows: list[list[Any]] = [
+            [self._sanitize_cell_value(value) if sanitize else value for value in row]
+            for row in rows
+        ]
+        column_count = max((len(row) for row in rows), default=0)
+        number_formats: list[str | None] = [None] * column_count
+
+        if not self.valves.infer_cell_types:
+            return typed_rows, number_formats
+
+        for column_index in range(column_count):
+            positions: list[int] = []
+            values: list[str] = []
+            for row_index, row in enumerate(rows):
+                if header_rows[row_index] or column_index >= len(row):
+                    continue
+                value = row[column_index]
+                if value.lower() in MISSING_VALUES:
+                    continue
+                positions.append(row_index)
+                values.append(value)
+
+            if not values:
+                continue
+
+            typed_column = self._type_column(values)
+            if typed_column is None:
+                continue
+
+            converted, number_format = typed_column
+            for row_index, typed_value in zip(positions, converted):
+                typed_rows[row_index][column_index] = typed_value
+            number_formats[column_index] = number_format
+
+        return typed_rows, number_formats
+
+    def _get_cell_alignment(self, cell: Tag) -> str | None:
+        align = cell.get("align")
+        if isinstance(align, str) and align.lower() in ("left", "center", "right"):
+            return align.lower()
+
+        match = TEXT_ALIGN_RE.search(cell.get("style") or "")
+        return match.group(1).lower() if match else None
+
+    def _split_table_row(self, line: str) -> list[str]:
+        text = line.strip()
+        if text.startswith("|"):
+            text = text[1:]
+        if text.endswith("|") and not text.endswith("\\|"):
+            text = text[:-1]
+
+        cells: list[str] = []
+        current: list[str] = []
+        code_ticks = 0
+        index = 0
+        length = len(text)
+
+        while index < length:
+            char = text[index]
+            if char == "\\" and index + 1 < length and text[index + 1] == "|":
+                current.append("|")
+                index += 2
+                continue
+
+            if char == "`":
+                run_end = index
+                while run_end < length and text[run_end] == "`":
+                    run_end += 1
+                run = text[index:run_end]
+                if not code_ticks and run in text[run_end:]:
+                    code_ticks = len(run)
+                elif code_ticks == len(run):
+                    code_ticks = 0
+                current.append(run)
+                index = run_end
+                continue
+
+            if char == "|" and not code_ticks:
+                cells.append("".join(current))
+                current = []
+            else:
+                current.append(char)
+            index += 1
+
+        cells.append("".join(current))
+        return [cell.strip() for cell in cells]
+
+    def _parse_delimiter_row(self, line: str) -> list[str | None] | None:
+        if "-" not in line or "|" not in line:
+            return None
+
+        alignments: list[str | None] = []
+        for cell in self._split_table_row(line):
+            cell = cell.replace(" ", "")
+            if not TABLE_DELIMITER_CELL_RE.match(cell):
+                return None
+            if cell.startswith(":") and cell.endswith(":"):
+                alignments.append("center")
+            elif cell.endswith(":"):
+                alignments.append("right")
+            elif cell.startswith(":"):
+                alignments.append("left")
+            else:
+                alignments.append(None)
+        return alignments
+
+    def _strip_inline_markup(self, text: str) -> str:
+        text = IMAGE_RE.sub(r"\1", text)
+        text = LINK_RE.sub(r"\1", text)
+        text = STRONG_RE.sub(r"\2", text)
+        text = EMPHASIS_RE.sub(r"\2", text)
+        text = HTML_TAG_RE.sub(" ", text)
+        text = BACKSLASH_ESCAPE_RE.sub(r"\1", text)
+        return html.unescape(text)
+
+    def _markdown_cell_to_text(self, cell: str) -> str:
+        if "`" not in cell:
+            return self._normalize_cell_text(self._strip_inline_markup(cell))
+
+        parts: list[str] = []
+        last_end = 0
+        for match in INLINE_CODE_RE.finditer(cell):
+            parts.append(self._strip_inline_markup(cell[last_end : match.start()]))
+            parts.append(match.group(2).strip())
+            last_end = match.end()
+        parts.append(self._strip_inline_markup(cell[last_end:]))
+        return self._normalize_cell_text("".join(parts))
+
+    def _scan_markdown_tables(self, markdown_text: str) -> list[dict[str, Any]]:
+        tables: list[dict[str, Any]] = []
+        lines = markdown_text.splitlines()
+        fence: str | None = None
+        heading: str | None = None
+        index = 0
+        line_count = len(lines)
+
+        while index < line_count:
+            line = lines[index]
+            fence_match = FENCE_RE.match(line)
+            if fence_match:
+                marker = fence_match.group(1)
+                if fence is None:
+                    fence = marker
+                elif marker[0] == fence[0] and len(marker) >= len(fence):
+                    fence = None
+                index += 1
+                continue
+
+            if fence is not None:
+                index += 1
+                continue
+
+            heading_match = ATX_HEADING_RE.match(line)
+            if heading_match:
+                heading = self._markdown_cell_to_text(heading_match.group(1)) or None
+                index += 1
+                continue
+
+            if "|" not in line or index + 1 >= line_count or line.startswith("    "):
+                index += 1
+                continue
+
+            alignments = self._parse_delimiter_row(lines[index + 1])
+            header = self._split_table_row(line)
+            if alignments is None or len(alignments) != len(header):
+                index += 1
+                continue
+
+            column_count = len(header)
+            rows = [[self._markdown_cell_to_text(cell) for cell in header]]
+            index += 2
+
+            while index < line_count:
+                line = lines[index]
+                if not line.strip() or "|" not in line or FENCE_RE.match(line):
+                    break
+                cells = self._split_table_row(line)[:column_count]
+                cells.extend([""] * (column_count - len(cells)))
+                rows.append([self._markdown_cell_to_text(cell) for cell in cells])
+                index += 1
+
+            tables.append(
+                {
+                    "rows": rows,
+                    "header_rows": [True] + [False] * (len(rows) - 1),
+                    "alignments": alignments,
+                    "title": heading,
+                }
+            )
+
+        return tables
+
+    def _extract_html_tables(self, markdown_text: str) -> list[dict[str, Any]]:
         soup = BeautifulSoup(self.markdown_to_html(markdown_text), "html.parser")
         tables: list[dict[str, Any]] = []
 
         for table in soup.find_all("table"):
             parsed_rows: list[list[str]] = []
             header_rows: list[bool] = []
+            alignments: list[str | None] = []
 
             for row, in_header_section in self._get_table_rows(table):
                 cells = row.find_all(["th", "td"], recursive=False)
@@ -162,22 +642,83 @@ class Action:
                     continue
 
                 values = [
-                    self._sanitize_cell_value(cell.get_text(" ", strip=True))
+                    self._normalize_cell_text(cell.get_text(" ", strip=True))
                     for cell in cells
                 ]
+                if not parsed_rows:
+                    alignments = [self._get_cell_alignment(cell) for cell in cells]
                 parsed_rows.append(values)
                 header_rows.append(
                     in_header_section or all(cell.name == "th" for cell in cells)
                 )
 
             if parsed_rows:
-                tables.append({"rows": parsed_rows, "header_rows": header_rows})
+                heading = table.find_previous(HTML_HEADING_RE)
+                tables.append(
+                    {
+                        "rows": parsed_rows,
+                        "header_rows": header_rows,
+                        "alignments": alignments,
+                        "title": (
+                            self._normalize_cell_text(heading.get_text(" "))
+                            if heading is not None
+                            else None
+                        )
+                        or None,
+                    }
+                )
 
         return tables
 
-    def _make_sheet_title(self, index: int, existing_titles: set[str]) -> str:
-        base_title = f"Table {index}"
-        base_title = INVALID_SHEET_TITLE_RE.sub(" ", base_title).strip() or "Table"
+    def extract_tables(self, markdown_text: str) -> list[dict[str, Any]]:
+        if RAW_HTML_TABLE_RE.search(markdown_text):
+            return self._extract_html_tables(markdown_text)
+        if "|" not in markdown_text:
+            return []
+        return self._scan_markdown_tables(markdown_text)
+
+    def _get_cached_tables(self, content: str) -> list[dict[str, Any]]:
+        key = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        cached = self._table_cache.get(key)
+        if cached is not None:
+            self._table_cache.move_to_end(key)
+            return cached
+
+        tables = self.extract_tables(content)
+        self._table_cache[key] = tables
+        if len(self._table_cache) > TABLE_CACHE_MAX_ENTRIES:
+            self._table_cache.popitem(last=False)
+        return tables
+
+    def iter_conversation_tables(self, body: dict) -> Iterator[dict[str, Any]]:
+        seen_tables: set[str] = set()
+        assistant_index = 0
+
+        for message in body.get("messages", []) or []:
+            if not isinstance(message, dict) or message.get("role") != "assistant":
+                continue
+            assistant_index += 1
+
+            content = self._normalize_content(message.get("content"))
+            if "|" not in content and not RAW_HTML_TABLE_RE.search(content):
+                continue
+
+            for table in self._get_cached_tables(content):
+                fingerprint = hashlib.sha256(
+                    json.dumps(table["rows"], ensure_ascii=False).encode("utf-8")
+                ).hexdigest()
+                if fingerprint in seen_tables:
+                    continue
+                seen_tables.add(fingerprint)
+                yield {**table, "message_index": assistant_index}
+
+    def _make_sheet_title(
+        self, index: int, existing_titles: set[str], title: str | None = None
+    ) -> str:
+        base_title = title or f"Table {index}"
+        base_title = (
+            " ".join(INVALID_SHEET_TITLE_RE.sub(" ", base_title).split()) or "Table"
+        )
         base_title = base_title[:31]
 
         if base_title not in existing_titles:
@@ -193,59 +734,398 @@ class Action:
                 return candidate
             suffix += 1
 
-    def build_workbook(self, tables: list[dict[str, Any]]) -> bytes:
+    def _build_index_sheet(
+        self, workbook: Workbook, entries: list[tuple[str, dict[str, Any]]]
+    ):
+        worksheet = workbook.create_sheet(title=INDEX_SHEET_TITLE, index=0)
+        worksheet.append(["#", "Sheet", "Heading", "Message", "Rows", "Columns"])
+        for cell in worksheet[1]:
+            cell.font = Font(bold=True)
+
+        for position, (sheet_title, table) in enumerate(entries, start=1):
+            rows = table["rows"]
+            worksheet.append(
+                [
+                    position,
+                    sheet_title,
+                    self._sanitize_cell_value(table.get("title") or ""),
+                    table.get("message_index"),
+                    len(rows),
+                    max((len(row) for row in rows), default=0),
+                ]
+            )
+            link_cell = worksheet.cell(row=position + 1, column=2)
+            link_cell.hyperlink = Hyperlink(
+                ref=link_cell.coordinate,
+                location=f"'{sheet_title.replace(chr(39), chr(39) * 2)}'!A1",
+            )
+            link_cell.style = "Hyperlink"
+
+        worksheet.freeze_panes = "A2"
+        for column_letter, width in zip("ABCDEF", (6, 34, 48, 10, 8, 10)):
+            worksheet.column_dimensions[column_letter].width = width
+
+    def _display_width(self, text: str) -> int:
+        if text.isascii():
+            return len(text)
+
+        width = 0
+        for char in text:
+            if unicodedata.combining(char):
+                continue
+            width += 2 if unicodedata.east_asian_width(char) in ("W", "F") else 1
+        return width
+
+    def _number_display_width(self, value: int | float, number_format: str) -> int:
+        decimals_match = FORMAT_DECIMALS_RE.search(number_format)
+        decimals = len(decimals_match.group(1)) if decimals_match else 0
+        grouping = "," if "#,##0" in number_format else ""
+        if "%" in number_format:
+            value *= 100
+        literal_width = sum(
+            self._display_width(literal)
+            for literal in FORMAT_LITERAL_RE.findall(number_format)
+        )
+        return (
+            len(f"{value:{grouping}.{decimals}f}")
+            + literal_width
+            + number_format.count("%")
+            + number_format.count(" ")
+        )
+
+    def _make_table_header(self, header: list[Any], column_count: int) -> list[str]:
+        names: list[str] = []
+        used_names: set[str] = set()
+
+        for column_index in range(column_count):
+            value = header[column_index] if column_index < len(header) else ""
+            base_name = str(value) or f"Column {column_index + 1}"
+            name = base_name
+            suffix = 2
+            while name.lower() in used_names:
+                name = f"{base_name}{suffix}"
+                suffix += 1
+            used_names.add(name.lower())
+            names.append(name)
+        return names
+
+    def build_workbook(
+        self, tables: list[dict[str, Any]], include_index: bool = False
+    ) -> bytes:
         workbook = Workbook()
         workbook.remove(workbook.active)
 
         header_font = Font(bold=True)
-        wrap_alignment = Alignment(vertical="top", wrap_text=True)
-        existing_titles: set[str] = set()
+        cell_alignments = {
+            horizontal: Alignment(horizontal=horizontal, vertical="top", wrap_text=True)
+            for horizontal in (None, "left", "center", "right")
+        }
+        existing_titles: set[str] = {INDEX_SHEET_TITLE} if include_index else set()
+        index_entries: list[tuple[str, dict[str, Any]]] = []
 
         for index, table in enumerate(tables, start=1):
             worksheet = workbook.create_sheet(
-                title=self._make_sheet_title(index, existing_titles)
+                title=self._make_sheet_title(
+                    index, existing_titles, table.get("title")
+                )
             )
+            index_entries.append((worksheet.title, table))
             rows = table["rows"]
             header_rows = table["header_rows"]
+            column_alignments = table.get("alignments") or []
+            typed_rows, number_formats = self.infer_table_types(table)
 
-            max_lengths: dict[int, int] = {}
             header_prefix_count = 0
             for is_header_row in header_rows:
                 if not is_header_row:
                     break
                 header_prefix_count += 1
 
-            for row_index, row in enumerate(rows, start=1):
-                worksheet.append(row)
-                for column_index, value in enumerate(row, start=1):
+            column_count = max((len(row) for row in rows), default=0)
+            as_table = (
+                self.valves.format_as_table
+                and header_prefix_count == 1
+                and len(rows) > 1
+                and not any(header_rows[1:])
+            )
+            if as_table:
+                typed_rows[0] = self._make_table_header(typed_rows[0], column_count)
+
+            max_widths = [0] * column_count
+            numeric_columns: set[int] = set()
+
+            for row_index, (row, typed_row) in enumerate(
+                zip(rows, typed_rows), start=1
+            ):
+                worksheet.append(typed_row)
+                is_header_row = header_rows[row_index - 1]
+                for column_index, typed_value in enumerate(typed_row, start=1):
                     cell = worksheet.cell(row=row_index, column=column_index)
-                    cell.alignment = wrap_alignment
-                    max_lengths[column_index] = max(
-                        max_lengths.get(column_index, 0), len(value)
-                    )
-                    if header_rows[row_index - 1]:
+                    cell.alignment = cell_alignments[
+                        column_alignments[column_index - 1]
+                        if column_index <= len(column_alignments)
+                        else None
+                    ]
+                    number_format = number_formats[column_index - 1]
+                    if is_header_row:
                         cell.font = header_font
+                        width = self._display_width(str(typed_value))
+                        if as_table:
+                            width += 2
+                    elif isinstance(typed_value, (int, float)) and not isinstance(
+                        typed_value, bool
+                    ):
+                        cell.number_format = number_format
+                        numeric_columns.add(column_index)
+                        width = self._number_display_width(typed_value, number_format)
+                    else:
+                        if number_format and not isinstance(typed_value, str):
+                            cell.number_format = number_format
+                        width = self._display_width(
+                            row[column_index - 1] if column_index <= len(row) else ""
+                        )
+                    if width > max_widths[column_index - 1]:
+                        max_widths[column_index - 1] = width
+
+            last_column = get_column_letter(max(column_count, 1))
+            if as_table:
+                excel_table = Table(
+                    displayName=f"Table{index}",
+                    ref=f"A1:{last_column}{len(rows)}",
+                )
+                excel_table.tableStyleInfo = TableStyleInfo(
+                    name=self.valves.table_style,
+                    showRowStripes=True,
+                    showColumnStripes=False,
+                    showFirstColumn=False,
+                    showLastColumn=False,
+                )
+                worksheet.add_table(excel_table)
+
+            if self.valves.numeric_data_bars and header_prefix_count < len(rows):
+                for column_index in sorted(numeric_columns):
+                    column_letter = get_column_letter(column_index)
+                    worksheet.conditional_formatting.add(
+                        f"{column_letter}{header_prefix_count + 1}:"
+                        f"{column_letter}{len(rows)}",
+                        DataBarRule(
+                            start_type="min", end_type="max", color=DATA_BAR_COLOR
+                        ),
+                    )
 
             if header_prefix_count > 0 and header_prefix_count < len(rows):
                 worksheet.freeze_panes = f"A{header_prefix_count + 1}"
 
-            for column_index, max_length in max_lengths.items():
+            for column_index, max_width in enumerate(max_widths, start=1):
                 worksheet.column_dimensions[
-                    worksheet.cell(row=1, column=column_index).column_letter
-                ].width = min(max(max_length + 2, 10), 60)
+                    get_column_letter(column_index)
+                ].width = min(max(max_width + 2, 10), 60)
+
+        if include_index:
+            self._build_index_sheet(workbook, index_entries)
 
         output = io.BytesIO()
         workbook.save(output)
         return output.getvalue()
 
+    def _table_columns(
+        self, table: dict[str, Any], typed_rows: list[list[Any]]
+    ) -> tuple[list[str], list[list[Any]]]:
+        header_rows = table["header_rows"]
+        column_count = max((len(row) for row in typed_rows), default=0)
+        header_count = 0
+        for is_header_row in header_rows:
+            if not is_header_row:
+                break
+            header_count += 1
+
+        header = table["rows"][header_count - 1] if header_count else []
+        names: list[str] = []
+        used_names: set[str] = set()
+        for column_index in range(column_count):
+            base_name = (
+                header[column_index] if column_index < len(header) else ""
+            ) or f"Column {column_index + 1}"
+            name = base_name
+            suffix = 2
+            while name in used_names:
+                name = f"{base_name}_{suffix}"
+                suffix += 1
+            used_names.add(name)
+            names.append(name)
+
+        data_rows = [
+            row + [None] * (column_count - len(row))
+            for row in typed_rows[header_count:]
+        ]
+        return names, data_rows
+
+    def _archive_member_name(
+        self, index: int, table: dict[str, Any], extension: str
+    ) -> str:
+        stem = ARCHIVE_NAME_RE.sub("-", table.get("title") or "").strip("-._")
+        stem = stem[:60] or "table"
+        return f"{index:02d}-{stem}.{extension}"
+
+    def _write_csv_member(
+        self, handle, table: dict[str, Any]
+    ):
+        typed_rows, _ = self.infer_table_types(table)
+        names, data_rows = self._table_columns(table, typed_rows)
+        with io.TextIOWrapper(handle, encoding="utf-8", newline="") as text:
+            writer = csv.writer(text)
+            writer.writerow([self._sanitize_cell_value(name) for name in names])
+            writer.writerows(data_rows)
+
+    def _write_jsonl_member(
+        self, handle, table: dict[str, Any]
+    ):
+        typed_rows, _ = self.infer_table_types(table, sanitize=False)
+        names, data_rows = self._table_columns(table, typed_rows)
+        with io.TextIOWrapper(handle, encoding="utf-8", newline="\n") as text:
+            for row in data_rows:
+                record = {
+                    name: value.isoformat() if isinstance(value, date) else value
+                    for name, value in zip(names, row)
+                }
+                text.write(json.dumps(record, ensure_ascii=False))
+                text.write("\n")
+
+    def _write_parquet_member(
+        self, handle, table: dict[str, Any]
+    ):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise RuntimeError(
+                "Parquet export requires the 'pyarrow' package."
+            ) from exc
+
+        typed_rows, number_formats = self.infer_table_types(table, sanitize=False)
+        names, data_rows = self._table_columns(table, typed_rows)
+        columns: list[Any] = []
+
+        for column_index in range(len(names)):
+            values = [row[column_index] for row in data_rows]
+            if number_formats[column_index] is not None:
+                values = [None if isinstance(value, str) else value for value in values]
+                if any(isinstance(value, float) for value in values):
+                    values = [
+                        None if value is None else float(value) for value in values
+                    ]
+            else:
+                values = [None if value is None else str(value) for value in values]
+            columns.append(pa.array(values))
+
+        pq.write_table(pa.Table.from_arrays(columns, names=names), handle)
+
+    def build_archive(self, tables: list[dict[str, Any]], output_format: str) -> bytes:
+        writers = {
+            "csv": self._write_csv_member,
+            "jsonl": self._write_jsonl_member,
+            "parquet": self._write_parquet_member,
+        }
+        write_member = writers[output_format]
+        extension = ARCHIVE_EXTENSIONS[output_format]
+
+        output = io.BytesIO()
+        with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for index, table in enumerate(tables, start=1):
+                member_name = self._archive_member_name(index, table, extension)
+                with archive.open(member_name, "w") as handle:
+                    write_member(handle, table)
+        return output.getvalue()
+
+    def build_output(
+        self,
+        tables: list[dict[str, Any]],
+        output_format: str,
+        include_index: bool = False,
+    ) -> bytes:
+        if output_format in ARCHIVE_EXTENSIONS:
+            return self.build_archive(tables, output_format)
+        return self.build_workbook(tables, include_index=include_index)
+
+    def _should_store_file(self, size: int) -> bool:
+        if self.valves.delivery_mode == "inline":
+            return False
+        if self.valves.delivery_mode == "file":
+            return True
+        return size > self.valves.inline_size_limit_kb * 1024
+
+    def store_file(
+        self, file_bytes: bytes, filename: str, mime_type: str, user_id: str
+    ) -> str:
+        from open_webui.models.files import FileForm, Files
+        from open_webui.storage.provider import Storage
+
+        file_id = str(uuid.uuid4())
+        _, file_path = Storage.upload_file(
+            io.BytesIO(file_bytes),
+            f"{file_id}_{filename}",
+            {
+                "OpenWebUI-User-Id": user_id,
+                "OpenWebUI-File-Id": file_id,
+            },
+        )
+        Files.insert_new_file(
+            user_id,
+            FileForm(
+                id=file_id,
+                filename=filename,
+                path=file_path,
+                meta={
+                    "name": filename,
+                    "content_type": mime_type,
+                    "size": len(file_bytes),
+                },
+            ),
+        )
+        return f"/api/v1/files/{file_id}/content?attachment=true"
+
+    async def download_url(
+        self,
+        url: str,
+        filename: str,
+        size: int,
+        __event_emitter__=None,
+        __event_call__=None,
+    ):
+        js_code = f"""
+const url = {json.dumps(url)};
+const filename = {json.dumps(filename)};
+const a = document.createElement("a");
+a.href = url;
+a.download = filename;
+a.style.display = "none";
+document.body.appendChild(a);
+a.click();
+a.remove();
+
+return {{ success: true, filename, url, size: {size} }};
+"""
+
+        payload = {"type": "execute", "data": {"code": js_code}}
+
+        if __event_call__ is not None:
+            return await __event_call__(payload)
+
+        if __event_emitter__ is not None:
+            await __event_emitter__(payload)
+            return {"success": True, "filename": filename, "url": url, "size": size}
+
+        return None
+
     async def download_file(
         self,
-        xlsx_bytes: bytes,
+        file_bytes: bytes,
         filename: str,
+        mime_type: str = XLSX_MIME_TYPE,
         __event_emitter__=None,
         __event_call__=None,
     ):
-        encoded = base64.b64encode(xlsx_bytes).decode("ascii")
+        encoded = base64.b64encode(file_bytes).decode("ascii")
 
         js_code = f"""
 const base64 = {json.dumps(encoded)};
@@ -257,10 +1137,7 @@ for (let i = 0; i < binary.length; i++) {{
   bytes[i] = binary.charCodeAt(i);
 }}
 
-const blob = new Blob(
-  [bytes],
-  {{ type: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet" }}
-);
+const blob = new Blob([bytes], {{ type: {json.dumps(mime_type)} }});
 const url = URL.createObjectURL(blob);
 
 try {{
@@ -285,13 +1162,14 @@ return {{ success: true, filename, size: bytes.length }};
 
         if __event_emitter__ is not None:
             await __event_emitter__(payload)
-            return {"success": True, "filename": filename, "size": len(xlsx_bytes)}
+            return {"success": True, "filename": filename, "size": len(file_bytes)}
 
         return None
 
     async def action(
         self,
         body: dict,
+        __user__=None,
         __event_emitter__=None,
         __event_call__=None,
         **kwargs,
@@ -306,55 +1184,146 @@ return {{ success: true, filename, size: bytes.length }};
                 "content": "Could not determine the current message id from body['id']."
             }
 
-        filename = self.build_filename(message_id)
+        harvest_conversation = self.valves.export_scope == "conversation"
+
+        if harvest_conversation:
+            filename = self.build_conversation_filename(body)
 
-        await self.emit_status("Reading message content...", False, __event_emitter__)
-        markdown_text = self.get_message_content(body)
-        if not markdown_text.strip():
-            await self.emit_error(
-                "Excel export failed: no assistant message content found.",
-                __event_emitter__,
-            )
             await self.emit_status(
-                "No assistant message content found.",
-                True,
+                "Collecting tables from the conversation...",
+                False,
                 __event_emitter__,
             )
-            return {"content": "No assistant message content found."}
+            tables = list(self.iter_conversation_tables(body))
+            if not tables:
+                await self.emit_error(
+                    "Excel export failed: no tables found in the conversation.",
+                    __event_emitter__,
+                )
+                await self.emit_status(
+                    "No tables found in the conversation.",
+                    True,
+                    __event_emitter__,
+                )
+                return {"content": "No tables found in the conversation."}
+        else:
+            filename = self.build_filename(message_id)
 
-        await self.emit_status("Extracting tables...", False, __event_emitter__)
-        tables = self.extract_tables(markdown_text)
-        if not tables:
-            await self.emit_error(
-                "Excel export failed: no tables found in the assistant message.",
-                __event_emitter__,
+            await self.emit_status(
+                "Reading message content...", False, __event_emitter__
             )
+            markdown_text = self.get_message_content(body)
+            if not markdown_text.strip():
+                await self.emit_error(
+                    "Excel export failed: no assistant message content found.",
+                    __event_emitter__,
+                )
+                await self.emit_status(
+                    "No assistant message content found.",
+                    True,
+                    __event_emitter__,
+                )
+                return {"content": "No assistant message content found."}
+
+            await self.emit_status("Extracting tables...", False, __event_emitter__)
+            tables = self.extract_tables(markdown_text)
+            if not tables:
+                await self.emit_error(
+                    "Excel export failed: no tables found in the assistant message.",
+                    __event_emitter__,
+                )
+                await self.emit_status(
+                    "No tables found in the assistant message.",
+                    True,
+                    __event_emitter__,
+                )
+                return {"content": "No tables found in the assistant message."}
+
+        output_format = self.valves.output_format
+        if output_format in ARCHIVE_EXTENSIONS:
+            mime_type = ZIP_MIME_TYPE
+            format_label = output_format.upper()
             await self.emit_status(
-                "No tables found in the assistant message.",
-                True,
-                __event_emitter__,
+                f"Generating {format_label} archive...", False, __event_emitter__
             )
-            return {"content": "No tables found in the assistant message."}
+        else:
+            mime_type = XLSX_MIME_TYPE
+            format_label = "Excel"
+            await self.emit_status("Generating Excel file...", False, __event_emitter__)
 
-        await self.emit_status("Generating Excel file...", False, __event_emitter__)
         try:
-            xlsx_bytes = self.build_workbook(tables)
+            file_bytes = await asyncio.wait_for(
+                asyncio.to_thread(
+                    self.build_output, tables, output_format, harvest_conversation
+                ),
+                timeout=self.valves.generation_timeout_seconds,
+            )
+        except asyncio.TimeoutError:
+            message = (
+                "Excel export failed: generating the file took longer than "
+                f"{self.valves.generation_timeout_seconds} seconds."
+            )
+            await self.emit_error(message, __event_emitter__)
+            await self.emit_status("Excel export timed out.", True, __event_emitter__)
+            return {"content": message}
         except Exception as exc:
             await self.emit_error(f"Excel export failed: {exc}", __event_emitter__)
             await self.emit_status("Excel export failed.", True, __event_emitter__)
             return {"content": f"Excel export failed: {exc}"}
 
+        user_id = __user__.get("id") if isinstance(__user__, dict) else None
+        file_url: str | None = None
+        if self._should_store_file(len(file_bytes)) and not user_id:
+            await self.emit_status(
+                "No user to store the file for; delivering it inline instead.",
+                False,
+                __event_emitter__,
+            )
+        elif self._should_store_file(len(file_bytes)):
+            await self.emit_status("Storing file...", False, __event_emitter__)
+            try:
+                file_url = await asyncio.to_thread(
+                    self.store_file, file_bytes, filename, mime_type, user_id
+                )
+            except Exception as exc:
+                if self.valves.delivery_mode == "file":
+                    message = f"Excel export failed: could not store the file: {exc}"
+                    await self.emit_error(message, __event_emitter__)
+                    await self.emit_status(
+                        "Excel export failed.", True, __event_emitter__
+                    )
+                    return {"content": message}
+                await self.emit_status(
+                    f"Could not store the file ({exc}); delivering it inline instead.",
+                    False,
+                    __event_emitter__,
+                )
+
         await self.emit_status("Starting download...", False, __event_emitter__)
-        result = await self.download_file(
-            xlsx_bytes=xlsx_bytes,
-            filename=filename,
-            __event_emitter__=__event_emitter__,
-            __event_call__=__event_call__,
-        )
+        if file_url:
+            result = await self.download_url(
+                url=file_url,
+                filename=filename,
+                size=len(file_bytes),
+                __event_emitter__=__event_emitter__,
+                __event_call__=__event_call__,
+            )
+        else:
+            result = await self.download_file(
+                file_bytes=file_bytes,
+                filename=filename,
+                mime_type=mime_type,
+                __event_emitter__=__event_emitter__,
+                __event_call__=__event_call__,
+            )
 
         await self.emit_status("Excel export complete.", True, __event_emitter__)
         return {
-            "content": f"Exported message tables to Excel: {filename}",
+            "content": (
+                f"Exported {'conversation' if harvest_conversation else 'message'} "
+                f"tables to {format_label}: {filename}"
+            ),
             "result": result,
             "table_count": len(tables),
+            "delivery": "file" if file_url else "inline",
         }
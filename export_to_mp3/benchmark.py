@@ -0,0 +1,470 @@
+"""
+Compare the rule-based speech cleanup with the LLM cleanup path.
+
+Run from this directory inside an Open WebUI environment (the action imports
+`open_webui`):
+
+    python benchmark.py                          # rules timing + estimated LLM cost
+    python benchmark.py --heuristic --size-kb 100  # heuristic_cleanup vs legacy
+    python benchmark.py --messages 50 --repeat 5
+    python benchmark.py --input-price 0.15 --output-price 0.60 --tokens-per-second 80
+    OPENAI_API_KEY=... python benchmark.py --openai-base-url https://api.openai.com/v1 \
+        --model gpt-4o-mini                      # measure real LLM latency and tokens
+
+Without `--openai-base-url` the LLM side is estimated from the message size
+(about four characters per token), the token prices and the generation speed.
+
+`--heuristic` times `heuristic_cleanup` against `LegacyHeuristicCleanup`, a
+verbatim copy of the previous pattern-by-pattern implementation, and reports
+how many inputs produce different output, including links and citations that
+span lines (`SPANNING_MARKDOWN`). It also checks `rule_based_cleanup`
+against `SPEECH_GOLDEN`, a set of inputs the number rules must not misread.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from export_to_mp3 import (  # noqa: E402
+    BRACKET_CITATION_RE,
+    CODE_FENCE_RE,
+    CONTROL_RE,
+    DEFAULT_CLEANUP_PROMPT,
+    HORIZONTAL_WHITESPACE_RE,
+    HTML_COMMENT_RE,
+    HTML_TAG_RE,
+    IMAGE_RE,
+    MERMAID_FENCE_RE,
+    TABLE_SEPARATOR_RE,
+    URL_RE,
+    Action,
+)
+
+CHARS_PER_TOKEN = 4
+WORDS = (
+    "the release improves latency for most regions while the cache keeps "
+    "recent results close to users and the team plans another review next week"
+).split()
+# Links and citations that span lines, which the whole-message pre-pass must
+# still remove the way the line-by-line baseline did.
+SPANNING_MARKDOWN = (
+    "See [the release\nnotes](https://example.com/notes) for details.",
+    "Read [part one](https://example.com/a\n\"Title\") next.",
+    "- [x] [first\n- second](https://example.com/b) item",
+    "Sources \u30101\u2020release\nnotes\u3011 and \u30102\u2020faq\u3011.",
+    "> quoted [label\n> more](https://example.com/c) text",
+)
+# Expected rule-based readings; ambiguous numbers keep their digits.
+SPEECH_GOLDEN = (
+    ("Python 3.11 is out.", "Python 3.11 is out."),
+    ("Upgrade to version 3.11 today.", "Upgrade to version three point eleven today."),
+    ("The score was 3:2.", "The score was 3:2."),
+    ("Use a 3:2 aspect ratio.", "Use a three to two aspect ratio."),
+    ("Support is 24/7.", "Support is twenty-four seven."),
+    ("Call 555-1234 or 555-0100.", "Call 555-1234 or 555-0100."),
+    (
+        "Call +1 555-123-4567.",
+        "Call plus one, five five five, one two three, four five six seven.",
+    ),
+    ("GPT-4o is fast.", "G P T-4o is fast."),
+    ("GPT-4 is fast.", "G P T-4 is fast."),
+    ("It took 2:15 to finish.", "It took 2:15 to finish."),
+    ("Meet at 3:30 PM.", "Meet at three thirty P M."),
+    ("Read pages 10-20.", "Read pages ten to twenty."),
+    ("From 1990-1995.", "From nineteen ninety to nineteen ninety-five."),
+    ("It weighs 2.5 kg.", "It weighs two point five kilograms."),
+)
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 18))]
+    extras = (
+        f"{rng.randint(2, 95)}%",
+        f"${rng.randint(10, 90000):,}.{rng.randint(0, 99):02d}",
+        f"{rng.randint(1, 500)} ms",
+        f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "the API",
+        "https://example.com/docs",
+        f"{rng.randint(2, 40)} GB",
+    )
+    words.insert(rng.randrange(len(words)), rng.choice(extras))
+    return " ".join(words).capitalize() + "."
+
+
+def _table(rng: random.Random) -> str:
+    lines = ["| Region | Revenue | Share |", "|---|--:|--:|"]
+    for region in rng.sample(["EMEA", "APAC", "AMER", "LATAM", "ANZ", "DACH"], 4):
+        lines.append(
+            f"| {region} | ${rng.randint(100, 9000):,} | {rng.randint(1, 60)}% |"
+        )
+    return "\n".join(lines)
+
+
+def _code(rng: random.Random) -> str:
+    body = "\n".join(
+        f"    total += row[{index}] * {rng.randint(2, 9)}"
+        for index in range(rng.randint(3, 30))
+    )
+    return (
+        "```python\ndef weighted_total(row):\n    total = 0\n"
+        f"{body}\n    return total\n```"
+    )
+
+
+def generate_messages(seed: int = 0, count: int = 20) -> list[str]:
+    """Build assistant-style messages mixing prose, tables, code and links."""
+    rng = random.Random(seed)
+    messages: list[str] = []
+    for _ in range(count):
+        parts = [f"## {' '.join(rng.sample(WORDS, 3)).title()}"]
+        for _ in range(rng.randint(2, 6)):
+            parts.append(" ".join(_sentence(rng) for _ in range(rng.randint(2, 5))))
+            roll = rng.random()
+            if roll < 0.25:
+                parts.append(_table(rng))
+            elif roll < 0.45:
+                parts.append(_code(rng))
+            elif roll < 0.5:
+                parts.append('{\n  "status": "ok",\n  "items": [1, 2, 3]\n}')
+        messages.append("\n\n".join(parts))
+    return messages
+
+
+def _markdown_line(rng: random.Random) -> str:
+    text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 12)))
+    inline = rng.choice(
+        (
+            f"**{text}**",
+            f"*{text}* and __{rng.choice(WORDS)}__",
+            f"use `{rng.choice(WORDS)}()` with _{rng.choice(WORDS)}_",
+            f"[{text}](https://example.com/{rng.randrange(100)}) [{rng.randint(1, 9)}]",
+            f"~~{text}~~ see https://example.org/a_b?q={rng.randrange(100)}",
+            f"{text} \u3010{rng.randint(1, 9)}\u2020source\u3011",
+            f"{text} <b>{rng.choice(WORDS)}</b> <!-- note -->",
+            text,
+        )
+    )
+    prefix = rng.choice(("", "", "- ", "* [x] ", "1. ", "> ", "### "))
+    return prefix + inline
+
+
+def generate_markdown(seed: int = 0, size_kb: int = 100) -> str:
+    """Build one large markdown message of roughly `size_kb` kilobytes."""
+    rng = random.Random(seed)
+    parts: list[str] = []
+    size = 0
+    while size < size_kb * 1024:
+        block = "\n".join(_markdown_line(rng) for _ in range(rng.randint(3, 8)))
+        if rng.random() < 0.1:
+            block += "\n\n" + _code(rng) + "\n\n" + _table(rng)
+        parts.append(block)
+        size += len(block) + 2
+    return "\n\n".join(parts)
+
+
+# Definitions as they stood before heuristic_cleanup moved to whole-message
+# passes; the baseline below must not pick up later changes to the module.
+HEADING_RE = re.compile(r"^\s{0,3}#{1,6}\s*(.+?)\s*$")
+CHECKBOX_RE = re.compile(r"^\s*[-*+]\s+\[[ xX]\]\s+(.*)$")
+BULLET_RE = re.compile(r"^\s*[-*+]\s+(.*)$")
+NUMBERED_RE = re.compile(r"^\s*(\d+)[.)]\s+(.*)$")
+QUOTE_RE = re.compile(r"^\s*(>+)\s*(.*)$")
+MARKDOWN_LINK_RE = re.compile(r"\[([^\]]+)\]\(([^)\s]+(?:\s+\"[^\"]*\")?)\)")
+INLINE_CODE_RE = re.compile(r"`([^`]+)`")
+BOLD_RE = re.compile(r"\*\*(.*?)\*\*")
+DOUBLE_UNDERSCORE_RE = re.compile(r"__(.*?)__")
+ITALIC_STAR_RE = re.compile(r"(?<!\*)\*([^*]+)\*(?!\*)")
+ITALIC_UNDERSCORE_RE = re.compile(r"(?<!_)_([^_]+)_(?!_)")
+STRIKETHROUGH_RE = re.compile(r"~~(.*?)~~")
+OWUI_CITATION_RE = re.compile(r"\u3010[^\u3011]+\u3011")
+BLANK_BLOCK_RE = re.compile(r"\n{3,}")
+INLINE_MARKDOWN_PATTERNS = (
+    (INLINE_CODE_RE, " "),
+    (BOLD_RE, r"\1"),
+    (DOUBLE_UNDERSCORE_RE, r"\1"),
+    (ITALIC_STAR_RE, r"\1"),
+    (ITALIC_UNDERSCORE_RE, r"\1"),
+    (STRIKETHROUGH_RE, r"\1"),
+)
+
+
+class LegacyHeuristicCleanup:
+    """The pattern-by-pattern heuristic cleanup kept as a baseline."""
+
+    def _replace_markdown_links(self, text: str) -> str:
+        def replacer(match: re.Match[str]) -> str:
+            label = match.group(1).strip()
+            url = match.group(2).split()[0].strip()
+            return label if label and label != url else ""
+
+        return MARKDOWN_LINK_RE.sub(replacer, text)
+
+    def _strip_inline_markdown(self, text: str) -> str:
+        cleaned = self._replace_markdown_links(text)
+        for pattern, replacement in INLINE_MARKDOWN_PATTERNS:
+            cleaned = pattern.sub(replacement, cleaned)
+        return cleaned
+
+    def _looks_like_structured_or_code(self, line: str) -> bool:
+        stripped = line.strip()
+        if not stripped:
+            return False
+        if TABLE_SEPARATOR_RE.match(stripped):
+            return True
+        if stripped.count("|") >= 2:
+            return True
+        if len(re.findall(r"[{}[\];<>_=\\/]", stripped)) >= 4:
+            return True
+        if re.search(
+            r"(?:\bdef\b|\bclass\b|\breturn\b|\bimport\b|=>|::|</?\w+>|^\{|\}$)",
+            stripped,
+        ):
+            return True
+        if stripped.startswith(("```", "{", "}", "[", "]", "SELECT ", "INSERT ")):
+            return True
+        alpha_count = len(re.findall(r"[A-Za-z]", stripped))
+        punct_count = len(re.findall(r"[^A-Za-z0-9\s]", stripped))
+        return alpha_count > 0 and punct_count > alpha_count
+
+    def _normalize_line(self, raw_line: str) -> str:
+        stripped = raw_line.strip()
+        if not stripped:
+            return ""
+        if self._looks_like_structured_or_code(stripped):
+            return ""
+
+        heading_match = HEADING_RE.match(stripped)
+        if heading_match:
+            stripped = heading_match.group(1)
+        else:
+            checkbox_match = CHECKBOX_RE.match(stripped)
+            bullet_match = BULLET_RE.match(stripped)
+            numbered_match = NUMBERED_RE.match(stripped)
+            quote_match = QUOTE_RE.match(stripped)
+            if checkbox_match:
+                stripped = checkbox_match.group(1)
+            elif bullet_match:
+                stripped = bullet_match.group(1)
+            elif numbered_match:
+                stripped = f"{numbered_match.group(1)}. {numbered_match.group(2)}"
+            elif quote_match:
+                stripped = quote_match.group(2)
+
+        stripped = self._strip_inline_markdown(stripped)
+        stripped = BRACKET_CITATION_RE.sub("", stripped)
+        stripped = OWUI_CITATION_RE.sub("", stripped)
+        stripped = URL_RE.sub("", stripped)
+        stripped = HORIZONTAL_WHITESPACE_RE.sub(" ", stripped.strip(" \"'`*_~|"))
+        return stripped.strip()
+
+    def heuristic_cleanup(self, text: str) -> str:
+        cleaned = (text or "").replace("\r\n", "\n").replace("\r", "\n")
+        cleaned = CONTROL_RE.sub("", cleaned)
+        cleaned = HTML_COMMENT_RE.sub("", cleaned)
+        cleaned = MERMAID_FENCE_RE.sub("", cleaned)
+        cleaned = CODE_FENCE_RE.sub("", cleaned)
+        cleaned = IMAGE_RE.sub("", cleaned)
+        cleaned = self._replace_markdown_links(cleaned)
+        cleaned = HTML_TAG_RE.sub(" ", cleaned)
+        cleaned = BRACKET_CITATION_RE.sub("", cleaned)
+        cleaned = OWUI_CITATION_RE.sub("", cleaned)
+
+        normalized_lines: list[str] = []
+        for raw_line in cleaned.split("\n"):
+            line = self._normalize_line(raw_line)
+            if line:
+                normalized_lines.append(line)
+            elif normalized_lines and normalized_lines[-1] != "":
+                normalized_lines.append("")
+
+        normalized = "\n".join(normalized_lines).strip()
+        normalized = BLANK_BLOCK_RE.sub("\n\n", normalized)
+        return normalized.strip()
+
+
+def run_heuristic_benchmark(args: argparse.Namespace) -> int:
+    current = Action()
+    legacy = LegacyHeuristicCleanup()
+    inputs = [
+        generate_markdown(args.seed + index, args.size_kb) for index in range(3)
+    ] + generate_messages(args.seed, args.messages) + list(SPANNING_MARKDOWN)
+
+    mismatches = sum(
+        current.heuristic_cleanup(text) != legacy.heuristic_cleanup(text)
+        for text in inputs
+    )
+    print(f"{len(inputs)} inputs, {mismatches} with different output")
+
+    golden_failures = 0
+    for text, expected in SPEECH_GOLDEN:
+        spoken = current.rule_based_cleanup(text)
+        if spoken != expected:
+            golden_failures += 1
+            print(f"golden mismatch: {text!r} -> {spoken!r}, expected {expected!r}")
+    print(f"{len(SPEECH_GOLDEN)} golden readings, {golden_failures} wrong")
+    print(f"{'input':>5} {'KiB':>7} {'legacy ms':>10} {'current ms':>11} {'speedup':>8}")
+
+    for index, text in enumerate(inputs[:3], start=1):
+        _, legacy_seconds = _measure_cleanup(legacy, text, args.repeat)
+        _, current_seconds = _measure_cleanup(current, text, args.repeat)
+        print(
+            f"{index:>5} {len(text) / 1024:>7.1f} {legacy_seconds * 1000:>10.2f} "
+            f"{current_seconds * 1000:>11.2f} {legacy_seconds / current_seconds:>7.2f}x"
+        )
+    return 1 if mismatches or golden_failures else 0
+
+
+def _measure_cleanup(cleaner: Any, text: str, repeat: int) -> tuple[str, float]:
+    timings: list[float] = []
+    cleaned = ""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        cleaned = cleaner.heuristic_cleanup(text)
+        timings.append(time.perf_counter() - started)
+    return cleaned, statistics.median(timings)
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def _measure_rules(action: Action, message: str, repeat: int) -> tuple[str, float]:
+    timings: list[float] = []
+    cleaned = ""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        cleaned = action.rule_based_cleanup(message)
+        timings.append(time.perf_counter() - started)
+    return cleaned, statistics.median(timings)
+
+
+def _measure_llm(
+    message: str, base_url: str, model: str, max_tokens: int
+) -> tuple[float, int, int]:
+    started = time.perf_counter()
+    response = requests.post(
+        f"{base_url.rstrip('/')}/chat/completions",
+        headers={"Authorization": f"Bearer {os.environ.get('OPENAI_API_KEY', '')}"},
+        json={
+            "model": model,
+            "messages": [
+                {"role": "system", "content": DEFAULT_CLEANUP_PROMPT},
+                {"role": "user", "content": message},
+            ],
+            "temperature": 0.1,
+            "max_tokens": max_tokens,
+        },
+        timeout=300,
+    )
+    response.raise_for_status()
+    elapsed = time.perf_counter() - started
+    usage = response.json().get("usage") or {}
+    return elapsed, int(usage.get("prompt_tokens", 0)), int(
+        usage.get("completion_tokens", 0)
+    )
+
+
+def run_benchmark(args: argparse.Namespace) -> list[dict[str, Any]]:
+    action = Action()
+    results: list[dict[str, Any]] = []
+
+    for message in generate_messages(args.seed, args.messages):
+        cleaned, rules_seconds = _measure_rules(action, message, args.repeat)
+        input_tokens = _tokens(DEFAULT_CLEANUP_PROMPT) + _tokens(message)
+        output_tokens = _tokens(cleaned)
+
+        if args.openai_base_url:
+            llm_seconds, measured_input, measured_output = _measure_llm(
+                message, args.openai_base_url, args.model, args.max_tokens
+            )
+            input_tokens = measured_input or input_tokens
+            output_tokens = measured_output or output_tokens
+        else:
+            llm_seconds = (
+                args.first_token_seconds + output_tokens / args.tokens_per_second
+            )
+
+        results.append(
+            {
+                "chars": len(message),
+                "rules_seconds": rules_seconds,
+                "llm_seconds": llm_seconds,
+                "llm_cost": (
+                    input_tokens * args.input_price + output_tokens * args.output_price
+                )
+                / 1_000_000,
+                "auto_uses_llm": action._llm_cleanup_reason(message) is not None,
+            }
+        )
+
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--input-price", type=float, default=0.15, help="USD per 1M input tokens"
+    )
+    parser.add_argument(
+        "--output-price", type=float, default=0.60, help="USD per 1M output tokens"
+    )
+    parser.add_argument("--tokens-per-second", type=float, default=60.0)
+    parser.add_argument("--first-token-seconds", type=float, default=0.5)
+    parser.add_argument("--openai-base-url", default="")
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--max-tokens", type=int, default=2048)
+    parser.add_argument("--heuristic", action="store_true")
+    parser.add_argument("--size-kb", type=int, default=100)
+    args = parser.parse_args()
+
+    if args.heuristic:
+        return run_heuristic_benchmark(args)
+
+    results = run_benchmark(args)
+    source = "measured" if args.openai_base_url else "estimated"
+    print(
+        f"{len(results)} messages, rules median of {args.repeat} run(s), "
+        f"LLM {source}"
+    )
+    print(
+        f"{'msg':>3} {'chars':>6} {'rules ms':>9} {'llm s':>7} {'llm $':>9} "
+        f"{'auto':>5}"
+    )
+    for index, result in enumerate(results, start=1):
+        print(
+            f"{index:>3} {result['chars']:>6} "
+            f"{result['rules_seconds'] * 1000:>9.2f} "
+            f"{result['llm_seconds']:>7.2f} "
+            f"{result['llm_cost']:>9.6f} "
+            f"{'llm' if result['auto_uses_llm'] else 'rules':>5}"
+        )
+
+    rules_total = sum(result["rules_seconds"] for result in results)
+    llm_total = sum(result["llm_seconds"] for result in results)
+    cost_total = sum(result["llm_cost"] for result in results)
+    auto_share = sum(result["auto_uses_llm"] for result in results) / len(results)
+    print(
+        f"\nrules total {rules_total:.3f}s, LLM total {llm_total:.1f}s "
+        f"(x{llm_total / rules_total:,.0f}), LLM cost ${cost_total:.4f}; "
+        f"auto mode sends {auto_share:.0%} of messages to the LLM"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
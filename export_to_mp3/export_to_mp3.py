@@ -10,15 +10,25 @@ icon_url: https://www.svgrepo.com/show/362087/file-sound.svg
 
 from __future__ import annotations
 
+import asyncio
 import base64
+import contextvars
+import hashlib
 import io
 import json
 import logging
 import os
+import queue
+import random
 import re
+import string
 import tempfile
+import threading
 import time
+import uuid
+import wave
 import zipfile
+from collections import OrderedDict
 from pathlib import Path
 from typing import Any
 
@@ -33,19 +43,41 @@ from open_webui.config import CACHE_DIR
 
 LOGGER = logging.getLogger(__name__)
 
+COMPLETION_CACHE_ENTRIES = 128
+COMPLETION_CACHE_TTL_SECONDS = 900
+COMPLETION_RETRY_BACKOFF_SECONDS = 0.5
+COMPLETION_USAGE_FIELDS = ("prompt_tokens", "completion_tokens", "total_tokens")
 MIN_CLEANUP_MAX_TOKENS = 256
-HEADING_RE = re.compile(r"^\s{0,3}#{1,6}\s*(.+?)\s*$")
-CHECKBOX_RE = re.compile(r"^\s*[-*+]\s+\[[ xX]\]\s+(.*)$")
-BULLET_RE = re.compile(r"^\s*[-*+]\s+(.*)$")
-NUMBERED_RE = re.compile(r"^\s*(\d+)[.)]\s+(.*)$")
-QUOTE_RE = re.compile(r"^\s*(>+)\s*(.*)$")
+# Block prefixes are matched against one stripped line; the first matching
+# alternative wins and LINE_PREFIX_FORMATS rebuilds the speakable text.
+LINE_PREFIX_RE = re.compile(
+    r"^(?:#{1,6}[ \t]*(?P<heading>.+?)[ \t]*"
+    r"|[-*+][ \t]+\[[ xX]\][ \t]+(?P<checkbox>.*)"
+    r"|[-*+][ \t]+(?P<bullet>.*)"
+    r"|(?P<number>\d+)[.)][ \t]+(?P<numbered>.*)"
+    r"|>+[ \t]*(?P<quote>.*))$"
+)
+LINE_PREFIX_FORMATS = {
+    "heading": "{heading}",
+    "checkbox": "{checkbox}",
+    "bullet": "{bullet}",
+    "numbered": "{number}. {numbered}",
+    "quote": "{quote}",
+}
+# Inline patterns never cross a line break, so they can run once over a whole
+# message instead of once per line.
+# The whole-message pre-passes use MARKDOWN_LINK_RE and OWUI_CITATION_RE, which
+# may span lines; the LINE_ variants are for the joined per-line inline pass.
 MARKDOWN_LINK_RE = re.compile(r"\[([^\]]+)\]\(([^)\s]+(?:\s+\"[^\"]*\")?)\)")
+LINE_MARKDOWN_LINK_RE = re.compile(
+    r"\[([^\]\n]+)\]\(([^)\s]+(?:[ \t]+\"[^\"\n]*\")?)\)"
+)
 IMAGE_RE = re.compile(r"!\[[^\]]*\]\([^)]+\)")
-INLINE_CODE_RE = re.compile(r"`([^`]+)`")
+INLINE_CODE_RE = re.compile(r"`([^`\n]+)`")
 BOLD_RE = re.compile(r"\*\*(.*?)\*\*")
 DOUBLE_UNDERSCORE_RE = re.compile(r"__(.*?)__")
-ITALIC_STAR_RE = re.compile(r"(?<!\*)\*([^*]+)\*(?!\*)")
-ITALIC_UNDERSCORE_RE = re.compile(r"(?<!_)_([^_]+)_(?!_)")
+ITALIC_STAR_RE = re.compile(r"(?<!\*)\*([^*\n]+)\*(?!\*)")
+ITALIC_UNDERSCORE_RE = re.compile(r"(?<!_)_([^_\n]+)_(?!_)")
 STRIKETHROUGH_RE = re.compile(r"~~(.*?)~~")
 CODE_FENCE_RE = re.compile(r"```(?:[a-zA-Z0-9_-]+)?\s*\n.*?\n```", re.DOTALL)
 MERMAID_FENCE_RE = re.compile(r"```mermaid\s*\n.*?\n```", re.DOTALL | re.IGNORECASE)
@@ -55,9 +87,55 @@ URL_RE = re.compile(r"https?://[^\s<>()]+", re.IGNORECASE)
 TABLE_SEPARATOR_RE = re.compile(r"^\s*\|?[\s:-]+\|[\s|:-]*$")
 BRACKET_CITATION_RE = re.compile(r"\[\d+\]")
 OWUI_CITATION_RE = re.compile(r"\u3010[^\u3011]+\u3011")
+LINE_OWUI_CITATION_RE = re.compile(r"\u3010[^\u3011\n]+\u3011")
 CONTROL_RE = re.compile(r"[\x00-\x08\x0B\x0C\x0E-\x1F]")
 HORIZONTAL_WHITESPACE_RE = re.compile(r"[ \t]+")
-BLANK_BLOCK_RE = re.compile(r"\n{3,}")
+STRUCTURED_CHARS = "{}[];<>_=\\/"
+CODE_HINT_RE = re.compile(
+    r"(?:\bdef\b|\bclass\b|\breturn\b|\bimport\b|=>|::|</?\w+>|^\{|\}$)"
+)
+PARAGRAPH_SPLIT_RE = re.compile(r"\n\s*\n")
+SENTENCE_SPLIT_RE = re.compile(r"((?<=[.!?\u2026])\s+|\n+)")
+CLAUSE_SPLIT_RE = re.compile(r"(?<=[,;:])\s+")
+FFMPEG_BINARY = "ffmpeg"
+PCM_SAMPLE_RATE = 24000
+MP3_BITRATE = "128k"
+OPUS_BITRATE = "32k"
+AAC_BITRATE = "64k"
+AUDIO_CODECS = {
+    "mp3": {
+        "extension": "mp3",
+        "mime_type": "audio/mpeg",
+        "bitrate": MP3_BITRATE,
+        "ffmpeg_args": ["-c:a", "libmp3lame", "-f", "mp3"],
+    },
+    "opus": {
+        "extension": "ogg",
+        "mime_type": "audio/ogg",
+        "bitrate": OPUS_BITRATE,
+        "ffmpeg_args": ["-c:a", "libopus", "-application", "voip", "-f", "ogg"],
+    },
+    "aac": {
+        "extension": "aac",
+        "mime_type": "audio/aac",
+        "bitrate": AAC_BITRATE,
+        "ffmpeg_args": ["-c:a", "aac", "-f", "adts"],
+    },
+}
+# MPEG-2 layer III tops out at 160 kbps for the 24 kHz speech stream.
+AUDIO_BITRATES = ["auto", "16k", "24k", "32k", "48k", "64k", "96k", "128k", "160k"]
+AUDIO_CHANNELS = {"mono": 1, "stereo": 2}
+# Engines whose `response_format` is honoured, so Opus and AAC can be requested
+# directly instead of being transcoded from MP3.
+NATIVE_FORMAT_ENGINES = {"openai"}
+AUDIOBOOK_FORMATS = {
+    "mp3": {"extension": "mp3", "mime_type": "audio/mpeg"},
+    "m4b": {"extension": "m4b", "mime_type": "audio/mp4"},
+}
+AUDIOBOOK_QUEUE_SIZE = 2
+CHAPTER_TITLE_CHARS = 60
+ID3_MAX_CHAPTERS = 255
+CLEANUP_CHUNK_CHARS = 6000
 INLINE_MARKDOWN_PATTERNS = (
     (INLINE_CODE_RE, " "),
     (BOLD_RE, r"\1"),
@@ -65,7 +143,13 @@ INLINE_MARKDOWN_PATTERNS = (
     (ITALIC_STAR_RE, r"\1"),
     (ITALIC_UNDERSCORE_RE, r"\1"),
     (STRIKETHROUGH_RE, r"\1"),
+    (BRACKET_CITATION_RE, ""),
+    (LINE_OWUI_CITATION_RE, ""),
+    (URL_RE, ""),
 )
+STRUCTURED_CHARS_TABLE = str.maketrans("", "", STRUCTURED_CHARS)
+ASCII_LETTERS_TABLE = str.maketrans("", "", string.ascii_letters)
+ASCII_ALNUM_TABLE = str.maketrans("", "", string.ascii_letters + string.digits)
 DEFAULT_CLEANUP_PROMPT = (
     "You convert assistant messages into plain text for text-to-speech. "
     "Return only the final spoken text, with no markdown, no code fences, and no JSON. "
@@ -75,6 +159,220 @@ DEFAULT_CLEANUP_PROMPT = (
     "sentences when helpful. If the message is mostly code or structured data, replace it with a "
     "brief plain-language explanation of what it contains instead of reading it verbatim."
 )
+CLEANUP_MODES = ("auto", "rules", "llm")
+FENCED_BLOCK_RE = re.compile(
+    r"^[ \t]*```[ \t]*([\w+#.-]*)[^\n]*\n(.*?)^[ \t]*```[ \t]*$",
+    re.DOTALL | re.MULTILINE,
+)
+CODE_DEFINITION_RE = re.compile(
+    r"^\s*(?:export\s+)?(?:async\s+)?(def|function|func|fn|class|struct|interface)\s+"
+    r"([A-Za-z_]\w*)",
+    re.MULTILINE,
+)
+EMAIL_RE = re.compile(r"\b([\w.+-]+)@((?:[A-Za-z0-9-]+\.)+[A-Za-z]{2,})\b")
+BARE_DOMAIN_RE = re.compile(
+    r"(?<![\w@/.-])((?:[A-Za-z0-9-]+\.)+(?:com|org|net|io|dev|ai|app|edu|gov|co|uk|de))"
+    r"\b(?![.-]\w)",
+    re.IGNORECASE,
+)
+LATEX_RE = re.compile(r"\$\$|\\\(|\\\[|\\frac|\\sum|\\int")
+ISO_DATE_RE = re.compile(r"\b(\d{4})-(0[1-9]|1[0-2])-(0[1-9]|[12]\d|3[01])\b")
+MONTH_NAME_PATTERN = (
+    r"(January|February|March|April|May|June|July|August|September|October|"
+    r"November|December|Jan|Feb|Mar|Apr|Jun|Jul|Aug|Sept|Sep|Oct|Nov|Dec)\.?"
+)
+MONTH_DAY_RE = re.compile(
+    MONTH_NAME_PATTERN + r"\s+(\d{1,2})(?:st|nd|rd|th)?\b(?:,?\s+(\d{4})\b)?"
+)
+DAY_MONTH_RE = re.compile(
+    r"\b(\d{1,2})(?:st|nd|rd|th)?\s+" + MONTH_NAME_PATTERN + r"(?:,?\s+(\d{4})\b)?"
+)
+# Clock times, ratios, ranges and versions are only verbalized next to a keyword
+# or unit that makes the reading unambiguous; otherwise the digits are kept.
+TIME_RE = re.compile(
+    r"(\b(?:at|by|until|till|before|after|around|from|since|between)\s+)?"
+    r"\b([01]?\d|2[0-3]):([0-5]\d)(?:\s?([AaPp])\.?[Mm]\b)?(?![\d:])",
+    re.IGNORECASE,
+)
+RATIO_RE = re.compile(
+    r"(\bratio\s+of\s+)?(?<![\w:.])(\d+):(\d+)(?![\w:]|[.,]\d)"
+    r"(\s+(?:aspect\s+)?ratios?\b)?",
+    re.IGNORECASE,
+)
+VERSION_RE = re.compile(
+    r"(\b(?:version|release)\s+|\bv)(\d+(?:\.\d+)+)(?![\w]|[.,]\d)",
+    re.IGNORECASE,
+)
+PHONE_RE = re.compile(
+    r"(?<![\w.+-])(?:\+(\d{1,3})[\s.-]?)?\(?(\d{3})\)?[\s.-](\d{3})[.-](\d{4})"
+    r"(?![\w-]|[.,]\d)"
+)
+AMOUNT_PATTERN = r"(\d{1,3}(?:,\d{3})+|\d+)(?:\.(\d+))?"
+CURRENCY_RE = re.compile(
+    r"(-)?([$€£¥])\s?" + AMOUNT_PATTERN + r"(?:\s?(k|K|M|bn|B)\b)?"
+)
+CURRENCY_CODE_RE = re.compile(AMOUNT_PATTERN + r"\s?(USD|EUR|GBP|JPY)\b")
+PERCENT_RE = re.compile(r"(?<![\w.,])(-)?" + AMOUNT_PATTERN + r"\s?%")
+UNIT_RE = re.compile(
+    r"(?<![\w.,])" + AMOUNT_PATTERN + r"\s?"
+    r"(km/h|kWh|GHz|MHz|mph|°C|°F|km|kg|mg|ms|GB|MB|KB|TB|cm|mm|ml|kW|min|m|g|s|h|W)"
+    r"(?![\w/])"
+)
+ORDINAL_RE = re.compile(r"\b(\d+)(?:st|nd|rd|th)\b")
+NUMBER_RANGE_RE = re.compile(
+    r"(\b(?:pages?|pp\.|chapters?|sections?|steps?|items?|lines?|verses?|rows?|"
+    r"levels?|ages?|from|between)\s+)?"
+    r"(?<![\w.,-])(\d+)(?:\s?(–)\s?|-)(\d+)(?![\w-]|[.,]\d)",
+    re.IGNORECASE,
+)
+HASH_NUMBER_RE = re.compile(r"#(\d+)\b")
+YEAR_CONTEXT_RE = re.compile(
+    r"\b(in|for|since|by|from|until|before|after|during|of|year|circa|to)\s+"
+    r"(1[1-9]\d\d|20\d\d)\b",
+    re.IGNORECASE,
+)
+NUMBER_RE = re.compile(
+    r"(?<![\w.,:/+-])(-)?" + AMOUNT_PATTERN + r"(?![\w:/-]|[.,]\d)"
+)
+ACRONYM_RE = re.compile(r"\b([A-Z]{2,5})(s?)\b")
+ROMAN_NUMERAL_RE = re.compile(r"^[IVX]+$")
+VOWELS = set("AEIOUY")
+ONES = (
+    "zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine",
+    "ten", "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen",
+    "seventeen", "eighteen", "nineteen",
+)
+TENS = (
+    "", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty",
+    "ninety",
+)
+SCALES = (
+    (10**12, "trillion"),
+    (10**9, "billion"),
+    (10**6, "million"),
+    (10**3, "thousand"),
+)
+IRREGULAR_ORDINALS = {
+    "one": "first",
+    "two": "second",
+    "three": "third",
+    "five": "fifth",
+    "eight": "eighth",
+    "nine": "ninth",
+    "twelve": "twelfth",
+}
+MONTH_NAMES = (
+    "January", "February", "March", "April", "May", "June", "July", "August",
+    "September", "October", "November", "December",
+)
+CURRENCY_WORDS = {
+    "$": ("dollar", "dollars", "cent", "cents"),
+    "USD": ("US dollar", "US dollars", "cent", "cents"),
+    "€": ("euro", "euros", "cent", "cents"),
+    "EUR": ("euro", "euros", "cent", "cents"),
+    "£": ("pound", "pounds", "penny", "pence"),
+    "GBP": ("pound", "pounds", "penny", "pence"),
+    "¥": ("yen", "yen", "", ""),
+    "JPY": ("yen", "yen", "", ""),
+}
+MAGNITUDE_WORDS = {
+    "k": "thousand",
+    "K": "thousand",
+    "M": "million",
+    "bn": "billion",
+    "B": "billion",
+}
+UNIT_WORDS = {
+    "km/h": ("kilometer per hour", "kilometers per hour"),
+    "kWh": ("kilowatt hour", "kilowatt hours"),
+    "GHz": ("gigahertz", "gigahertz"),
+    "MHz": ("megahertz", "megahertz"),
+    "mph": ("mile per hour", "miles per hour"),
+    "°C": ("degree Celsius", "degrees Celsius"),
+    "°F": ("degree Fahrenheit", "degrees Fahrenheit"),
+    "km": ("kilometer", "kilometers"),
+    "kg": ("kilogram", "kilograms"),
+    "mg": ("milligram", "milligrams"),
+    "ms": ("millisecond", "milliseconds"),
+    "GB": ("gigabyte", "gigabytes"),
+    "MB": ("megabyte", "megabytes"),
+    "KB": ("kilobyte", "kilobytes"),
+    "TB": ("terabyte", "terabytes"),
+    "cm": ("centimeter", "centimeters"),
+    "mm": ("millimeter", "millimeters"),
+    "ml": ("milliliter", "milliliters"),
+    "kW": ("kilowatt", "kilowatts"),
+    "min": ("minute", "minutes"),
+    "m": ("meter", "meters"),
+    "g": ("gram", "grams"),
+    "s": ("second", "seconds"),
+    "h": ("hour", "hours"),
+    "W": ("watt", "watts"),
+}
+SPOKEN_ABBREVIATIONS = (
+    (re.compile(r"\be\.g\.,?", re.IGNORECASE), "for example,"),
+    (re.compile(r"\bi\.e\.,?", re.IGNORECASE), "that is,"),
+    (re.compile(r"\betc\.", re.IGNORECASE), "et cetera."),
+    (re.compile(r"\bvs\.?(?=\s)", re.IGNORECASE), "versus"),
+    (re.compile(r"\s&\s"), " and "),
+    (re.compile(r"\s?(?:->|→)\s?"), " to "),
+    (re.compile(r"(?<![\w~])[~≈]\s?(?=\d)"), "about "),
+    (re.compile(r"\bOK\b"), "okay"),
+    (re.compile(r"(?<![\w/])24/7(?![\w/])"), "twenty-four seven"),
+)
+# Upper-case tokens that are read as words rather than spelled out.
+SPOKEN_ACRONYMS = {
+    "AN", "AND", "ARE", "AS", "AT", "BE", "BUT", "BY", "CAN", "DO", "FOR", "GO",
+    "HOW", "IF", "IN", "IS", "IT", "MY", "NEW", "NO", "NOT", "NOW", "OF", "ON", "OR",
+    "OUT", "SO", "THE", "TO", "TOP", "UP", "USE", "WE", "WHY", "YES", "YOU",
+    "ALL", "ONE", "GIF", "NASA", "NATO", "JSON", "YAML", "TOML", "RAM", "ROM",
+}
+CODE_LANGUAGE_NAMES = {
+    "py": "Python",
+    "python": "Python",
+    "js": "JavaScript",
+    "javascript": "JavaScript",
+    "jsx": "JavaScript",
+    "ts": "TypeScript",
+    "typescript": "TypeScript",
+    "tsx": "TypeScript",
+    "java": "Java",
+    "kotlin": "Kotlin",
+    "go": "Go",
+    "golang": "Go",
+    "rs": "Rust",
+    "rust": "Rust",
+    "c": "C",
+    "cpp": "C plus plus",
+    "c++": "C plus plus",
+    "cs": "C sharp",
+    "csharp": "C sharp",
+    "c#": "C sharp",
+    "rb": "Ruby",
+    "ruby": "Ruby",
+    "php": "PHP",
+    "swift": "Swift",
+    "sql": "SQL",
+    "html": "HTML",
+    "css": "CSS",
+    "sh": "shell",
+    "bash": "shell",
+    "zsh": "shell",
+    "shell": "shell",
+    "console": "shell",
+    "powershell": "PowerShell",
+    "ps1": "PowerShell",
+    "json": "JSON",
+    "yaml": "YAML",
+    "yml": "YAML",
+    "toml": "TOML",
+    "xml": "XML",
+    "csv": "CSV",
+    "dockerfile": "Dockerfile",
+    "r": "R",
+}
+DATA_LANGUAGES = {"JSON", "YAML", "TOML", "XML", "CSV"}
+TABLE_ROWS_SPOKEN = 5
 CMU_ARCTIC_XVECTORS_URL = (
     "https://huggingface.co/datasets/Matthijs/cmu-arctic-xvectors/resolve/main/"
     "spkrec-xvect.zip"
@@ -82,6 +380,12 @@ CMU_ARCTIC_XVECTORS_URL = (
 SPEAKER_EMBEDDINGS_CACHE_DIR = CACHE_DIR / "audio" / "speaker_embeddings"
 SPEAKER_EMBEDDINGS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
 CMU_ARCTIC_XVECTORS_ARCHIVE_PATH = SPEAKER_EMBEDDINGS_CACHE_DIR / "spkrec-xvect.zip"
+CMU_ARCTIC_XVECTORS_MATRIX_PATH = SPEAKER_EMBEDDINGS_CACHE_DIR / "xvectors-f32.npy"
+CMU_ARCTIC_XVECTORS_INDEX_PATH = SPEAKER_EMBEDDINGS_CACHE_DIR / "xvectors-index.json"
+DEFAULT_SPEAKER_INDEX = 6799
+SPOKEN_EXPORT_CACHE_DIR = CACHE_DIR / "audio" / "spoken_export"
+TRANSFORMERS_TTS_MODEL = "microsoft/speecht5_tts"
+SPEAKER_EMBEDDING_SIZE = 512
 
 
 class _SyntheticSpeechRequest:
@@ -94,36 +398,597 @@ class _SyntheticSpeechRequest:
 
 
 class _SpeakerEmbeddingsDataset:
-    def __init__(self, archive_path: str, members: list[str]):
-        self.archive_path = archive_path
-        self.members = members
-        self.filenames = [
-            os.path.splitext(os.path.basename(member))[0] for member in members
-        ]
+    """Speaker x-vectors backed by a memory-mapped float32 matrix.
+
+    Mimics the small part of the Hugging Face dataset interface Open WebUI
+    uses (`dataset["filename"]` and `dataset[index]["xvector"]`), and adds
+    O(1) name lookup and nearest-neighbour voice search.
+    """
+
+    def __init__(self, matrix, filenames: list[str]):
+        self.matrix = matrix
+        self.filenames = filenames
+        self.rows = {filename: row for row, filename in enumerate(filenames)}
+        self._unit_matrix = None
 
     def __getitem__(self, key):
         if key == "filename":
             return self.filenames
 
         if isinstance(key, int):
-            import numpy as np
-
-            member = self.members[key]
-            with zipfile.ZipFile(self.archive_path, "r") as archive:
-                with archive.open(member) as embedding_file:
-                    xvector = np.load(
-                        io.BytesIO(embedding_file.read()),
-                        allow_pickle=False,
-                    )
             return {
                 "filename": self.filenames[key],
-                "xvector": xvector,
+                "xvector": self.matrix[key],
             }
 
         raise KeyError(key)
 
     def __len__(self):
-        return len(self.members)
+        return len(self.filenames)
+
+    def index_of(self, filename: str) -> int | None:
+        return self.rows.get(filename)
+
+    def nearest(self, filename: str, limit: int = 5) -> list[tuple[str, float]]:
+        import numpy as np
+
+        row = self.index_of(filename)
+        if row is None:
+            return []
+
+        if self._unit_matrix is None:
+            norms = np.linalg.norm(self.matrix, axis=1, keepdims=True)
+            self._unit_matrix = self.matrix / np.maximum(norms, 1e-12)
+
+        similarities = self._unit_matrix @ self._unit_matrix[row]
+        similarities[row] = -np.inf
+        count = min(limit, len(self.filenames) - 1)
+        if count <= 0:
+            return []
+        candidates = np.argpartition(-similarities, count - 1)[:count]
+        ranked = candidates[np.argsort(-similarities[candidates])]
+        return [(self.filenames[index], float(similarities[index])) for index in ranked]
+
+
+class _SpokenExportCache:
+    """Content-addressed file cache with size-bounded LRU eviction.
+
+    Recency is tracked through file modification times, which are refreshed
+    on every hit, so the cache survives restarts and is shared by all users.
+    The methods do blocking file I/O; call them through `asyncio.to_thread`.
+    The size total is scanned once and then kept up to date on every write.
+    """
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._total_bytes: int | None = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        encoded = json.dumps(parts, ensure_ascii=False, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def _path(self, namespace: str, key: str) -> Path:
+        return self.root / namespace / key[:2] / key
+
+    def get(self, namespace: str, key: str) -> bytes | None:
+        path = self._path(namespace, key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def put(self, namespace: str, key: str, data: bytes) -> None:
+        path = self._path(namespace, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{key}.{uuid.uuid4().hex}.tmp")
+        temp_path.write_bytes(data)
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._entries())
+            try:
+                replaced_bytes = path.stat().st_size
+            except OSError:
+                replaced_bytes = 0
+            os.replace(temp_path, path)
+            self._total_bytes += len(data) - replaced_bytes
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries: list[tuple[float, int, Path]] = []
+        if not self.root.is_dir():
+            return entries
+        for path in self.root.rglob("*"):
+            if path.suffix == ".tmp":
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if path.is_file():
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries(), key=lambda entry: entry[0])
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+        self._total_bytes = total
+
+
+class _TransformersSpeechWorker:
+    """Process-wide SpeechT5 inference thread shared by every export.
+
+    Segment requests from all users are queued here, collected for a short
+    batching window and run as one forward pass per speaker, so the event
+    loop never blocks on torch and the pipeline is loaded only once.
+    """
+
+    _WARM_UP = object()
+
+    def __init__(self):
+        self.max_batch = 4
+        self.batch_window = 0.025
+        self.torch_threads = 0
+        self.synthesiser = None
+        self._applied_threads = 0
+        self._batching_supported = True
+        self._warm_up_queued = False
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "batches": 0,
+            "max_queue_depth": 0,
+            "last_batch_size": 0,
+            "last_batch_seconds": 0.0,
+        }
+
+    def configure(self, max_batch: int, batch_window_ms: int, torch_threads: int):
+        self.max_batch = max_batch
+        self.batch_window = batch_window_ms / 1000
+        self.torch_threads = torch_threads
+
+    def adopt(self, synthesiser) -> None:
+        """Reuse a pipeline Open WebUI already loaded instead of loading another."""
+        if self.synthesiser is None and synthesiser is not None:
+            self.synthesiser = synthesiser
+
+    def warm_up(self) -> None:
+        """Queue one model load per process; later calls are no-ops."""
+        with self._lock:
+            if self._warm_up_queued or self.synthesiser is not None:
+                return
+            self._warm_up_queued = True
+        self._queue.put(self._WARM_UP)
+        self._ensure_thread()
+
+    def submit(self, text: str, speaker_key: Any, speaker_embedding) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put((text, speaker_key, speaker_embedding, loop, future))
+        with self._lock:
+            self._stats["submitted"] += 1
+            self._stats["max_queue_depth"] = max(
+                self._stats["max_queue_depth"], self._queue.qsize()
+            )
+        self._ensure_thread()
+        return future
+
+    def metrics(self) -> dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        batches = stats["batches"]
+        stats["queue_depth"] = self._queue.qsize()
+        stats["average_batch_size"] = (
+            round(stats["completed"] / batches, 2) if batches else 0.0
+        )
+        stats["model_loaded"] = self.synthesiser is not None
+        return stats
+
+    def _ensure_thread(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run,
+                name="spoken-export-tts",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def _load(self):
+        import torch
+
+        # torch has no per-thread setting, so this changes the whole process.
+        if self.torch_threads and self.torch_threads != self._applied_threads:
+            torch.set_num_threads(self.torch_threads)
+            self._applied_threads = self.torch_threads
+
+        if self.synthesiser is None:
+            from transformers import pipeline
+
+            self.synthesiser = pipeline("text-to-speech", TRANSFORMERS_TTS_MODEL)
+        return self.synthesiser
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is self._WARM_UP:
+                self._run_warm_up()
+                continue
+
+            batch = [job]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    job = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if job is not self._WARM_UP:
+                    batch.append(job)
+
+            self._process(batch)
+
+    def _run_warm_up(self) -> None:
+        import numpy as np
+
+        started = time.perf_counter()
+        try:
+            self._infer(["Ready."], np.zeros(SPEAKER_EMBEDDING_SIZE, dtype=np.float32))
+        except Exception:
+            LOGGER.exception("[export_to_spoken_mp3] transformers TTS warm-up failed")
+            return
+        LOGGER.info(
+            "[export_to_spoken_mp3] transformers TTS warmed up in %.1fs",
+            time.perf_counter() - started,
+        )
+
+    def _process(self, batch: list[tuple]) -> None:
+        started = time.perf_counter()
+        groups: dict[Any, list[tuple]] = {}
+        for job in batch:
+            groups.setdefault(job[1], []).append(job)
+
+        for jobs in groups.values():
+            try:
+                outputs = self._infer([job[0] for job in jobs], jobs[0][2])
+            except Exception as exc:
+                for job in jobs:
+                    self._resolve(job, error=exc)
+                continue
+            for job, output in zip(jobs, outputs):
+                self._resolve(job, result=output)
+
+        with self._lock:
+            self._stats["batches"] += 1
+            self._stats["last_batch_size"] = len(batch)
+            self._stats["last_batch_seconds"] = round(
+                time.perf_counter() - started, 3
+            )
+
+    def _infer(self, texts: list[str], speaker_embedding) -> list[dict]:
+        import torch
+
+        synthesiser = self._load()
+        forward_params = {
+            "speaker_embeddings": torch.tensor(speaker_embedding).unsqueeze(0)
+        }
+        with torch.inference_mode():
+            if len(texts) > 1 and self._batching_supported:
+                try:
+                    return list(
+                        synthesiser(
+                            texts,
+                            forward_params=forward_params,
+                            batch_size=len(texts),
+                        )
+                    )
+                except Exception as exc:
+                    # Older transformers releases cannot batch SpeechT5
+                    # generation; remember that and run the texts one by one.
+                    LOGGER.warning(
+                        "[export_to_spoken_mp3] batched TTS failed, "
+                        "falling back to single requests: %s",
+                        exc,
+                    )
+                    self._batching_supported = False
+            return [
+                synthesiser(text, forward_params=forward_params) for text in texts
+            ]
+
+    def _resolve(self, job: tuple, result=None, error: Exception | None = None):
+        loop, future = job[3], job[4]
+        with self._lock:
+            self._stats["failed" if error is not None else "completed"] += 1
+
+        def settle():
+            if future.done():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+        try:
+            loop.call_soon_threadsafe(settle)
+        except RuntimeError:
+            pass
+
+
+_SPEECH_WORKER: _TransformersSpeechWorker | None = None
+_SPEECH_WORKER_LOCK = threading.Lock()
+# Held while the speaker embeddings are downloaded and converted, so concurrent
+# first exports build the dataset only once.
+_SPEAKER_EMBEDDINGS_LOCK = threading.Lock()
+
+
+def _get_speech_worker() -> _TransformersSpeechWorker:
+    global _SPEECH_WORKER
+    with _SPEECH_WORKER_LOCK:
+        if _SPEECH_WORKER is None:
+            _SPEECH_WORKER = _TransformersSpeechWorker()
+        return _SPEECH_WORKER
+
+
+class _CompletionError(RuntimeError):
+    def __init__(self, message: str, status_code: int | None = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class _CompletionClient:
+    """Open WebUI chat completions with a deadline, hedged retries, a response
+    cache and per-call token and latency metrics.
+
+    Open WebUI loads every action as a single file, so each action that calls
+    the chat model carries its own copy of this class. Keep the copies identical.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = COMPLETION_CACHE_ENTRIES,
+        ttl_seconds: float = COMPLETION_CACHE_TTL_SECONDS,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._cache: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._calls: contextvars.ContextVar[list[dict[str, Any]] | None] = (
+            contextvars.ContextVar(f"completion_calls_{id(self)}", default=None)
+        )
+
+    @staticmethod
+    def _digest(value: Any) -> str:
+        encoded = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def cache_key(self, payload: dict[str, Any], user_id: str | None = None) -> str:
+        messages = payload.get("messages") or []
+        prompt = [message for message in messages if message.get("role") == "system"]
+        inputs = [message for message in messages if message.get("role") != "system"]
+        options = {
+            key: value
+            for key, value in payload.items()
+            if key not in ("model", "messages")
+        }
+        return self._digest(
+            [
+                user_id,
+                payload.get("model"),
+                self._digest(prompt),
+                self._digest([inputs, options]),
+            ]
+        )
+
+    def _cache_get(self, key: str) -> dict[str, Any] | None:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        stored_at, response = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            self._cache.pop(key, None)
+            return None
+        self._cache.move_to_end(key)
+        return response
+
+    def _cache_put(self, key: str, response: dict[str, Any]) -> None:
+        self._cache[key] = (time.monotonic(), response)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def track(self) -> list[dict[str, Any]]:
+        """Collect the metrics of every completion made by the current task and
+        the tasks it starts."""
+        calls: list[dict[str, Any]] = []
+        self._calls.set(calls)
+        return calls
+
+    def record(self, model: Any) -> dict[str, Any]:
+        """Register one call with the current tracker and return its metrics,
+        which the caller updates in place. Calls made outside `complete`, such
+        as streamed completions, use this to appear in the summary."""
+        metrics: dict[str, Any] = {
+            "model": model,
+            "ok": False,
+            "cached": False,
+            "attempts": 0,
+            "hedged": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "total_tokens": 0,
+            "latency_ms": 0,
+        }
+        calls = self._calls.get()
+        if calls is not None:
+            calls.append(metrics)
+        return metrics
+
+    @staticmethod
+    def summarize(calls: list[dict[str, Any]]) -> dict[str, Any]:
+        return {
+            "calls": len(calls),
+            "cache_hits": sum(call["cached"] for call in calls),
+            "attempts": sum(call["attempts"] for call in calls),
+            "hedged": sum(call["hedged"] for call in calls),
+            "failures": sum(not call["ok"] for call in calls),
+            "prompt_tokens": sum(call["prompt_tokens"] for call in calls),
+            "completion_tokens": sum(call["completion_tokens"] for call in calls),
+            "total_tokens": sum(call["total_tokens"] for call in calls),
+            "latency_ms": sum(call["latency_ms"] for call in calls),
+            "max_latency_ms": max((call["latency_ms"] for call in calls), default=0),
+        }
+
+    @staticmethod
+    def _retryable(error: BaseException) -> bool:
+        status_code = getattr(error, "status_code", None)
+        return status_code is None or status_code >= 500 or status_code in (408, 429)
+
+    async def _attempt(self, request, payload: dict[str, Any], user) -> dict[str, Any]:
+        response = await generate_chat_completion(
+            request,
+            payload,
+            user,
+            bypass_system_prompt=True,
+        )
+        if isinstance(response, dict):
+            return response
+
+        status_code = getattr(response, "status_code", 200)
+        body = getattr(response, "body", None)
+        try:
+            parsed = json.loads(body.decode("utf-8")) if body else {}
+        except Exception:
+            parsed = {}
+        if status_code >= 400:
+            detail = body.decode("utf-8", errors="replace") if body else ""
+            raise _CompletionError(
+                f"Chat completion failed with HTTP {status_code}: {detail[:300]}",
+                status_code,
+            )
+        return parsed if isinstance(parsed, dict) else {}
+
+    async def complete(
+        self,
+        request,
+        payload: dict[str, Any],
+        user,
+        *,
+        timeout_seconds: float,
+        max_retries: int,
+        hedge_after_seconds: float,
+        use_cache: bool = True,
+    ) -> dict[str, Any]:
+        """Return the chat completion response for `payload` as a dict.
+
+        The first attempt starts at once. If it has not answered after
+        `hedge_after_seconds`, an identical request races it and the first
+        answer wins. Failed attempts are retried with exponential backoff. Hedges
+        and retries together are capped at `max_retries` extra attempts, and
+        everything must finish within `timeout_seconds`.
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + timeout_seconds
+        metrics = self.record(payload.get("model"))
+
+        key = self.cache_key(payload, getattr(user, "id", None))
+        if use_cache:
+            cached = self._cache_get(key)
+            if cached is not None:
+                metrics.update(ok=True, cached=True)
+                return cached
+
+        pending: set[asyncio.Task] = set()
+        failures = 0
+        last_error: BaseException | None = None
+
+        def launch() -> None:
+            metrics["attempts"] += 1
+            pending.add(asyncio.create_task(self._attempt(request, payload, user)))
+
+        try:
+            launch()
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                can_hedge = (
+                    hedge_after_seconds > 0
+                    and len(pending) == 1
+                    and metrics["attempts"] <= max_retries
+                )
+                wait_seconds = (
+                    min(remaining, hedge_after_seconds) if can_hedge else remaining
+                )
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=wait_seconds,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                pending.difference_update(done)
+                if not done:
+                    if can_hedge:
+                        metrics["hedged"] += 1
+                        launch()
+                    continue
+
+                for task in done:
+                    error = task.exception()
+                    if error is None:
+                        response = task.result()
+                        usage = response.get("usage") or {}
+                        for field in COMPLETION_USAGE_FIELDS:
+                            metrics[field] = int(usage.get(field) or 0)
+                        metrics["ok"] = True
+                        if use_cache and response.get("choices"):
+                            self._cache_put(key, response)
+                        return response
+                    if not self._retryable(error):
+                        raise error
+                    failures += 1
+                    last_error = error
+
+                if not pending and metrics["attempts"] <= max_retries:
+                    delay = COMPLETION_RETRY_BACKOFF_SECONDS * 2 ** (failures - 1)
+                    delay *= random.uniform(0.5, 1.0)
+                    if loop.time() + delay >= deadline:
+                        break
+                    await asyncio.sleep(delay)
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+            metrics["latency_ms"] = round((loop.time() - started) * 1000)
+
+        if last_error is not None and not pending:
+            raise last_error
+        raise TimeoutError(
+            f"Chat completion did not finish within {timeout_seconds:g} seconds."
+        )
+
+
+_COMPLETIONS = _CompletionClient()
 
 
 class Action:
@@ -139,10 +1004,19 @@ class Action:
         use_llm_cleanup: bool = Field(
             default=True,
             description=(
-                "Use the current chat model to convert the assistant message into "
+                "Allow the current chat model to convert the assistant message into "
                 "speech-friendly plain text before synthesis."
             ),
         )
+        cleanup_mode: str = Field(
+            default="auto",
+            description=(
+                "`rules` uses only the built-in speech normalizer, `llm` always "
+                "calls the chat model, and `auto` calls the model only for content "
+                "the rules cannot speak well (unfenced code, raw HTML, math)."
+            ),
+            json_schema_extra={"enum": list(CLEANUP_MODES)},
+        )
         cleanup_model: str = Field(
             default="",
             description=(
@@ -162,15 +1036,85 @@ class Action:
             le=8192,
             description="Maximum tokens used for speech-text cleanup.",
         )
+        llm_timeout_seconds: float = Field(
+            default=120.0,
+            ge=1.0,
+            le=900.0,
+            description=(
+                "Deadline for each chat completion, including retries and hedged "
+                "requests."
+            ),
+        )
+        llm_max_retries: int = Field(
+            default=2,
+            ge=0,
+            le=5,
+            description=(
+                "Extra attempts after a failed or slow chat completion. Hedged "
+                "requests count as attempts."
+            ),
+        )
+        llm_hedge_after_seconds: float = Field(
+            default=30.0,
+            ge=0.0,
+            le=600.0,
+            description=(
+                "Send a second identical request when the first has not answered "
+                "after this many seconds; the first answer wins. 0 disables hedging."
+            ),
+        )
+        llm_cache_enabled: bool = Field(
+            default=True,
+            description=(
+                "Reuse the answer for the same user, model, prompt and input "
+                "within this Open WebUI process."
+            ),
+        )
         cleanup_prompt: str = Field(
             default=DEFAULT_CLEANUP_PROMPT,
             description="System prompt used when `use_llm_cleanup` is enabled.",
         )
         max_input_chars: int = Field(
-            default=12000,
+            default=200000,
             ge=500,
-            le=50000,
-            description="Maximum characters sent to the TTS backend after cleanup.",
+            le=1000000,
+            description=(
+                "Safety limit on the total characters synthesized after cleanup. "
+                "Longer text is split into segments, not truncated, below this limit."
+            ),
+        )
+        segment_max_chars: int = Field(
+            default=1500,
+            ge=200,
+            le=4000,
+            description=(
+                "Maximum characters per TTS request. Text is split on paragraph and "
+                "sentence boundaries into segments of at most this size."
+            ),
+        )
+        synthesis_concurrency: int = Field(
+            default=3,
+            ge=1,
+            le=16,
+            description="Maximum number of segments synthesized at the same time.",
+        )
+        segment_gap_ms: int = Field(
+            default=250,
+            ge=0,
+            le=3000,
+            description=(
+                "Silence inserted between segments. Requires ffmpeg; with 0 and no "
+                "crossfade the segment MP3 streams are joined without re-encoding."
+            ),
+        )
+        crossfade_ms: int = Field(
+            default=0,
+            ge=0,
+            le=1000,
+            description=(
+                "Crossfade between segments when `segment_gap_ms` is 0 "
+                "(requires ffmpeg)."
+            ),
         )
         voice: str = Field(
             default="",
@@ -185,14 +1129,165 @@ class Action:
             le=4.0,
             description="Speech speed passed to TTS providers that support it.",
         )
+        cache_enabled: bool = Field(
+            default=True,
+            description=(
+                "Cache cleaned speech text and synthesized segment audio in "
+                "CACHE_DIR so re-exports only redo changed parts."
+            ),
+        )
+        cache_max_mb: int = Field(
+            default=512,
+            ge=16,
+            le=65536,
+            description="Maximum size of the spoken export cache before LRU eviction.",
+        )
+        audio_codec: str = Field(
+            default="mp3",
+            description=(
+                "Codec of the downloaded file. `opus` (Ogg/Opus) and `aac` (ADTS) "
+                "produce much smaller files for speech. They are requested from the "
+                "TTS engine directly when it supports them, and otherwise "
+                "transcoded with ffmpeg."
+            ),
+            json_schema_extra={"enum": list(AUDIO_CODECS)},
+        )
+        audio_bitrate: str = Field(
+            default="auto",
+            description=(
+                "Target bitrate. `auto` keeps the engine's own stream when it "
+                "already has the right codec, and otherwise uses 128k for MP3, 32k "
+                "for Opus and 64k for AAC. Opus at 24k-32k is enough for speech."
+            ),
+            json_schema_extra={"enum": AUDIO_BITRATES},
+        )
+        audio_channels: str = Field(
+            default="mono",
+            description=(
+                "`stereo` copies the mono voice into both channels for players "
+                "that expect two. It makes the file larger, not better."
+            ),
+            json_schema_extra={"enum": list(AUDIO_CHANNELS)},
+        )
+        stream_playback: bool = Field(
+            default=False,
+            description=(
+                "Start playing audio in the browser as soon as the first segment is "
+                "ready. The complete file is still downloaded at the end."
+            ),
+        )
+        export_scope: str = Field(
+            default="message",
+            description=(
+                "Export the current assistant message, or turn the whole "
+                "conversation into an audiobook with one chapter per turn."
+            ),
+            json_schema_extra={"enum": ["message", "conversation"]},
+        )
+        include_user_turns: bool = Field(
+            default=False,
+            description="Also narrate user turns as chapters in conversation mode.",
+        )
+        user_voice: str = Field(
+            default="",
+            description=(
+                "Voice used for user turns in conversation mode. When empty, user "
+                "turns use the same voice as assistant turns."
+            ),
+        )
+        audiobook_format: str = Field(
+            default="mp3",
+            description=(
+                "Conversation audiobook container (both require ffmpeg): `mp3` with "
+                "ID3 chapter frames (at most 255; later turns are merged into the "
+                "last chapter), or `m4b` (AAC with chapters)."
+            ),
+            json_schema_extra={"enum": list(AUDIOBOOK_FORMATS)},
+        )
+        transformers_warm_up: bool = Field(
+            default=False,
+            description=(
+                "Load and warm the local SpeechT5 model when the action is loaded, "
+                "so the first export does not pay the model load. Only useful with "
+                "Open WebUI's `transformers` TTS engine."
+            ),
+        )
+        transformers_max_batch: int = Field(
+            default=4,
+            ge=1,
+            le=32,
+            description=(
+                "Maximum queued segments, across all users, run in one SpeechT5 "
+                "forward pass."
+            ),
+        )
+        transformers_batch_window_ms: int = Field(
+            default=25,
+            ge=0,
+            le=1000,
+            description="How long the TTS worker waits to fill a batch.",
+        )
+        transformers_torch_threads: int = Field(
+            default=0,
+            ge=0,
+            le=256,
+            description=(
+                "Torch intra-op thread count, applied with torch.set_num_threads "
+                "when the TTS worker loads the model. This is a process-wide "
+                "setting that also affects every other torch user in Open WebUI. "
+                "0 leaves torch unchanged."
+            ),
+        )
+        similar_voices: int = Field(
+            default=0,
+            ge=0,
+            le=20,
+            description=(
+                "Number of speakers closest to the configured SpeechT5 voice to "
+                "list in the action result, to help pick an alternative voice. "
+                "0 disables the lookup."
+            ),
+        )
         debug: bool = Field(
             default=False,
             description="Enable verbose server-side debug logging for this action.",
         )
 
     def __init__(self):
+        self._cache: _SpokenExportCache | None = None
         self.valves = self.Valves()
 
+    @property
+    def valves(self) -> "Action.Valves":
+        return self._valves
+
+    @valves.setter
+    def valves(self, valves: "Action.Valves") -> None:
+        # Open WebUI assigns the saved valves right after loading the action,
+        # which is the earliest point the warm-up setting is known. It assigns
+        # them again on every call, so the worker queues the warm-up only once.
+        self._valves = valves
+        if valves.transformers_warm_up:
+            self._get_speech_worker().warm_up()
+
+    def _get_speech_worker(self) -> _TransformersSpeechWorker:
+        worker = _get_speech_worker()
+        worker.configure(
+            self.valves.transformers_max_batch,
+            self.valves.transformers_batch_window_ms,
+            self.valves.transformers_torch_threads,
+        )
+        return worker
+
+    def _get_cache(self) -> _SpokenExportCache | None:
+        if not self.valves.cache_enabled:
+            return None
+        max_bytes = self.valves.cache_max_mb * 1024 * 1024
+        if self._cache is None:
+            self._cache = _SpokenExportCache(SPOKEN_EXPORT_CACHE_DIR, max_bytes)
+        self._cache.max_bytes = max_bytes
+        return self._cache
+
     def _preview(self, value: Any, limit: int = 220) -> str:
         text = value if isinstance(value, str) else str(value)
         text = text.replace("\r", "\\r").replace("\n", "\\n")
@@ -237,8 +1332,65 @@ class Action:
                 }
             )
 
+    def _codec_info(self) -> dict[str, Any]:
+        return AUDIO_CODECS.get(self.valves.audio_codec, AUDIO_CODECS["mp3"])
+
+    def _output_bitrate(self) -> str | None:
+        if self.valves.audio_bitrate == "auto":
+            return None
+        return self.valves.audio_bitrate
+
+    def _output_channels(self) -> int:
+        return AUDIO_CHANNELS.get(self.valves.audio_channels, 1)
+
+    def _engine_response_format(self, config, codec: str) -> str:
+        # The streaming player feeds segments to an `audio/mpeg` source buffer,
+        # so segments stay MP3 while it is in use.
+        if self.valves.stream_playback:
+            return "mp3"
+        # Local SpeechT5 segments stay lossless until the joined file is encoded.
+        if getattr(config, "TTS_ENGINE", None) == "transformers":
+            return "wav"
+        if (
+            codec in ("opus", "aac")
+            and getattr(config, "TTS_ENGINE", None) in NATIVE_FORMAT_ENGINES
+        ):
+            return codec
+        return "mp3"
+
+    def _sniff_audio_format(self, audio_bytes: bytes) -> str:
+        """Identify engine output by its magic bytes rather than trusting the
+        requested `response_format`, which several engines ignore."""
+        head = audio_bytes[:12]
+        if head[:4] == b"OggS":
+            return "opus" if b"OpusHead" in audio_bytes[:64] else "ogg"
+        if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+            return "wav"
+        if head[:4] == b"fLaC":
+            return "flac"
+        if head[4:8] == b"ftyp":
+            return "mp4"
+        if head[:3] == b"ID3":
+            return "mp3"
+        if len(head) >= 2 and head[0] == 0xFF and head[1] & 0xF0 == 0xF0:
+            # ADTS and MPEG audio share the sync word; ADTS has layer bits 00.
+            return "aac" if head[1] & 0x06 == 0 else "mp3"
+        if len(head) >= 2 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0:
+            return "mp3"
+        return "unknown"
+
     def build_filename(self, message_id: str) -> str:
-        return f"{self.valves.filename_prefix}-{message_id}.mp3"
+        return (
+            f"{self.valves.filename_prefix}-{message_id}."
+            f"{self._codec_info()['extension']}"
+        )
+
+    def build_audiobook_filename(self, conversation_id: str) -> str:
+        extension = AUDIOBOOK_FORMATS[self.valves.audiobook_format]["extension"]
+        return (
+            f"{self.valves.filename_prefix}-conversation-{conversation_id}."
+            f"{extension}"
+        )
 
     def _extract_text(self, value: Any) -> str:
         if value is None:
@@ -321,16 +1473,18 @@ class Action:
 
         return ""
 
-    def _replace_markdown_links(self, text: str) -> str:
+    def _replace_markdown_links(
+        self, text: str, pattern: re.Pattern[str] = MARKDOWN_LINK_RE
+    ) -> str:
         def replacer(match: re.Match[str]) -> str:
             label = match.group(1).strip()
             url = match.group(2).split()[0].strip()
             return label if label and label != url else ""
 
-        return MARKDOWN_LINK_RE.sub(replacer, text)
+        return pattern.sub(replacer, text)
 
     def _strip_inline_markdown(self, text: str) -> str:
-        cleaned = self._replace_markdown_links(text)
+        cleaned = self._replace_markdown_links(text, LINE_MARKDOWN_LINK_RE)
         for pattern, replacement in INLINE_MARKDOWN_PATTERNS:
             cleaned = pattern.sub(replacement, cleaned)
         return cleaned
@@ -339,55 +1493,42 @@ class Action:
         stripped = line.strip()
         if not stripped:
             return False
-        if TABLE_SEPARATOR_RE.match(stripped):
-            return True
-        if stripped.count("|") >= 2:
-            return True
-        if len(re.findall(r"[{}[\];<>_=\\/]", stripped)) >= 4:
-            return True
-        if re.search(
-            r"(?:\bdef\b|\bclass\b|\breturn\b|\bimport\b|=>|::|</?\w+>|^\{|\}$)",
-            stripped,
+        if "|" in stripped and (
+            stripped.count("|") >= 2 or TABLE_SEPARATOR_RE.match(stripped)
         ):
             return True
         if stripped.startswith(("```", "{", "}", "[", "]", "SELECT ", "INSERT ")):
             return True
-        alpha_count = len(re.findall(r"[A-Za-z]", stripped))
-        punct_count = len(re.findall(r"[^A-Za-z0-9\s]", stripped))
-        return alpha_count > 0 and punct_count > alpha_count
 
-    def _normalize_line(self, raw_line: str) -> str:
-        stripped = raw_line.strip()
-        if not stripped:
-            return ""
-        if self._looks_like_structured_or_code(stripped):
-            return ""
+        # Character classes are counted with str.translate deletions, which
+        # avoids building a match list per line.
+        length = len(stripped)
+        if length - len(stripped.translate(STRUCTURED_CHARS_TABLE)) >= 4:
+            return True
+        if CODE_HINT_RE.search(stripped):
+            return True
+        alpha_count = length - len(stripped.translate(ASCII_LETTERS_TABLE))
+        alnum_count = length - len(stripped.translate(ASCII_ALNUM_TABLE))
+        space_count = length - len("".join(stripped.split()))
+        punct_count = length - alnum_count - space_count
+        return alpha_count > 0 and punct_count > alpha_count
 
-        heading_match = HEADING_RE.match(stripped)
-        if heading_match:
-            stripped = heading_match.group(1)
-        else:
-            checkbox_match = CHECKBOX_RE.match(stripped)
-            bullet_match = BULLET_RE.match(stripped)
-            numbered_match = NUMBERED_RE.match(stripped)
-            quote_match = QUOTE_RE.match(stripped)
-            if checkbox_match:
-                stripped = checkbox_match.group(1)
-            elif bullet_match:
-                stripped = bullet_match.group(1)
-            elif numbered_match:
-                stripped = f"{numbered_match.group(1)}. {numbered_match.group(2)}"
-            elif quote_match:
-                stripped = quote_match.group(2)
-
-        stripped = self._strip_inline_markdown(stripped)
-        stripped = BRACKET_CITATION_RE.sub("", stripped)
-        stripped = OWUI_CITATION_RE.sub("", stripped)
-        stripped = URL_RE.sub("", stripped)
-        stripped = HORIZONTAL_WHITESPACE_RE.sub(" ", stripped.strip(" \"'`*_~|"))
-        return stripped.strip()
+    def _strip_line_prefix(self, line: str) -> str:
+        prefix_match = LINE_PREFIX_RE.match(line)
+        if prefix_match is None:
+            return line
+        return LINE_PREFIX_FORMATS[prefix_match.lastgroup].format_map(
+            prefix_match.groupdict()
+        )
 
     def heuristic_cleanup(self, text: str) -> str:
+        """Strip markdown into plain speakable lines.
+
+        Every pattern is applied once to the whole message rather than once per
+        line: lines are filtered and their block prefixes removed first, then
+        the inline patterns run over the joined text, which keeps regex calls
+        constant instead of proportional to the line count.
+        """
         cleaned = (text or "").replace("\r\n", "\n").replace("\r", "\n")
         cleaned = CONTROL_RE.sub("", cleaned)
         cleaned = HTML_COMMENT_RE.sub("", cleaned)
@@ -399,41 +1540,453 @@ class Action:
         cleaned = BRACKET_CITATION_RE.sub("", cleaned)
         cleaned = OWUI_CITATION_RE.sub("", cleaned)
 
-        normalized_lines: list[str] = []
+        prefixed_lines = []
         for raw_line in cleaned.split("\n"):
-            line = self._normalize_line(raw_line)
+            stripped = raw_line.strip()
+            if stripped and not self._looks_like_structured_or_code(stripped):
+                prefixed_lines.append(self._strip_line_prefix(stripped))
+            else:
+                prefixed_lines.append("")
+
+        stripped_text = self._strip_inline_markdown("\n".join(prefixed_lines))
+
+        normalized_lines: list[str] = []
+        for line in stripped_text.split("\n"):
+            line = HORIZONTAL_WHITESPACE_RE.sub(" ", line.strip(" \"'`*_~|")).strip()
             if line:
                 normalized_lines.append(line)
             elif normalized_lines and normalized_lines[-1] != "":
                 normalized_lines.append("")
 
-        normalized = "\n".join(normalized_lines).strip()
-        normalized = BLANK_BLOCK_RE.sub("\n\n", normalized)
-        return normalized.strip()
+        return "\n".join(normalized_lines).strip()
+
+    def _number_to_words(self, number: int) -> str:
+        if number < 0:
+            return f"minus {self._number_to_words(-number)}"
+        if number < 20:
+            return ONES[number]
+        if number < 100:
+            tens, ones = divmod(number, 10)
+            return TENS[tens] + (f"-{ONES[ones]}" if ones else "")
+        if number < 1000:
+            hundreds, rest = divmod(number, 100)
+            words = f"{ONES[hundreds]} hundred"
+            return f"{words} {self._number_to_words(rest)}" if rest else words
+        for scale, name in SCALES:
+            if number >= scale:
+                if number >= scale * 1000:
+                    # Beyond trillions; let the TTS engine read the digits.
+                    return str(number)
+                head, rest = divmod(number, scale)
+                words = f"{self._number_to_words(head)} {name}"
+                return f"{words} {self._number_to_words(rest)}" if rest else words
+        return str(number)
+
+    def _ordinal_words(self, number: int) -> str:
+        words = self._number_to_words(number)
+        head, separator, last = max(
+            (words.rpartition(" "), words.rpartition("-")),
+            key=lambda parts: len(parts[0]),
+        )
+        if last in IRREGULAR_ORDINALS:
+            last = IRREGULAR_ORDINALS[last]
+        elif last.endswith("y"):
+            last = f"{last[:-1]}ieth"
+        else:
+            last = f"{last}th"
+        return f"{head}{separator}{last}"
+
+    def _year_words(self, year: int) -> str:
+        if 2000 <= year < 2010 or year % 1000 == 0 or not 1100 <= year < 2100:
+            return self._number_to_words(year)
+        century, rest = divmod(year, 100)
+        if rest == 0:
+            return f"{self._number_to_words(century)} hundred"
+        if rest < 10:
+            return f"{self._number_to_words(century)} oh {ONES[rest]}"
+        return f"{self._number_to_words(century)} {self._number_to_words(rest)}"
+
+    def _amount_words(self, integer_part: str, fraction: str | None = None) -> str:
+        words = self._number_to_words(int(integer_part.replace(",", "")))
+        if fraction:
+            digits = " ".join(ONES[int(digit)] for digit in fraction)
+            words = f"{words} point {digits}"
+        return words
+
+    def _spoken_list(self, items: list[str]) -> str:
+        if len(items) <= 1:
+            return "".join(items)
+        return f"{', '.join(items[:-1])} and {items[-1]}"
+
+    def _identifier_words(self, identifier: str) -> str:
+        spaced = re.sub(r"(?<=[a-z0-9])(?=[A-Z])", " ", identifier)
+        return HORIZONTAL_WHITESPACE_RE.sub(" ", spaced.replace("_", " ")).strip()
+
+    def _spoken_domain(self, host: str) -> str:
+        host = host.lower().rstrip(".")
+        if host.startswith("www."):
+            host = host[4:]
+        return " dot ".join(part for part in host.split(".") if part)
+
+    def _summarize_code_block(self, language: str, code: str) -> str:
+        language_key = language.strip().lower()
+        if language_key == "mermaid":
+            return "A Mermaid diagram."
+
+        line_count = len([line for line in code.split("\n") if line.strip()])
+        length = "one-line" if line_count <= 1 else f"{line_count}-line"
+        language_name = CODE_LANGUAGE_NAMES.get(language_key, "")
+        prefix = f"A {length} {language_name}".replace("  ", " ").strip()
+
+        if language_name == "shell":
+            return "A shell command." if line_count <= 1 else f"{prefix} script."
+        if language_name in DATA_LANGUAGES:
+            return f"{prefix} snippet."
+
+        definitions = CODE_DEFINITION_RE.findall(code)
+        classes = [name for kind, name in definitions if kind in ("class", "struct")]
+        functions = [
+            name for kind, name in definitions if kind not in ("class", "struct")
+        ]
+        if len(classes) == 1:
+            return f"{prefix} class called {self._identifier_words(classes[0])}."
+        if not classes and len(functions) == 1:
+            return f"{prefix} function called {self._identifier_words(functions[0])}."
+        names = [self._identifier_words(name) for name in classes or functions]
+        if names:
+            shown = names[:3] + (["others"] if len(names) > 3 else [])
+            return f"{prefix} code block defining {self._spoken_list(shown)}."
+        return f"{prefix} code block."
+
+    def _split_table_cells(self, line: str) -> list[str]:
+        stripped = line.strip()
+        if stripped.startswith("|"):
+            stripped = stripped[1:]
+        if stripped.endswith("|") and not stripped.endswith("\\|"):
+            stripped = stripped[:-1]
+        cells = re.split(r"(?<!\\)\|", stripped)
+        return [
+            self._strip_inline_markdown(cell.replace("\\|", "|")).strip()
+            for cell in cells
+        ]
 
-    def _get_user_model(self, user_data: Any) -> UserModel | None:
-        if isinstance(user_data, UserModel):
-            return user_data
-        if not isinstance(user_data, dict) or not user_data:
-            return None
-        try:
-            return UserModel(**user_data)
-        except Exception:
-            timestamp = int(time.time())
-            fallback = {
-                "id": user_data.get("id", ""),
-                "email": user_data.get("email", ""),
-                "username": user_data.get("username"),
-                "role": user_data.get("role", "user"),
-                "name": user_data.get("name") or user_data.get("email") or "User",
-                "last_active_at": user_data.get("last_active_at") or timestamp,
-                "updated_at": user_data.get("updated_at") or timestamp,
-                "created_at": user_data.get("created_at") or timestamp,
-            }
-            try:
-                return UserModel(**fallback)
-            except Exception:
-                return None
+    def _table_to_sentences(self, header: list[str], rows: list[list[str]]) -> str:
+        columns = [cell for cell in header if cell]
+        sentences = [
+            f"A table with {len(rows)} {'row' if len(rows) == 1 else 'rows'} "
+            f"and the columns {self._spoken_list(columns)}."
+        ]
+        for row in rows[:TABLE_ROWS_SPOKEN]:
+            pairs = [
+                f"{name} {value}"
+                for name, value in zip(header[1:], row[1:])
+                if name and value
+            ]
+            lead = row[0] if row and row[0] else "Row"
+            sentences.append(f"{lead}: {', '.join(pairs)}." if pairs else f"{lead}.")
+        if len(rows) > TABLE_ROWS_SPOKEN:
+            remaining = len(rows) - TABLE_ROWS_SPOKEN
+            sentences.append(
+                f"{remaining} more {'row is' if remaining == 1 else 'rows are'} "
+                "not read aloud."
+            )
+        return "\n".join(sentences)
+
+    def _summarize_tables(self, text: str) -> str:
+        lines = text.split("\n")
+        output: list[str] = []
+        index = 0
+        while index < len(lines):
+            line = lines[index]
+            if (
+                "|" in line
+                and index + 1 < len(lines)
+                and "|" in lines[index + 1]
+                and TABLE_SEPARATOR_RE.match(lines[index + 1].strip())
+            ):
+                header = self._split_table_cells(line)
+                rows: list[list[str]] = []
+                index += 2
+                while index < len(lines) and "|" in lines[index]:
+                    rows.append(self._split_table_cells(lines[index]))
+                    index += 1
+                output.extend(["", self._table_to_sentences(header, rows), ""])
+                continue
+            output.append(line)
+            index += 1
+        return "\n".join(output)
+
+    def _speak_links(self, text: str) -> str:
+        def link_replacer(match: re.Match[str]) -> str:
+            label = match.group(1).strip()
+            url = match.group(2).split()[0].strip()
+            if label and label != url:
+                return label
+            return self._speak_url(url)
+
+        text = MARKDOWN_LINK_RE.sub(link_replacer, text)
+        text = URL_RE.sub(lambda match: self._speak_url(match.group(0)), text)
+        text = EMAIL_RE.sub(
+            lambda match: (
+                f"{self._identifier_words(match.group(1).replace('.', ' dot '))} "
+                f"at {self._spoken_domain(match.group(2))}"
+            ),
+            text,
+        )
+        return BARE_DOMAIN_RE.sub(
+            lambda match: self._spoken_domain(match.group(1)), text
+        )
+
+    def _speak_url(self, url: str) -> str:
+        host = re.sub(r"^https?://", "", url, flags=re.IGNORECASE)
+        host = re.split(r"[/?#:]", host, maxsplit=1)[0]
+        return f"a link to {self._spoken_domain(host)}" if host else ""
+
+    def _prepare_blocks_for_speech(self, text: str) -> str:
+        prepared = (text or "").replace("\r\n", "\n").replace("\r", "\n")
+        prepared = CONTROL_RE.sub("", prepared)
+        prepared = HTML_COMMENT_RE.sub("", prepared)
+        prepared = FENCED_BLOCK_RE.sub(
+            lambda match: "\n"
+            + self._summarize_code_block(match.group(1), match.group(2))
+            + "\n",
+            prepared,
+        )
+        prepared = IMAGE_RE.sub("", prepared)
+        prepared = self._summarize_tables(prepared)
+        return self._speak_links(prepared)
+
+    def _verbalize_currency(self, match: re.Match[str]) -> str:
+        sign, symbol, integer_part, fraction, magnitude = match.groups()
+        singular, plural, minor_singular, minor_plural = CURRENCY_WORDS[symbol]
+        if fraction and len(fraction) == 3 and not magnitude:
+            # "€1.234" uses a dot as the thousands separator.
+            integer_part, fraction = integer_part + fraction, None
+        amount = int(integer_part.replace(",", ""))
+        if magnitude:
+            words = (
+                f"{self._amount_words(integer_part, fraction)} "
+                f"{MAGNITUDE_WORDS[magnitude]} {plural}"
+            )
+        else:
+            unit = singular if amount == 1 else plural
+            words = f"{self._number_to_words(amount)} {unit}"
+            minor = int((fraction or "0")[:2].ljust(2, "0"))
+            if minor and minor_plural:
+                words += (
+                    f" and {self._number_to_words(minor)} "
+                    f"{minor_singular if minor == 1 else minor_plural}"
+                )
+        return f"minus {words}" if sign else words
+
+    def _verbalize_currency_code(self, match: re.Match[str]) -> str:
+        integer_part, fraction, code = match.groups()
+        singular, plural, _, _ = CURRENCY_WORDS[code]
+        amount = self._amount_words(integer_part, fraction)
+        is_one = integer_part == "1" and not fraction
+        return f"{amount} {singular if is_one else plural}"
+
+    def _verbalize_unit(self, match: re.Match[str]) -> str:
+        integer_part, fraction, unit = match.groups()
+        singular, plural = UNIT_WORDS[unit]
+        is_one = integer_part == "1" and not fraction
+        amount = self._amount_words(integer_part, fraction)
+        return f"{amount} {singular if is_one else plural}"
+
+    def _verbalize_range(self, match: re.Match[str]) -> str:
+        keyword, start, en_dash, end = match.groups()
+        years = all(
+            len(value) == 4 and 1100 <= int(value) < 2100 for value in (start, end)
+        )
+        if not (keyword or en_dash or years):
+            return match.group(0)
+        if years:
+            start, end = self._year_words(int(start)), self._year_words(int(end))
+        joiner = "and" if (keyword or "").strip().lower() == "between" else "to"
+        return f"{keyword or ''}{start} {joiner} {end}"
+
+    def _verbalize_ratio(self, match: re.Match[str]) -> str:
+        prefix, left, right, suffix = match.groups()
+        if not (prefix or suffix):
+            return match.group(0)
+        spoken = (
+            f"{self._number_to_words(int(left))} to {self._number_to_words(int(right))}"
+        )
+        return f"{prefix or ''}{spoken}{suffix or ''}"
+
+    def _verbalize_version(self, match: re.Match[str]) -> str:
+        keyword, version = match.groups()
+        spoken = " point ".join(
+            self._number_to_words(int(part)) for part in version.split(".")
+        )
+        return f"{'version ' if keyword.lower() == 'v' else keyword}{spoken}"
+
+    def _verbalize_phone(self, match: re.Match[str]) -> str:
+        country, *groups = match.groups()
+        spoken = ", ".join(
+            " ".join(ONES[int(digit)] for digit in group) for group in groups if group
+        )
+        if country:
+            spoken = f"plus {' '.join(ONES[int(digit)] for digit in country)}, {spoken}"
+        return spoken
+
+    def _verbalize_number(self, match: re.Match[str]) -> str:
+        sign, integer_part, fraction = match.groups()
+        if fraction:
+            # A bare decimal may be a version ("3.11") as much as a quantity.
+            return match.group(0)
+        return f"{'minus ' if sign else ''}{self._amount_words(integer_part, None)}"
+
+    def _verbalize_date(self, month: int, day: int, year: str | None) -> str:
+        spoken = f"{MONTH_NAMES[month - 1]} {self._ordinal_words(day)}"
+        return f"{spoken}, {self._year_words(int(year))}" if year else spoken
+
+    def _month_number(self, name: str) -> int:
+        prefix = name[:3].lower()
+        return next(
+            index
+            for index, month in enumerate(MONTH_NAMES, start=1)
+            if month[:3].lower() == prefix
+        )
+
+    def _verbalize_time(self, match: re.Match[str]) -> str:
+        keyword, meridiem = match.group(1), match.group(4)
+        if not (keyword or meridiem):
+            return match.group(0)
+        hour, minute = int(match.group(2)), int(match.group(3))
+        spoken_hour = self._number_to_words(hour)
+        if minute == 0:
+            spoken = f"{spoken_hour} o'clock" if meridiem else f"{spoken_hour} hundred"
+        elif minute < 10:
+            spoken = f"{spoken_hour} oh {ONES[minute]}"
+        else:
+            spoken = f"{spoken_hour} {self._number_to_words(minute)}"
+        spoken = f"{spoken} {meridiem.upper()} M" if meridiem else spoken
+        return (keyword or "") + spoken
+
+    def _verbalize_acronym(self, match: re.Match[str]) -> str:
+        letters, plural = match.group(1), match.group(2)
+        if letters in SPOKEN_ACRONYMS or ROMAN_NUMERAL_RE.match(letters):
+            return match.group(0)
+        if len(letters) > 3 and VOWELS & set(letters):
+            # Longer acronyms with vowels (JSON, NASA) are usually pronounced.
+            return match.group(0)
+        return " ".join(letters) + plural
+
+    def verbalize_for_speech(self, text: str) -> str:
+        """Spell out numbers, dates, money, units and acronyms for TTS."""
+        for pattern, replacement in SPOKEN_ABBREVIATIONS:
+            text = pattern.sub(replacement, text)
+
+        text = ISO_DATE_RE.sub(
+            lambda match: self._verbalize_date(
+                int(match.group(2)), int(match.group(3)), match.group(1)
+            ),
+            text,
+        )
+        text = MONTH_DAY_RE.sub(
+            lambda match: self._verbalize_date(
+                self._month_number(match.group(1)),
+                int(match.group(2)),
+                match.group(3),
+            ),
+            text,
+        )
+        text = DAY_MONTH_RE.sub(
+            lambda match: "the {} of {}{}".format(
+                self._ordinal_words(int(match.group(1))),
+                MONTH_NAMES[self._month_number(match.group(2)) - 1],
+                f", {self._year_words(int(match.group(3)))}" if match.group(3) else "",
+            ),
+            text,
+        )
+        text = TIME_RE.sub(self._verbalize_time, text)
+        text = RATIO_RE.sub(self._verbalize_ratio, text)
+        text = VERSION_RE.sub(self._verbalize_version, text)
+        text = PHONE_RE.sub(self._verbalize_phone, text)
+        text = CURRENCY_RE.sub(self._verbalize_currency, text)
+        text = CURRENCY_CODE_RE.sub(self._verbalize_currency_code, text)
+        text = PERCENT_RE.sub(
+            lambda match: "{}{} percent".format(
+                "minus " if match.group(1) else "",
+                self._amount_words(match.group(2), match.group(3)),
+            ),
+            text,
+        )
+        text = UNIT_RE.sub(self._verbalize_unit, text)
+        text = NUMBER_RANGE_RE.sub(self._verbalize_range, text)
+        text = YEAR_CONTEXT_RE.sub(
+            lambda match: f"{match.group(1)} {self._year_words(int(match.group(2)))}",
+            text,
+        )
+        text = ORDINAL_RE.sub(
+            lambda match: self._ordinal_words(int(match.group(1))), text
+        )
+        text = HASH_NUMBER_RE.sub(r"number \1", text)
+        text = NUMBER_RE.sub(self._verbalize_number, text)
+        text = ACRONYM_RE.sub(self._verbalize_acronym, text)
+        return HORIZONTAL_WHITESPACE_RE.sub(" ", text)
+
+    def rule_based_cleanup(self, text: str) -> str:
+        """Deterministic speech cleanup that needs no model call.
+
+        Code blocks and tables are summarized, links are reduced to their
+        label or domain, and the remaining prose is verbalized.
+        """
+        prepared = self._prepare_blocks_for_speech(text)
+        cleaned = self.heuristic_cleanup(prepared)
+        return "\n".join(
+            self.verbalize_for_speech(line).strip() for line in cleaned.split("\n")
+        )
+
+    def _llm_cleanup_reason(self, text: str) -> str | None:
+        """Return why a message needs LLM cleanup, or None when rules suffice."""
+        if LATEX_RE.search(text):
+            return "math notation"
+
+        prepared = self._prepare_blocks_for_speech(text)
+        if len(HTML_TAG_RE.findall(prepared)) >= 3:
+            return "raw HTML"
+
+        lines = [line for line in prepared.split("\n") if line.strip()]
+        structured = sum(
+            1 for line in lines if self._looks_like_structured_or_code(line)
+        )
+        if structured >= 3 or (lines and structured / len(lines) > 0.2):
+            return "unfenced code or structured data"
+        return None
+
+    def _completion_options(self) -> dict[str, Any]:
+        return {
+            "timeout_seconds": self.valves.llm_timeout_seconds,
+            "max_retries": self.valves.llm_max_retries,
+            "hedge_after_seconds": self.valves.llm_hedge_after_seconds,
+            "use_cache": self.valves.llm_cache_enabled,
+        }
+
+    def _get_user_model(self, user_data: Any) -> UserModel | None:
+        if isinstance(user_data, UserModel):
+            return user_data
+        if not isinstance(user_data, dict) or not user_data:
+            return None
+        try:
+            return UserModel(**user_data)
+        except Exception:
+            timestamp = int(time.time())
+            fallback = {
+                "id": user_data.get("id", ""),
+                "email": user_data.get("email", ""),
+                "username": user_data.get("username"),
+                "role": user_data.get("role", "user"),
+                "name": user_data.get("name") or user_data.get("email") or "User",
+                "last_active_at": user_data.get("last_active_at") or timestamp,
+                "updated_at": user_data.get("updated_at") or timestamp,
+                "created_at": user_data.get("created_at") or timestamp,
+            }
+            try:
+                return UserModel(**fallback)
+            except Exception:
+                return None
 
     def _extract_chat_completion_text(self, response: Any) -> str:
         if response is None:
@@ -455,29 +2008,39 @@ class Action:
             return self._extract_chat_completion_text(payload)
         return ""
 
-    async def cleanup_for_speech(
+    def _split_cleanup_chunks(self, text: str) -> list[str]:
+        if len(text) <= CLEANUP_CHUNK_CHARS:
+            return [text]
+
+        blocks: list[str] = []
+        in_fence = False
+        for paragraph in PARAGRAPH_SPLIT_RE.split(text):
+            if in_fence and blocks:
+                blocks[-1] = f"{blocks[-1]}\n\n{paragraph}"
+            else:
+                blocks.append(paragraph)
+            if paragraph.count("```") % 2:
+                in_fence = not in_fence
+
+        chunks: list[str] = []
+        current = ""
+        for block in blocks:
+            if current and len(current) + 2 + len(block) > CLEANUP_CHUNK_CHARS:
+                chunks.append(current)
+                current = block
+            else:
+                current = f"{current}\n\n{block}" if current else block
+        if current:
+            chunks.append(current)
+        return chunks
+
+    async def _llm_cleanup(
         self,
         message_text: str,
-        body: dict,
+        cleanup_model: str,
         __request__,
-        __user__,
-        __model__,
+        user_model: UserModel,
     ) -> str:
-        fallback_text = self.heuristic_cleanup(message_text)
-
-        if __request__ is None or not self.valves.use_llm_cleanup:
-            return fallback_text
-
-        cleanup_model = (
-            self.valves.cleanup_model.strip()
-            or body.get("model")
-            or (__model__ or {}).get("id")
-        )
-        user_model = self._get_user_model(__user__)
-
-        if not cleanup_model or user_model is None:
-            return fallback_text
-
         payload = {
             "model": cleanup_model,
             "stream": False,
@@ -496,23 +2059,137 @@ class Action:
                 },
             ],
         }
+        response = await _COMPLETIONS.complete(
+            __request__,
+            payload,
+            user_model,
+            **self._completion_options(),
+        )
+        return self._extract_chat_completion_text(response).strip()
+
+    async def cleanup_for_speech(
+        self,
+        message_text: str,
+        body: dict,
+        __request__,
+        __user__,
+        __model__,
+    ) -> str:
+        fallback_text = self.rule_based_cleanup(message_text)
+
+        mode = self.valves.cleanup_mode
+        if __request__ is None or not self.valves.use_llm_cleanup or mode == "rules":
+            return fallback_text
+
+        if mode == "auto":
+            reason = self._llm_cleanup_reason(message_text)
+            if reason is None:
+                self._debug_log("Rule-based speech cleanup is sufficient")
+                return fallback_text
+            self._debug_log("Using LLM speech cleanup", reason=reason)
+
+        cleanup_model = (
+            self.valves.cleanup_model.strip()
+            or body.get("model")
+            or (__model__ or {}).get("id")
+        )
+        user_model = self._get_user_model(__user__)
+
+        if not cleanup_model or user_model is None:
+            return fallback_text
+
+        chunks = self._split_cleanup_chunks(message_text)
+        semaphore = asyncio.Semaphore(self.valves.synthesis_concurrency)
+        cache = self._get_cache()
+        prompt_hash = hashlib.sha256(
+            self.valves.cleanup_prompt.strip().encode("utf-8")
+        ).hexdigest()
+
+        async def clean_chunk(chunk: str) -> str:
+            cache_key = _SpokenExportCache.make_key(chunk, cleanup_model, prompt_hash)
+            if cache is not None:
+                cached = await asyncio.to_thread(cache.get, "text", cache_key)
+                if cached is not None:
+                    return cached.decode("utf-8")
+
+            async with semaphore:
+                cleaned = await self._llm_cleanup(
+                    chunk, cleanup_model, __request__, user_model
+                )
+            if cache is not None and cleaned:
+                await asyncio.to_thread(
+                    cache.put, "text", cache_key, cleaned.encode("utf-8")
+                )
+            return cleaned
 
         try:
-            response = await generate_chat_completion(
-                __request__,
-                payload,
-                user_model,
-                bypass_system_prompt=True,
+            cleaned_chunks = await asyncio.gather(
+                *(clean_chunk(chunk) for chunk in chunks)
             )
-            cleaned = self._extract_chat_completion_text(response).strip()
-            if not cleaned:
+            if not all(cleaned_chunks):
                 return fallback_text
-            cleaned = self.heuristic_cleanup(cleaned)
+            cleaned = self.rule_based_cleanup("\n\n".join(cleaned_chunks))
             return cleaned or fallback_text
         except Exception as exc:
             self._debug_log("LLM cleanup failed; using heuristic cleanup", error=str(exc))
             return fallback_text
 
+    def _split_oversized(self, text: str, limit: int) -> list[str]:
+        if len(text) <= limit:
+            return [text]
+
+        pieces: list[str] = []
+        current = ""
+        for clause in CLAUSE_SPLIT_RE.split(text):
+            words = [clause] if len(clause) <= limit else clause.split()
+            for word in words:
+                while len(word) > limit:
+                    if current:
+                        pieces.append(current)
+                        current = ""
+                    pieces.append(word[:limit])
+                    word = word[limit:]
+                if current and len(current) + 1 + len(word) > limit:
+                    pieces.append(current)
+                    current = word
+                else:
+                    current = f"{current} {word}" if current else word
+        if current:
+            pieces.append(current)
+        return pieces
+
+    def split_into_segments(self, text: str) -> list[str]:
+        """Split speech text into engine-sized segments on natural boundaries.
+
+        Segments never cross paragraph boundaries, so editing one paragraph
+        leaves the segments of every other paragraph unchanged.
+        """
+        limit = self.valves.segment_max_chars
+        segments: list[str] = []
+
+        for paragraph in PARAGRAPH_SPLIT_RE.split(text):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+
+            parts = SENTENCE_SPLIT_RE.split(paragraph)
+            current = ""
+            for index in range(0, len(parts), 2):
+                separator = "\n" if index and "\n" in parts[index - 1] else " "
+                for piece in self._split_oversized(parts[index].strip(), limit):
+                    if not piece:
+                        continue
+                    if current and len(current) + 1 + len(piece) > limit:
+                        segments.append(current)
+                        current = piece
+                    else:
+                        current = f"{current}{separator}{piece}" if current else piece
+                    separator = " "
+            if current:
+                segments.append(current)
+
+        return segments
+
     def _truncate_text(self, text: str) -> str:
         limit = self.valves.max_input_chars
         if len(text) <= limit:
@@ -559,108 +2236,405 @@ class Action:
 
         return str(CMU_ARCTIC_XVECTORS_ARCHIVE_PATH)
 
-    def _build_speaker_embeddings_dataset(self) -> _SpeakerEmbeddingsDataset:
+    def _convert_speaker_embeddings_archive(self) -> None:
+        import numpy as np
+
         archive_path = self._ensure_cmu_arctic_xvectors_archive()
         with zipfile.ZipFile(archive_path, "r") as archive:
             members = sorted(
                 name for name in archive.namelist() if name.endswith(".npy")
             )
+            if not members:
+                raise RuntimeError("Speaker embeddings archive is empty.")
 
-        if not members:
-            raise RuntimeError("Speaker embeddings archive is empty.")
+            vectors = []
+            for member in members:
+                with archive.open(member) as embedding_file:
+                    vectors.append(
+                        np.load(
+                            io.BytesIO(embedding_file.read()),
+                            allow_pickle=False,
+                        ).reshape(-1)
+                    )
 
-        return _SpeakerEmbeddingsDataset(archive_path=archive_path, members=members)
+        matrix = np.stack(vectors).astype(np.float32)
+        filenames = [
+            os.path.splitext(os.path.basename(member))[0] for member in members
+        ]
 
-    def _ensure_transformers_speaker_embeddings(self, __request__) -> None:
-        if __request__ is None:
-            return
+        temp_matrix_path = CMU_ARCTIC_XVECTORS_MATRIX_PATH.with_suffix(".tmp")
+        temp_index_path = CMU_ARCTIC_XVECTORS_INDEX_PATH.with_suffix(".tmp")
+        with open(temp_matrix_path, "wb") as matrix_file:
+            np.save(matrix_file, matrix, allow_pickle=False)
+        temp_index_path.write_text(json.dumps(filenames), encoding="utf-8")
+        os.replace(temp_matrix_path, CMU_ARCTIC_XVECTORS_MATRIX_PATH)
+        os.replace(temp_index_path, CMU_ARCTIC_XVECTORS_INDEX_PATH)
 
-        if __request__.app.state.config.TTS_ENGINE != "transformers":
-            return
+    def _build_speaker_embeddings_dataset(self) -> _SpeakerEmbeddingsDataset:
+        import numpy as np
+
+        if not (
+            CMU_ARCTIC_XVECTORS_MATRIX_PATH.is_file()
+            and CMU_ARCTIC_XVECTORS_INDEX_PATH.is_file()
+        ):
+            self._debug_log(
+                "Converting speaker embeddings archive to a memory-mapped index"
+            )
+            self._convert_speaker_embeddings_archive()
+
+        matrix = np.load(CMU_ARCTIC_XVECTORS_MATRIX_PATH, mmap_mode="r")
+        filenames = json.loads(
+            CMU_ARCTIC_XVECTORS_INDEX_PATH.read_text(encoding="utf-8")
+        )
+        if len(filenames) != matrix.shape[0]:
+            raise RuntimeError("Speaker embeddings index does not match its matrix.")
+
+        return _SpeakerEmbeddingsDataset(matrix=matrix, filenames=filenames)
 
+    def find_similar_voices(
+        self, voice: str, __request__, limit: int = 5
+    ) -> list[tuple[str, float]]:
+        """Return the speakers whose x-vectors are closest to `voice`.
+
+        Uses the dataset shared through `app.state`, so the normalized matrix
+        is computed once per process. Blocking; the action runs it in a thread.
+        """
+        self._ensure_transformers_speaker_embeddings(__request__)
         dataset = getattr(
-            __request__.app.state,
-            "speech_speaker_embeddings_dataset",
-            None,
+            __request__.app.state, "speech_speaker_embeddings_dataset", None
+        )
+        if not isinstance(dataset, _SpeakerEmbeddingsDataset):
+            return []
+        return dataset.nearest(voice, limit)
+
+    def _needs_speaker_embeddings(self, __request__) -> bool:
+        return (
+            __request__ is not None
+            and __request__.app.state.config.TTS_ENGINE == "transformers"
+            and getattr(
+                __request__.app.state, "speech_speaker_embeddings_dataset", None
+            )
+            is None
         )
-        if dataset is not None:
+
+    def _ensure_transformers_speaker_embeddings(self, __request__) -> None:
+        """Build the shared speaker dataset on first use.
+
+        The first build downloads and converts the x-vector archive, so call
+        this from a worker thread, never from the event loop.
+        """
+        if not self._needs_speaker_embeddings(__request__):
             return
 
-        self._debug_log("Preparing local speaker embeddings dataset for transformers TTS")
-        __request__.app.state.speech_speaker_embeddings_dataset = (
-            self._build_speaker_embeddings_dataset()
-        )
+        with _SPEAKER_EMBEDDINGS_LOCK:
+            if not self._needs_speaker_embeddings(__request__):
+                return
+            self._debug_log(
+                "Preparing local speaker embeddings dataset for transformers TTS"
+            )
+            __request__.app.state.speech_speaker_embeddings_dataset = (
+                self._build_speaker_embeddings_dataset()
+            )
 
-    async def _synthesize_transformers_mp3(self, text: str, __request__) -> bytes:
-        import soundfile as sf
-        import torch
-        from pydub import AudioSegment
-        from transformers import pipeline
+    async def _synthesize_transformers(
+        self,
+        text: str,
+        __request__,
+        speaker: str | None = None,
+        response_format: str = "mp3",
+    ) -> bytes:
+        import numpy as np
 
-        self._ensure_transformers_speaker_embeddings(__request__)
+        if self._needs_speaker_embeddings(__request__):
+            await asyncio.to_thread(
+                self._ensure_transformers_speaker_embeddings, __request__
+            )
+
+        worker = self._get_speech_worker()
+        worker.adopt(getattr(__request__.app.state, "speech_synthesiser", None))
 
+        embeddings_dataset = __request__.app.state.speech_speaker_embeddings_dataset
+        configured_speaker = speaker or __request__.app.state.config.TTS_MODEL
+        if isinstance(embeddings_dataset, _SpeakerEmbeddingsDataset):
+            speaker_index = embeddings_dataset.index_of(configured_speaker)
+        else:
+            try:
+                speaker_index = embeddings_dataset["filename"].index(configured_speaker)
+            except Exception:
+                speaker_index = None
+        if speaker_index is None:
+            speaker_index = DEFAULT_SPEAKER_INDEX
+
+        # Copy the row out of the read-only memory map before handing it to torch.
+        speaker_embedding = np.array(
+            embeddings_dataset[speaker_index]["xvector"], dtype=np.float32
+        ).reshape(-1)
+        speech = await worker.submit(text, speaker_index, speaker_embedding)
         if getattr(__request__.app.state, "speech_synthesiser", None) is None:
-            __request__.app.state.speech_synthesiser = pipeline(
-                "text-to-speech",
-                "microsoft/speecht5_tts",
+            __request__.app.state.speech_synthesiser = worker.synthesiser
+
+        samples = np.asarray(speech["audio"], dtype=np.float32).reshape(-1)
+        pcm_bytes = (np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2").tobytes()
+        sample_rate = int(speech["sampling_rate"])
+        if response_format != "wav":
+            return await self._encode_pcm(pcm_bytes, sample_rate)
+
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as writer:
+            writer.setnchannels(1)
+            writer.setsampwidth(2)
+            writer.setframerate(sample_rate)
+            writer.writeframes(pcm_bytes)
+        return buffer.getvalue()
+
+    async def _run_ffmpeg(self, args: list[str], data: bytes) -> bytes:
+        process = await asyncio.create_subprocess_exec(
+            FFMPEG_BINARY,
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            *args,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stdout, stderr = await process.communicate(data)
+        if process.returncode != 0:
+            detail = stderr.decode("utf-8", errors="replace").strip()
+            raise RuntimeError(f"ffmpeg failed: {detail[-500:]}")
+        return stdout
+
+    def _wav_to_pcm(self, audio_bytes: bytes) -> bytes | None:
+        """Read 16-bit mono WAV and resample it to `PCM_SAMPLE_RATE` in process.
+
+        Returns None for other sample layouts, which are left to ffmpeg.
+        """
+        import numpy as np
+
+        with wave.open(io.BytesIO(audio_bytes), "rb") as reader:
+            if reader.getsampwidth() != 2 or reader.getnchannels() != 1:
+                return None
+            sample_rate = reader.getframerate()
+            samples = np.frombuffer(
+                reader.readframes(reader.getnframes()), dtype="<i2"
             )
 
-        embeddings_dataset = __request__.app.state.speech_speaker_embeddings_dataset
-        speaker_index = 6799
-        configured_speaker = __request__.app.state.config.TTS_MODEL
-        try:
-            speaker_index = embeddings_dataset["filename"].index(configured_speaker)
-        except Exception:
-            pass
+        if sample_rate == PCM_SAMPLE_RATE or not len(samples):
+            return samples.tobytes()
+        count = len(samples) * PCM_SAMPLE_RATE // sample_rate
+        positions = np.arange(count) * (sample_rate / PCM_SAMPLE_RATE)
+        resampled = np.interp(positions, np.arange(len(samples)), samples)
+        return np.round(resampled).astype("<i2").tobytes()
 
-        speaker_embedding = torch.tensor(
-            embeddings_dataset[speaker_index]["xvector"]
-        ).unsqueeze(0)
-        speech = __request__.app.state.speech_synthesiser(
-            text,
-            forward_params={"speaker_embeddings": speaker_embedding},
+    async def _decode_to_pcm(self, audio_bytes: bytes) -> bytes:
+        if self._sniff_audio_format(audio_bytes) == "wav":
+            try:
+                pcm_bytes = await asyncio.to_thread(self._wav_to_pcm, audio_bytes)
+            except wave.Error:
+                pcm_bytes = None
+            if pcm_bytes is not None:
+                return pcm_bytes
+
+        return await self._run_ffmpeg(
+            [
+                "-i",
+                "pipe:0",
+                "-f",
+                "s16le",
+                "-ac",
+                "1",
+                "-ar",
+                str(PCM_SAMPLE_RATE),
+                "pipe:1",
+            ],
+            audio_bytes,
         )
 
-        wav_path = None
-        mp3_path = None
-        try:
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as wav_file:
-                wav_path = wav_file.name
-            sf.write(wav_path, speech["audio"], samplerate=speech["sampling_rate"])
+    def _encode_mp3_in_process(
+        self, pcm_bytes: bytes, sample_rate: int, bitrate: str, channels: int
+    ) -> bytes:
+        import lameenc
+
+        if channels == 2:
+            import numpy as np
 
-            with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as mp3_file:
-                mp3_path = mp3_file.name
-            AudioSegment.from_wav(wav_path).export(mp3_path, format="mp3")
+            pcm_bytes = np.repeat(np.frombuffer(pcm_bytes, dtype="<i2"), 2).tobytes()
 
-            return Path(mp3_path).read_bytes()
-        finally:
-            if wav_path and os.path.exists(wav_path):
-                os.remove(wav_path)
-            if mp3_path and os.path.exists(mp3_path):
-                os.remove(mp3_path)
+        encoder = lameenc.Encoder()
+        encoder.set_bit_rate(int(bitrate.rstrip("k")))
+        encoder.set_in_sample_rate(sample_rate)
+        encoder.set_channels(channels)
+        encoder.set_quality(2)
+        return bytes(encoder.encode(pcm_bytes) + encoder.flush())
 
-    async def synthesize_mp3(
+    async def _encode_pcm(
         self,
-        text: str,
-        __request__,
-        __user__,
+        pcm_bytes: bytes,
+        sample_rate: int,
+        codec: str = "mp3",
+        bitrate: str | None = None,
+        channels: int = 1,
     ) -> bytes:
-        if __request__ is None:
-            raise RuntimeError("This action requires __request__ for TTS generation.")
+        """Encode mono 16-bit PCM without touching the filesystem.
+
+        MP3 uses the in-process LAME binding when `lameenc` is installed and
+        otherwise an ffmpeg subprocess fed through stdin/stdout pipes.
+        """
+        codec_info = AUDIO_CODECS[codec]
+        bitrate = bitrate or codec_info["bitrate"]
+        if codec == "mp3":
+            try:
+                return await asyncio.to_thread(
+                    self._encode_mp3_in_process,
+                    pcm_bytes,
+                    sample_rate,
+                    bitrate,
+                    channels,
+                )
+            except ImportError:
+                pass
+
+        return await self._run_ffmpeg(
+            [
+                "-f",
+                "s16le",
+                "-ar",
+                str(sample_rate),
+                "-ac",
+                "1",
+                "-i",
+                "pipe:0",
+                "-b:a",
+                bitrate,
+                "-ac",
+                str(channels),
+                *codec_info["ffmpeg_args"],
+                "pipe:1",
+            ],
+            pcm_bytes,
+        )
 
-        user_model = self._get_user_model(__user__)
-        if user_model is None:
-            raise RuntimeError("Could not resolve the current user for TTS generation.")
+    def _strip_id3(self, audio_bytes: bytes) -> bytes:
+        if audio_bytes[:3] == b"ID3" and len(audio_bytes) >= 10:
+            size = 0
+            for byte in audio_bytes[6:10]:
+                size = (size << 7) | (byte & 0x7F)
+            footer = 10 if audio_bytes[5] & 0x10 else 0
+            audio_bytes = audio_bytes[10 + size + footer :]
+        if len(audio_bytes) >= 128 and audio_bytes[-128:-125] == b"TAG":
+            audio_bytes = audio_bytes[:-128]
+        return audio_bytes
+
+    def _join_pcm(self, parts: list[bytes]) -> bytes:
+        import numpy as np
+
+        gap_samples = PCM_SAMPLE_RATE * self.valves.segment_gap_ms // 1000
+        fade_samples = PCM_SAMPLE_RATE * self.valves.crossfade_ms // 1000
+        silence = np.zeros(gap_samples, dtype=np.int16)
+        combined = np.frombuffer(parts[0], dtype=np.int16)
+
+        for part in parts[1:]:
+            samples = np.frombuffer(part, dtype=np.int16)
+            if gap_samples:
+                combined = np.concatenate((combined, silence, samples))
+                continue
+
+            overlap = min(fade_samples, len(combined), len(samples))
+            if not overlap:
+                combined = np.concatenate((combined, samples))
+                continue
+
+            ramp = np.linspace(0.0, 1.0, overlap, dtype=np.float32)
+            mixed = combined[-overlap:] * (1.0 - ramp) + samples[:overlap] * ramp
+            combined = np.concatenate(
+                (
+                    combined[:-overlap],
+                    np.clip(mixed, -32768, 32767).astype(np.int16),
+                    samples[overlap:],
+                )
+            )
+
+        return combined.tobytes()
+
+    async def _decode_parts(self, parts: list[bytes]) -> list[bytes]:
+        """Decode segments to PCM, at most `synthesis_concurrency` at a time, so
+        a long export does not start one ffmpeg process per segment at once."""
+        semaphore = asyncio.Semaphore(self.valves.synthesis_concurrency)
+
+        async def decode(part: bytes) -> bytes:
+            async with semaphore:
+                return await self._decode_to_pcm(part)
 
+        return list(await asyncio.gather(*(decode(part) for part in parts)))
+
+    async def _concatenate_audio(
+        self, parts: list[bytes], codec: str | None = None
+    ) -> bytes:
+        codec = codec or self.valves.audio_codec
+        if codec == "pcm":
+            return self._join_pcm(await self._decode_parts(parts))
+
+        bitrate = self._output_bitrate()
+        channels = self._output_channels()
+        formats = {self._sniff_audio_format(part) for part in parts}
+        native = formats == {codec} and bitrate is None and channels == 1
+        if native and len(parts) == 1:
+            return parts[0]
+
+        # MP3 frames and ADTS packets can be appended as they are; Ogg streams
+        # cannot be chained reliably, so multi-segment Opus is always re-encoded.
+        joinable = native and codec in ("mp3", "aac")
+        if (
+            not joinable
+            or self.valves.segment_gap_ms
+            or self.valves.crossfade_ms
+        ):
+            try:
+                pcm_parts = await self._decode_parts(parts)
+                return await self._encode_pcm(
+                    self._join_pcm(pcm_parts),
+                    PCM_SAMPLE_RATE,
+                    codec,
+                    bitrate,
+                    channels,
+                )
+            except (FileNotFoundError, ImportError, RuntimeError) as exc:
+                if formats != {codec} or codec == "opus":
+                    raise RuntimeError(
+                        f"Encoding {codec} audio requires ffmpeg: {exc}"
+                    ) from exc
+                self._debug_log(
+                    f"Audio re-encoding unavailable; joining {codec} streams directly",
+                    error=str(exc),
+                )
+
+        if codec == "aac":
+            return b"".join(parts)
+        return parts[0] + b"".join(self._strip_id3(part) for part in parts[1:])
+
+    async def _synthesize_segment(
+        self,
+        text: str,
+        __request__,
+        user_model: UserModel,
+        voice: str | None = None,
+        response_format: str = "mp3",
+    ) -> bytes:
         if __request__.app.state.config.TTS_ENGINE == "transformers":
-            return await self._synthesize_transformers_mp3(text, __request__)
+            return await self._synthesize_transformers(
+                text, __request__, speaker=voice, response_format=response_format
+            )
 
-        voice = self.valves.voice.strip() or __request__.app.state.config.TTS_VOICE
+        voice = (
+            voice
+            or self.valves.voice.strip()
+            or __request__.app.state.config.TTS_VOICE
+        )
         payload = {
             "input": text,
             "voice": voice,
             "speed": self.valves.speed,
-            "response_format": "mp3",
+            "response_format": response_format,
         }
         request_payload = json.dumps(payload).encode("utf-8")
         synthetic_request = _SyntheticSpeechRequest(__request__.app, request_payload)
@@ -672,10 +2646,509 @@ class Action:
 
         return Path(file_path).read_bytes()
 
+    async def synthesize_mp3(
+        self,
+        text: str,
+        __request__,
+        __user__,
+        on_segment=None,
+        voice: str | None = None,
+        codec: str | None = None,
+    ) -> bytes:
+        if __request__ is None:
+            raise RuntimeError("This action requires __request__ for TTS generation.")
+
+        user_model = self._get_user_model(__user__)
+        if user_model is None:
+            raise RuntimeError("Could not resolve the current user for TTS generation.")
+
+        segments = self.split_into_segments(text)
+        if not segments:
+            raise RuntimeError("No speakable text to synthesize.")
+
+        self._debug_log(
+            "Synthesizing speech segments",
+            segment_count=len(segments),
+            concurrency=self.valves.synthesis_concurrency,
+            segment_lengths=[len(segment) for segment in segments],
+        )
+        semaphore = asyncio.Semaphore(self.valves.synthesis_concurrency)
+        cache = self._get_cache()
+        config = __request__.app.state.config
+        response_format = self._engine_response_format(
+            config, codec or self.valves.audio_codec
+        )
+        voice_identity = (
+            config.TTS_ENGINE,
+            getattr(config, "TTS_MODEL", None),
+            voice or self.valves.voice.strip() or getattr(config, "TTS_VOICE", None),
+            self.valves.speed,
+            response_format,
+        )
+        cache_hits = 0
+
+        async def synthesize(segment: str) -> bytes:
+            nonlocal cache_hits
+            cache_key = _SpokenExportCache.make_key(segment, *voice_identity)
+            if cache is not None:
+                cached = await asyncio.to_thread(cache.get, "audio", cache_key)
+                if cached is not None:
+                    cache_hits += 1
+                    return cached
+
+            async with semaphore:
+                audio = await self._synthesize_segment(
+                    segment, __request__, user_model, voice, response_format
+                )
+            if cache is not None:
+                await asyncio.to_thread(cache.put, "audio", cache_key, audio)
+            return audio
+
+        tasks = [asyncio.create_task(synthesize(segment)) for segment in segments]
+        audio_parts: list[bytes] = []
+        try:
+            for index, task in enumerate(tasks):
+                audio_parts.append(await task)
+                if on_segment is not None:
+                    await on_segment(index, len(tasks), audio_parts[-1])
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        self._debug_log(
+            "Synthesized speech segments",
+            segment_count=len(segments),
+            cache_hits=cache_hits,
+        )
+        if config.TTS_ENGINE == "transformers":
+            self._debug_log("TTS worker metrics", **self._get_speech_worker().metrics())
+
+        return await self._concatenate_audio(audio_parts, codec)
+
+    def get_conversation_turns(self, body: dict) -> list[dict[str, str]]:
+        roles = {"assistant"}
+        if self.valves.include_user_turns:
+            roles.add("user")
+        turns: list[dict[str, str]] = []
+        for message in body.get("messages", []) or []:
+            if not isinstance(message, dict) or message.get("role") not in roles:
+                continue
+            content = self._extract_text(message.get("content"))
+            if content:
+                turns.append({"role": message["role"], "content": content})
+        return turns
+
+    def _chapter_title(self, number: int, role: str, spoken_text: str) -> str:
+        first_line = spoken_text.strip().split("\n", 1)[0]
+        snippet = SENTENCE_SPLIT_RE.split(first_line, maxsplit=1)[0].strip()
+        if len(snippet) > CHAPTER_TITLE_CHARS:
+            snippet = snippet[:CHAPTER_TITLE_CHARS].rsplit(" ", 1)[0] + "..."
+        speaker = "You" if role == "user" else "Assistant"
+        return f"{number}. {speaker}: {snippet}" if snippet else f"{number}. {speaker}"
+
+    def _id3_frame(self, frame_id: str, payload: bytes) -> bytes:
+        return frame_id.encode("ascii") + len(payload).to_bytes(4, "big") + b"\0\0"
+
+    def _id3_text_frame(self, frame_id: str, text: str) -> bytes:
+        payload = b"\x01" + text.encode("utf-16") + b"\0\0"
+        return self._id3_frame(frame_id, payload) + payload
+
+    def build_chapter_tag(self, title: str, chapters: list[dict[str, Any]]) -> bytes:
+        """Build an ID3v2.3 tag with a table of contents and one CHAP per chapter.
+
+        A CTOC frame lists at most 255 children, so chapters past that are merged
+        into the last listed chapter instead of being written outside the TOC.
+        """
+        if len(chapters) > ID3_MAX_CHAPTERS:
+            last = dict(chapters[ID3_MAX_CHAPTERS - 1])
+            last["end_ms"] = chapters[-1]["end_ms"]
+            chapters = [*chapters[: ID3_MAX_CHAPTERS - 1], last]
+
+        frames = [self._id3_text_frame("TIT2", title)]
+        element_ids = [f"chp{index}".encode("ascii") for index in range(len(chapters))]
+
+        toc_payload = (
+            b"toc\0"
+            + b"\x03"
+            + bytes([len(element_ids)])
+            + b"".join(element_id + b"\0" for element_id in element_ids)
+        )
+        frames.append(self._id3_frame("CTOC", toc_payload) + toc_payload)
+
+        for element_id, chapter in zip(element_ids, chapters):
+            chapter_payload = (
+                element_id
+                + b"\0"
+                + int(chapter["start_ms"]).to_bytes(4, "big")
+                + int(chapter["end_ms"]).to_bytes(4, "big")
+                + b"\xff\xff\xff\xff\xff\xff\xff\xff"
+                + self._id3_text_frame("TIT2", chapter["title"])
+            )
+            frames.append(self._id3_frame("CHAP", chapter_payload) + chapter_payload)
+
+        body = b"".join(frames)
+        size = len(body)
+        syncsafe = bytes((size >> shift) & 0x7F for shift in (21, 14, 7, 0))
+        return b"ID3\x03\x00\x00" + syncsafe + body
+
+    def _ffmetadata(self, title: str, chapters: list[dict[str, Any]]) -> str:
+        def escape(value: str) -> str:
+            return re.sub(r"([=;#\\\n])", r"\\\1", value)
+
+        lines = [";FFMETADATA1", f"title={escape(title)}"]
+        for chapter in chapters:
+            lines.extend(
+                [
+                    "[CHAPTER]",
+                    "TIMEBASE=1/1000",
+                    f"START={chapter['start_ms']}",
+                    f"END={chapter['end_ms']}",
+                    f"title={escape(chapter['title'])}",
+                ]
+            )
+        return "\n".join(lines) + "\n"
+
+    async def _start_audiobook_encoder(self, output_path: str, audiobook_format: str):
+        if audiobook_format == "m4b":
+            codec_args, default_bitrate = ["-c:a", "aac"], AAC_BITRATE
+        else:
+            codec_args = AUDIO_CODECS["mp3"]["ffmpeg_args"]
+            default_bitrate = MP3_BITRATE
+        return await asyncio.create_subprocess_exec(
+            FFMPEG_BINARY,
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-y",
+            "-f",
+            "s16le",
+            "-ar",
+            str(PCM_SAMPLE_RATE),
+            "-ac",
+            "1",
+            "-i",
+            "pipe:0",
+            "-b:a",
+            self._output_bitrate() or default_bitrate,
+            "-ac",
+            str(self._output_channels()),
+            *codec_args,
+            output_path,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+
+    async def _close_encoder(self, encoder) -> None:
+        encoder.stdin.close()
+        stderr = await encoder.stderr.read()
+        if await encoder.wait() != 0:
+            detail = stderr.decode("utf-8", errors="replace").strip()
+            raise RuntimeError(f"ffmpeg failed: {detail[-500:]}")
+
+    async def _finish_mp3(
+        self, encoder, workdir: str, title: str, chapters: list[dict[str, Any]]
+    ) -> bytes:
+        await self._close_encoder(encoder)
+        audio_bytes = Path(workdir, "audio.mp3").read_bytes()
+        return self.build_chapter_tag(title, chapters) + self._strip_id3(audio_bytes)
+
+    async def _finish_m4b(
+        self,
+        encoder,
+        workdir: str,
+        title: str,
+        chapters: list[dict[str, Any]],
+    ) -> bytes:
+        await self._close_encoder(encoder)
+
+        # ffmpeg needs the chapter list as a second input, which is only known
+        # once every chapter is encoded, so the AAC stream is remuxed here.
+        metadata_path = os.path.join(workdir, "chapters.txt")
+        output_path = os.path.join(workdir, "audiobook.m4b")
+        Path(metadata_path).write_text(
+            self._ffmetadata(title, chapters), encoding="utf-8"
+        )
+        await self._run_ffmpeg(
+            [
+                "-y",
+                "-i",
+                os.path.join(workdir, "audio.m4a"),
+                "-f",
+                "ffmetadata",
+                "-i",
+                metadata_path,
+                "-map",
+                "0:a",
+                "-map_metadata",
+                "1",
+                "-map_chapters",
+                "1",
+                "-c",
+                "copy",
+                "-f",
+                "mp4",
+                output_path,
+            ],
+            b"",
+        )
+        return Path(output_path).read_bytes()
+
+    async def export_audiobook(
+        self,
+        body: dict,
+        __request__,
+        __user__,
+        __model__,
+        on_chapter=None,
+    ) -> tuple[bytes, list[dict[str, Any]]]:
+        """Narrate a conversation as one chaptered audiobook.
+
+        Turns are cleaned by a producer task and synthesized by the consumer
+        through a small bounded queue, so cleanup of the next turn overlaps
+        with speech synthesis of the current one and only a couple of turns
+        of text are held at a time. Every chapter is rendered to PCM at
+        `PCM_SAMPLE_RATE` and streamed into one encoder, so the book has a
+        single sample rate and bitrate and chapter offsets are exact.
+        """
+        turns = self.get_conversation_turns(body)
+        if not turns:
+            raise RuntimeError("The conversation has no turns to narrate.")
+
+        audiobook_format = self.valves.audiobook_format
+        user_voice = self.valves.user_voice.strip() or None
+        turn_queue: asyncio.Queue = asyncio.Queue(maxsize=AUDIOBOOK_QUEUE_SIZE)
+
+        async def produce() -> None:
+            try:
+                for turn in turns:
+                    spoken_text = await self.cleanup_for_speech(
+                        turn["content"], body, __request__, __user__, __model__
+                    )
+                    spoken_text = self._truncate_text(spoken_text)
+                    if spoken_text.strip():
+                        await turn_queue.put((turn["role"], spoken_text))
+            except asyncio.CancelledError:
+                raise
+            except BaseException as exc:
+                await turn_queue.put(exc)
+                return
+            await turn_queue.put(None)
+
+        chapters: list[dict[str, Any]] = []
+        position_ms = 0
+        title = str((body.get("chat") or {}).get("title") or "Conversation")
+
+        with tempfile.TemporaryDirectory(prefix="spoken_export_") as workdir:
+            extension = "m4a" if audiobook_format == "m4b" else "mp3"
+            encoder = await self._start_audiobook_encoder(
+                os.path.join(workdir, f"audio.{extension}"), audiobook_format
+            )
+
+            producer = asyncio.create_task(produce())
+            try:
+                while (item := await turn_queue.get()) is not None:
+                    if isinstance(item, BaseException):
+                        raise item
+                    role, spoken_text = item
+                    number = len(chapters) + 1
+                    if on_chapter is not None:
+                        await on_chapter(number, len(turns))
+
+                    voice = user_voice if role == "user" else None
+                    pcm = await self.synthesize_mp3(
+                        spoken_text, __request__, __user__, voice=voice, codec="pcm"
+                    )
+                    encoder.stdin.write(pcm)
+                    await encoder.stdin.drain()
+                    duration_ms = len(pcm) * 1000 // (2 * PCM_SAMPLE_RATE)
+
+                    chapters.append(
+                        {
+                            "title": self._chapter_title(number, role, spoken_text),
+                            "role": role,
+                            "start_ms": position_ms,
+                            "end_ms": position_ms + duration_ms,
+                        }
+                    )
+                    position_ms += duration_ms
+                await producer
+            except BaseException:
+                if encoder.returncode is None:
+                    encoder.kill()
+                    await encoder.wait()
+                raise
+            finally:
+                producer.cancel()
+
+            if not chapters:
+                encoder.kill()
+                await encoder.wait()
+                raise RuntimeError("No speakable text remained after cleanup.")
+
+            self._debug_log(
+                "Assembled conversation audiobook",
+                chapter_count=len(chapters),
+                duration_ms=position_ms,
+                audiobook_format=audiobook_format,
+            )
+            if audiobook_format == "m4b":
+                audio_bytes = await self._finish_m4b(encoder, workdir, title, chapters)
+            else:
+                audio_bytes = await self._finish_mp3(encoder, workdir, title, chapters)
+            return audio_bytes, chapters
+
+    async def _execute_js(
+        self, js_code: str, __event_emitter__=None, __event_call__=None
+    ):
+        payload = {"type": "execute", "data": {"code": js_code}}
+
+        if __event_call__ is not None:
+            return await __event_call__(payload)
+
+        if __event_emitter__ is not None:
+            await __event_emitter__(payload)
+            return {"success": True}
+
+        return None
+
+    async def start_stream_player(
+        self,
+        stream_id: str,
+        title: str,
+        __event_emitter__=None,
+        __event_call__=None,
+    ):
+        js_code = f"""
+const streamId = {json.dumps(stream_id)};
+const players = (window.__spokenExportPlayers = window.__spokenExportPlayers || {{}});
+const container = document.createElement("div");
+container.style.cssText =
+  "position:fixed;right:16px;bottom:16px;z-index:9999;padding:10px 12px;" +
+  "border-radius:12px;background:rgba(24,24,27,0.92);color:#fff;" +
+  "font:12px system-ui,sans-serif;box-shadow:0 6px 24px rgba(0,0,0,0.3);";
+const header = document.createElement("div");
+header.style.cssText = "display:flex;justify-content:space-between;gap:12px;margin-bottom:6px;";
+const label = document.createElement("span");
+label.textContent = {json.dumps(title)};
+const close = document.createElement("button");
+close.textContent = "\u00d7";
+close.style.cssText = "background:none;border:none;color:inherit;cursor:pointer;font-size:16px;";
+const audio = document.createElement("audio");
+audio.controls = true;
+audio.autoplay = true;
+header.append(label, close);
+container.append(header, audio);
+document.body.appendChild(container);
+
+const queue = [];
+let ended = false;
+let player;
+
+if (window.MediaSource && MediaSource.isTypeSupported("audio/mpeg")) {{
+  const mediaSource = new MediaSource();
+  let sourceBuffer = null;
+  const pump = () => {{
+    if (!sourceBuffer || sourceBuffer.updating) return;
+    if (queue.length) {{
+      sourceBuffer.appendBuffer(queue.shift());
+    }} else if (ended && mediaSource.readyState === "open") {{
+      mediaSource.endOfStream();
+    }}
+  }};
+  mediaSource.addEventListener("sourceopen", () => {{
+    sourceBuffer = mediaSource.addSourceBuffer("audio/mpeg");
+    sourceBuffer.mode = "sequence";
+    sourceBuffer.addEventListener("updateend", pump);
+    pump();
+  }});
+  audio.src = URL.createObjectURL(mediaSource);
+  player = {{
+    push(bytes) {{ queue.push(bytes); pump(); }},
+    end() {{ ended = true; pump(); }},
+  }};
+}} else {{
+  let playing = false;
+  const playNext = () => {{
+    if (!queue.length) {{
+      playing = false;
+      return;
+    }}
+    playing = true;
+    const url = URL.createObjectURL(new Blob([queue.shift()], {{ type: "audio/mpeg" }}));
+    audio.onended = () => {{
+      URL.revokeObjectURL(url);
+      playNext();
+    }};
+    audio.src = url;
+    audio.play().catch(() => {{}});
+  }};
+  player = {{
+    push(bytes) {{ queue.push(bytes); if (!playing) playNext(); }},
+    end() {{ ended = true; }},
+  }};
+}}
+
+player.label = label;
+close.onclick = () => {{
+  audio.pause();
+  container.remove();
+  delete players[streamId];
+}};
+players[streamId] = player;
+
+return {{ success: true, streamId }};
+"""
+        return await self._execute_js(js_code, __event_emitter__, __event_call__)
+
+    async def push_stream_segment(
+        self,
+        stream_id: str,
+        audio_bytes: bytes,
+        index: int,
+        total: int,
+        __event_emitter__=None,
+        __event_call__=None,
+    ):
+        encoded = base64.b64encode(self._strip_id3(audio_bytes)).decode("ascii")
+        js_code = f"""
+const player = (window.__spokenExportPlayers || {{}})[{json.dumps(stream_id)}];
+if (!player) {{
+  return {{ success: false }};
+}}
+const binary = atob({json.dumps(encoded)});
+const bytes = new Uint8Array(binary.length);
+for (let i = 0; i < binary.length; i++) {{
+  bytes[i] = binary.charCodeAt(i);
+}}
+player.push(bytes);
+player.label.textContent = {json.dumps(f"Playing segment {index + 1}/{total}")};
+return {{ success: true, index: {index} }};
+"""
+        return await self._execute_js(js_code, __event_emitter__, __event_call__)
+
+    async def finish_stream_player(
+        self,
+        stream_id: str,
+        __event_emitter__=None,
+        __event_call__=None,
+    ):
+        js_code = f"""
+const player = (window.__spokenExportPlayers || {{}})[{json.dumps(stream_id)}];
+if (player) {{
+  player.end();
+  player.label.textContent = "Spoken export";
+}}
+return {{ success: true }};
+"""
+        return await self._execute_js(js_code, __event_emitter__, __event_call__)
+
     async def download_file(
         self,
         mp3_bytes: bytes,
         filename: str,
+        mime_type: str = "audio/mpeg",
         __event_emitter__=None,
         __event_call__=None,
     ):
@@ -691,7 +3164,7 @@ for (let i = 0; i < binary.length; i++) {{
   bytes[i] = binary.charCodeAt(i);
 }}
 
-const blob = new Blob([bytes], {{ type: "audio/mpeg" }});
+const blob = new Blob([bytes], {{ type: {json.dumps(mime_type)} }});
 const url = URL.createObjectURL(blob);
 
 try {{
@@ -720,6 +3193,73 @@ return {{ success: true, filename, size: bytes.length }};
 
         return None
 
+    async def _audiobook_action(
+        self,
+        body: dict,
+        __user__,
+        __event_emitter__,
+        __event_call__,
+        __request__,
+        __model__,
+    ):
+        conversation_id = body.get("chat_id") or body.get("id") or uuid.uuid4().hex
+        filename = self.build_audiobook_filename(conversation_id)
+
+        async def report_chapter(number: int, total: int) -> None:
+            await self.emit_status(
+                f"Narrating chapter {number} of up to {total}...",
+                False,
+                __event_emitter__,
+            )
+
+        await self.emit_status(
+            "Preparing conversation audiobook...", False, __event_emitter__
+        )
+        try:
+            audio_bytes, chapters = await self.export_audiobook(
+                body,
+                __request__,
+                __user__,
+                __model__,
+                on_chapter=report_chapter,
+            )
+        except HTTPException as exc:
+            detail = exc.detail if getattr(exc, "detail", None) else str(exc)
+            await self.emit_error(
+                f"Conversation audiobook export failed: {detail}", __event_emitter__
+            )
+            await self.emit_status(
+                "Audiobook generation failed.", True, __event_emitter__
+            )
+            return {"content": f"Conversation audiobook export failed: {detail}"}
+        except Exception as exc:
+            await self.emit_error(
+                f"Conversation audiobook export failed: {exc}", __event_emitter__
+            )
+            await self.emit_status(
+                "Audiobook generation failed.", True, __event_emitter__
+            )
+            return {"content": f"Conversation audiobook export failed: {exc}"}
+
+        await self.emit_status("Starting download...", False, __event_emitter__)
+        result = await self.download_file(
+            mp3_bytes=audio_bytes,
+            filename=filename,
+            mime_type=AUDIOBOOK_FORMATS[self.valves.audiobook_format]["mime_type"],
+            __event_emitter__=__event_emitter__,
+            __event_call__=__event_call__,
+        )
+        await self.emit_status(
+            f"Conversation audiobook complete ({len(chapters)} chapters).",
+            True,
+            __event_emitter__,
+        )
+        return {
+            "content": f"Exported conversation to audiobook: {filename}",
+            "result": result,
+            "chapters": chapters,
+        }
+
     async def action(
         self,
         body: dict,
@@ -730,6 +3270,19 @@ return {{ success: true, filename, size: bytes.length }};
         __model__=None,
         **kwargs,
     ):
+        llm_calls = _COMPLETIONS.track()
+        if self.valves.export_scope == "conversation":
+            response = await self._audiobook_action(
+                body,
+                __user__,
+                __event_emitter__,
+                __event_call__,
+                __request__,
+                __model__,
+            )
+            response["llm"] = _COMPLETIONS.summarize(llm_calls)
+            return response
+
         message_id = body.get("id")
         if not message_id:
             await self.emit_error(
@@ -772,7 +3325,28 @@ return {{ success: true, filename, size: bytes.length }};
             __user__,
             __model__,
         )
-        spoken_text = self._truncate_text(spoken_text)
+        truncated_text = self._truncate_text(spoken_text)
+        if len(truncated_text) < len(spoken_text):
+            self._debug_log(
+                "Speech text exceeded max_input_chars and was truncated",
+                cleaned_length=len(spoken_text),
+                max_input_chars=self.valves.max_input_chars,
+            )
+            if __event_emitter__:
+                await __event_emitter__(
+                    {
+                        "type": "notification",
+                        "data": {
+                            "type": "warning",
+                            "content": (
+                                "The spoken text exceeded the "
+                                f"{self.valves.max_input_chars} character limit "
+                                "and was shortened."
+                            ),
+                        },
+                    }
+                )
+        spoken_text = truncated_text
 
         self._debug_log(
             "Prepared text for speech",
@@ -792,11 +3366,39 @@ return {{ success: true, filename, size: bytes.length }};
             return {"content": "No speakable text remained after cleanup."}
 
         await self.emit_status("Generating MP3...", False, __event_emitter__)
+
+        stream_id = uuid.uuid4().hex if self.valves.stream_playback else None
+        if stream_id:
+            await self.start_stream_player(
+                stream_id,
+                "Preparing audio...",
+                __event_emitter__=__event_emitter__,
+                __event_call__=__event_call__,
+            )
+
+        async def report_segment(index: int, total: int, audio_bytes: bytes) -> None:
+            if stream_id:
+                await self.push_stream_segment(
+                    stream_id,
+                    audio_bytes,
+                    index,
+                    total,
+                    __event_emitter__=__event_emitter__,
+                    __event_call__=__event_call__,
+                )
+            if total > 1:
+                await self.emit_status(
+                    f"Generating MP3 (segment {index + 1}/{total})...",
+                    False,
+                    __event_emitter__,
+                )
+
         try:
             mp3_bytes = await self.synthesize_mp3(
                 spoken_text,
                 __request__,
                 __user__,
+                on_segment=report_segment,
             )
         except HTTPException as exc:
             detail = exc.detail if getattr(exc, "detail", None) else str(exc)
@@ -813,11 +3415,19 @@ return {{ success: true, filename, size: bytes.length }};
             )
             await self.emit_status("MP3 generation failed.", True, __event_emitter__)
             return {"content": f"Spoken MP3 export failed: {exc}"}
+        finally:
+            if stream_id:
+                await self.finish_stream_player(
+                    stream_id,
+                    __event_emitter__=__event_emitter__,
+                    __event_call__=__event_call__,
+                )
 
         await self.emit_status("Starting download...", False, __event_emitter__)
         result = await self.download_file(
             mp3_bytes=mp3_bytes,
             filename=filename,
+            mime_type=self._codec_info()["mime_type"],
             __event_emitter__=__event_emitter__,
             __event_call__=__event_call__,
         )
@@ -827,8 +3437,24 @@ return {{ success: true, filename, size: bytes.length }};
             True,
             __event_emitter__,
         )
-        return {
+        response = {
             "content": f"Exported message to spoken MP3: {filename}",
             "result": result,
             "spoken_text_length": len(spoken_text),
+            "audio_codec": self.valves.audio_codec,
+            "audio_bytes": len(mp3_bytes),
+            "llm": _COMPLETIONS.summarize(llm_calls),
         }
+        if __request__.app.state.config.TTS_ENGINE == "transformers":
+            response["tts_worker"] = self._get_speech_worker().metrics()
+            if self.valves.similar_voices:
+                response["similar_voices"] = [
+                    {"voice": name, "similarity": round(score, 4)}
+                    for name, score in await asyncio.to_thread(
+                        self.find_similar_voices,
+                        __request__.app.state.config.TTS_MODEL,
+                        __request__,
+                        self.valves.similar_voices,
+                    )
+                ]
+        return response
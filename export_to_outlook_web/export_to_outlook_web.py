@@ -10,10 +10,15 @@ icon_url: https://www.svgrepo.com/show/452067/ms-outlook.svg
 
 from __future__ import annotations
 
+import asyncio
+import contextvars
+import hashlib
 import json
 import logging
+import random
 import re
 import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Any
 from urllib.parse import quote, urlencode
@@ -25,6 +30,10 @@ from open_webui.utils.chat import generate_chat_completion
 
 LOGGER = logging.getLogger(__name__)
 
+COMPLETION_CACHE_ENTRIES = 128
+COMPLETION_CACHE_TTL_SECONDS = 900
+COMPLETION_RETRY_BACKOFF_SECONDS = 0.5
+COMPLETION_USAGE_FIELDS = ("prompt_tokens", "completion_tokens", "total_tokens")
 MAX_SUBJECT_LENGTH = 72
 MAX_SUBJECT_LENGTH_WITH_ELLIPSIS = 69
 MIN_EMAIL_GENERATION_MAX_TOKENS = 256
@@ -126,6 +135,246 @@ FIELD_PROMPTS: dict[str, PromptSpec] = {
 }
 
 
+class _CompletionError(RuntimeError):
+    def __init__(self, message: str, status_code: int | None = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class _CompletionClient:
+    """Open WebUI chat completions with a deadline, hedged retries, a response
+    cache and per-call token and latency metrics.
+
+    Open WebUI loads every action as a single file, so each action that calls
+    the chat model carries its own copy of this class. Keep the copies identical.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = COMPLETION_CACHE_ENTRIES,
+        ttl_seconds: float = COMPLETION_CACHE_TTL_SECONDS,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._cache: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._calls: contextvars.ContextVar[list[dict[str, Any]] | None] = (
+            contextvars.ContextVar(f"completion_calls_{id(self)}", default=None)
+        )
+
+    @staticmethod
+    def _digest(value: Any) -> str:
+        encoded = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def cache_key(self, payload: dict[str, Any], user_id: str | None = None) -> str:
+        messages = payload.get("messages") or []
+        prompt = [message for message in messages if message.get("role") == "system"]
+        inputs = [message for message in messages if message.get("role") != "system"]
+        options = {
+            key: value
+            for key, value in payload.items()
+            if key not in ("model", "messages")
+        }
+        return self._digest(
+            [
+                user_id,
+                payload.get("model"),
+                self._digest(prompt),
+                self._digest([inputs, options]),
+            ]
+        )
+
+    def _cache_get(self, key: str) -> dict[str, Any] | None:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        stored_at, response = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            self._cache.pop(key, None)
+            return None
+        self._cache.move_to_end(key)
+        return response
+
+    def _cache_put(self, key: str, response: dict[str, Any]) -> None:
+        self._cache[key] = (time.monotonic(), response)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def track(self) -> list[dict[str, Any]]:
+        """Collect the metrics of every completion made by the current task and
+        the tasks it starts."""
+        calls: list[dict[str, Any]] = []
+        self._calls.set(calls)
+        return calls
+
+    def record(self, model: Any) -> dict[str, Any]:
+        """Register one call with the current tracker and return its metrics,
+        which the caller updates in place. Calls made outside `complete`, such
+        as streamed completions, use this to appear in the summary."""
+        metrics: dict[str, Any] = {
+            "model": model,
+            "ok": False,
+            "cached": False,
+            "attempts": 0,
+            "hedged": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "total_tokens": 0,
+            "latency_ms": 0,
+        }
+        calls = self._calls.get()
+        if calls is not None:
+            calls.append(metrics)
+        return metrics
+
+    @staticmethod
+    def summarize(calls: list[dict[str, Any]]) -> dict[str, Any]:
+        return {
+            "calls": len(calls),
+            "cache_hits": sum(call["cached"] for call in calls),
+            "attempts": sum(call["attempts"] for call in calls),
+            "hedged": sum(call["hedged"] for call in calls),
+            "failures": sum(not call["ok"] for call in calls),
+            "prompt_tokens": sum(call["prompt_tokens"] for call in calls),
+            "completion_tokens": sum(call["completion_tokens"] for call in calls),
+            "total_tokens": sum(call["total_tokens"] for call in calls),
+            "latency_ms": sum(call["latency_ms"] for call in calls),
+            "max_latency_ms": max((call["latency_ms"] for call in calls), default=0),
+        }
+
+    @staticmethod
+    def _retryable(error: BaseException) -> bool:
+        status_code = getattr(error, "status_code", None)
+        return status_code is None or status_code >= 500 or status_code in (408, 429)
+
+    async def _attempt(self, request, payload: dict[str, Any], user) -> dict[str, Any]:
+        response = await generate_chat_completion(
+            request,
+            payload,
+            user,
+            bypass_system_prompt=True,
+        )
+        if isinstance(response, dict):
+            return response
+
+        status_code = getattr(response, "status_code", 200)
+        body = getattr(response, "body", None)
+        try:
+            parsed = json.loads(body.decode("utf-8")) if body else {}
+        except Exception:
+            parsed = {}
+        if status_code >= 400:
+            detail = body.decode("utf-8", errors="replace") if body else ""
+            raise _CompletionError(
+                f"Chat completion failed with HTTP {status_code}: {detail[:300]}",
+                status_code,
+            )
+        return parsed if isinstance(parsed, dict) else {}
+
+    async def complete(
+        self,
+        request,
+        payload: dict[str, Any],
+        user,
+        *,
+        timeout_seconds: float,
+        max_retries: int,
+        hedge_after_seconds: float,
+        use_cache: bool = True,
+    ) -> dict[str, Any]:
+        """Return the chat completion response for `payload` as a dict.
+
+        The first attempt starts at once. If it has not answered after
+        `hedge_after_seconds`, an identical request races it and the first
+        answer wins. Failed attempts are retried with exponential backoff. Hedges
+        and retries together are capped at `max_retries` extra attempts, and
+        everything must finish within `timeout_seconds`.
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + timeout_seconds
+        metrics = self.record(payload.get("model"))
+
+        key = self.cache_key(payload, getattr(user, "id", None))
+        if use_cache:
+            cached = self._cache_get(key)
+            if cached is not None:
+                metrics.update(ok=True, cached=True)
+                return cached
+
+        pending: set[asyncio.Task] = set()
+        failures = 0
+        last_error: BaseException | None = None
+
+        def launch() -> None:
+            metrics["attempts"] += 1
+            pending.add(asyncio.create_task(self._attempt(request, payload, user)))
+
+        try:
+            launch()
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                can_hedge = (
+                    hedge_after_seconds > 0
+                    and len(pending) == 1
+                    and metrics["attempts"] <= max_retries
+                )
+                wait_seconds = (
+                    min(remaining, hedge_after_seconds) if can_hedge else remaining
+                )
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=wait_seconds,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                pending.difference_update(done)
+                if not done:
+                    if can_hedge:
+                        metrics["hedged"] += 1
+                        launch()
+                    continue
+
+                for task in done:
+                    error = task.exception()
+                    if error is None:
+                        response = task.result()
+                        usage = response.get("usage") or {}
+                        for field in COMPLETION_USAGE_FIELDS:
+                            metrics[field] = int(usage.get(field) or 0)
+                        metrics["ok"] = True
+                        if use_cache and response.get("choices"):
+                            self._cache_put(key, response)
+                        return response
+                    if not self._retryable(error):
+                        raise error
+                    failures += 1
+                    last_error = error
+
+                if not pending and metrics["attempts"] <= max_retries:
+                    delay = COMPLETION_RETRY_BACKOFF_SECONDS * 2 ** (failures - 1)
+                    delay *= random.uniform(0.5, 1.0)
+                    if loop.time() + delay >= deadline:
+                        break
+                    await asyncio.sleep(delay)
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+            metrics["latency_ms"] = round((loop.time() - started) * 1000)
+
+        if last_error is not None and not pending:
+            raise last_error
+        raise TimeoutError(
+            f"Chat completion did not finish within {timeout_seconds:g} seconds."
+        )
+
+
+_COMPLETIONS = _CompletionClient()
+
+
 class Action:
     class Valves(BaseModel):
         debug: bool = Field(
@@ -196,6 +445,40 @@ class Action:
                 "subject/body."
             ),
         )
+        llm_timeout_seconds: float = Field(
+            default=60.0,
+            ge=1.0,
+            le=900.0,
+            description=(
+                "Deadline for each chat completion, including retries and hedged "
+                "requests."
+            ),
+        )
+        llm_max_retries: int = Field(
+            default=2,
+            ge=0,
+            le=5,
+            description=(
+                "Extra attempts after a failed or slow chat completion. Hedged "
+                "requests count as attempts."
+            ),
+        )
+        llm_hedge_after_seconds: float = Field(
+            default=15.0,
+            ge=0.0,
+            le=600.0,
+            description=(
+                "Send a second identical request when the first has not answered "
+                "after this many seconds; the first answer wins. 0 disables hedging."
+            ),
+        )
+        llm_cache_enabled: bool = Field(
+            default=True,
+            description=(
+                "Reuse the answer for the same user, model, prompt and input "
+                "within this Open WebUI process."
+            ),
+        )
         subject_generation_prompt: str = Field(
             default=(
                 "You are preparing an email draft from an assistant message. "
@@ -618,6 +901,14 @@ class Action:
 
         return fallback
 
+    def _completion_options(self) -> dict[str, Any]:
+        return {
+            "timeout_seconds": self.valves.llm_timeout_seconds,
+            "max_retries": self.valves.llm_max_retries,
+            "hedge_after_seconds": self.valves.llm_hedge_after_seconds,
+            "use_cache": self.valves.llm_cache_enabled,
+        }
+
     def _get_user_model(self, user_data: Any) -> UserModel | None:
         if isinstance(user_data, UserModel):
             return user_data
@@ -741,11 +1032,11 @@ class Action:
         )
 
         try:
-            response = await generate_chat_completion(
+            response = await _COMPLETIONS.complete(
                 __request__,
                 payload,
                 user_model,
-                bypass_system_prompt=True,
+                **self._completion_options(),
             )
             raw_content = self._extract_chat_completion_text(response)
             email_content = self._extract_email_content_from_text(raw_content)
@@ -1186,7 +1477,8 @@ class Action:
         __user__=None,
         __request__=None,
         __model__=None,
-    ) -> None:
+    ) -> dict[str, Any] | None:
+        llm_calls = _COMPLETIONS.track()
         try:
             self._debug_log(
                 "Action invoked",
@@ -1239,7 +1531,7 @@ class Action:
                 )
 
             await self._handle_success(__event_emitter__)
-            return None
+            return {"llm": _COMPLETIONS.summarize(llm_calls)}
         except Exception as exc:
             await self._handle_failure(exc, __event_emitter__)
             return None
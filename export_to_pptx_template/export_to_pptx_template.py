@@ -11,28 +11,41 @@ requirements: python-pptx
 
 from __future__ import annotations
 
+import asyncio
 import base64
+import contextvars
+import hashlib
 import io
 import json
 import logging
 import os
+import random
 import re
-import tempfile
+import threading
 import time
+import urllib.error
 import urllib.parse
 import urllib.request
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Iterable
 
 from pydantic import BaseModel, Field
 from pptx import Presentation
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.oxml import parse_xml
+from pptx.util import Pt
 
 from open_webui.models.users import UserModel
 from open_webui.utils.chat import generate_chat_completion
 
 LOGGER = logging.getLogger(__name__)
 
+COMPLETION_CACHE_ENTRIES = 128
+COMPLETION_CACHE_TTL_SECONDS = 900
+COMPLETION_RETRY_BACKOFF_SECONDS = 0.5
+COMPLETION_USAGE_FIELDS = ("prompt_tokens", "completion_tokens", "total_tokens")
 DEFAULT_PREPROCESSING_PROMPT = """
 You are preparing raw source text so it is easier to turn into a slide deck.
 
@@ -55,22 +68,25 @@ PowerPoint template.
 
 You will receive:
 1. The presentation text.
-2. The available PowerPoint layouts, including raw placeholder metadata.
+2. The available PowerPoint layouts. Each layout has a short id, a name and
+   the content slots it offers (title, subtitle, body, two_column, picture,
+   chart, table, media).
 
 Your job:
-- Choose only from the provided layout names.
+- Choose only from the provided layouts and set layout_name to the layout id.
 - Build a slide plan in JSON.
 - Keep slide text concise and presentation-friendly.
 - You may split or merge content when needed to fit the template better.
-- Do not invent layout names.
+- Do not invent layout ids.
 - Do not emit placeholder indices or coordinates in the output.
 - Return valid JSON only.
 
 Expected JSON shape:
 {
+  "slide_count": 3,
   "slides": [
     {
-      "layout_name": "Title Slide",
+      "layout_name": "L1",
       "title": "string",
       "subtitle": "string",
       "body": "string",
@@ -86,9 +102,11 @@ Expected JSON shape:
 
 Rules:
 - Omit fields you do not need.
+- Put "slide_count" first; it is the number of slides in "slides".
 - Use "title" for the slide title whenever possible.
 - Use "bullets" for normal content slides.
-- Use left/right fields only when the content clearly has two parallel sections.
+- Use left/right fields only when the content clearly has two parallel sections
+  and the layout has a two_column slot.
 - Return JSON only, with no markdown fences and no extra commentary.
 """.strip()
 
@@ -97,7 +115,7 @@ You are validating and repairing a PowerPoint slide plan JSON document.
 
 Task:
 - Keep the same general meaning and slide order.
-- Ensure all slides use only the provided layout names.
+- Ensure every layout_name is the id of a provided layout.
 - Shorten titles and bullets when they are too long.
 - Remove empty or redundant fields.
 - Prefer concise presentation text.
@@ -107,6 +125,150 @@ Do not add commentary.
 Do not add markdown fences.
 """.strip()
 
+DEFAULT_OUTLINE_PROMPT = """
+You are outlining a slide deck for a PowerPoint template.
+
+You will receive:
+1. The source text.
+2. The available PowerPoint layouts. Each layout has a short id, a name and
+   the content slots it offers (title, subtitle, body, two_column, picture,
+   chart, table, media).
+
+Your job:
+- Split the source into slides in presentation order.
+- Choose one layout per slide from the provided layouts and set layout_name to
+  its id.
+- Give every slide a short title and a one-sentence focus naming the part of
+  the source it covers.
+- Do not write the slide content yet.
+- Return valid JSON only.
+
+Expected JSON shape:
+{
+  "slides": [
+    {"layout_name": "L2", "title": "string", "focus": "string"}
+  ]
+}
+
+Return JSON only, with no markdown fences and no extra commentary.
+""".strip()
+
+DEFAULT_SLIDE_PROMPT = """
+You are writing the content of one slide in a PowerPoint deck.
+
+You will receive:
+1. The full source text.
+2. The titles of every slide in the deck, in order.
+3. The number, outline entry and layout of the slide to write.
+
+Your job:
+- Write only the requested slide and cover its focus.
+- Leave content that belongs to other slides in the outline to those slides.
+- Keep slide text concise and presentation-friendly.
+- Keep the given layout_name.
+- Return valid JSON only.
+
+Expected JSON shape:
+{
+  "layout_name": "string",
+  "title": "string",
+  "subtitle": "string",
+  "body": "string",
+  "bullets": ["string", "string"],
+  "left_title": "string",
+  "left_bullets": ["string"],
+  "right_title": "string",
+  "right_bullets": ["string"]
+}
+
+Rules:
+- Omit fields you do not need.
+- Use left/right fields only when the content clearly has two parallel sections
+  and the layout has a two_column slot.
+- Return JSON only, with no markdown fences and no extra commentary.
+""".strip()
+
+PLANNING_MODES = ["whole_deck", "per_slide"]
+SLIDE_MAX_TOKENS = 1024
+MAX_BULLETS_PER_SLIDE = 8
+SLIDE_TEXT_FIELDS = ("title", "subtitle", "body", "left_title", "right_title")
+SLIDE_LIST_FIELDS = ("bullets", "left_bullets", "right_bullets")
+TEMPLATE_CACHE_ENTRIES = 8
+PLACEHOLDER_SLOTS = {
+    "TITLE": "title",
+    "CENTER_TITLE": "title",
+    "VERTICAL_TITLE": "title",
+    "SUBTITLE": "subtitle",
+    "BODY": "body",
+    "OBJECT": "body",
+    "VERTICAL_BODY": "body",
+    "VERTICAL_OBJECT": "body",
+    "PICTURE": "picture",
+    "BITMAP": "picture",
+    "CHART": "chart",
+    "ORG_CHART": "chart",
+    "TABLE": "table",
+    "MEDIA_CLIP": "media",
+}
+SLOT_ORDER = (
+    "title",
+    "subtitle",
+    "two_column",
+    "body",
+    "picture",
+    "chart",
+    "table",
+    "media",
+)
+CHARS_PER_TOKEN_ESTIMATE = 4
+LOCAL_PLANNING_MODES = ["off", "auto", "only"]
+LOCAL_PLAN_MAX_BULLETS = 12
+LOCAL_PLAN_MAX_BODY_CHARS = 600
+MARKDOWN_FENCE_RE = re.compile(r"^\s*(```|~~~)")
+MARKDOWN_HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+MARKDOWN_BULLET_RE = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+(.+)$")
+# A list marker the model left on a bullet item; it must be followed by space.
+BULLET_MARKER_RE = re.compile(r"^\s*[-*\u2022]\s+")
+MARKDOWN_TABLE_SEPARATOR_RE = re.compile(r"^\|?\s*:?-+:?\s*(?:\|\s*:?-+:?\s*)*\|?$")
+MARKDOWN_LINK_RE = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+MARKDOWN_EMPHASIS_RE = re.compile(r"(\*\*|__|\*|`)(.+?)\1")
+MARKDOWN_UNDERSCORE_RE = re.compile(r"(?<!\w)_(.+?)_(?!\w)")
+TITLE_PLACEHOLDER_TYPES = {"TITLE", "CENTER_TITLE", "VERTICAL_TITLE"}
+FOOTER_PLACEHOLDER_TYPES = {"DATE", "FOOTER", "SLIDE_NUMBER", "HEADER"}
+DEFAULT_FONT_SIZE_PT = 18.0
+DEFAULT_TYPEFACE = "Calibri"
+# Average character width as a fraction of the font size, for mixed-case text.
+FONT_WIDTH_FACTORS = {
+    "aptos": 0.52,
+    "arial": 0.52,
+    "calibri": 0.49,
+    "calibri light": 0.48,
+    "cambria": 0.5,
+    "century gothic": 0.56,
+    "consolas": 0.55,
+    "courier new": 0.6,
+    "georgia": 0.52,
+    "helvetica": 0.52,
+    "open sans": 0.54,
+    "roboto": 0.51,
+    "segoe ui": 0.52,
+    "tahoma": 0.51,
+    "times new roman": 0.45,
+    "trebuchet ms": 0.5,
+    "verdana": 0.58,
+}
+DEFAULT_FONT_WIDTH_FACTOR = 0.52
+EMU_PER_POINT = 12700
+TEXT_INSET_X_EMU = 91440
+TEXT_INSET_Y_EMU = 45720
+LINE_HEIGHT = 1.2
+PARAGRAPH_GAP = 0.2
+MIN_FONT_PT = 10
+CONTINUATION_SUFFIX = " (cont.)"
+SLIDES_ARRAY_RE = re.compile(r'"slides"\s*:\s*\[')
+SLIDE_COUNT_RE = re.compile(r'"slide_count"\s*:\s*(\d+)')
+DEFAULT_TEMPLATE_KEY = "python-pptx-default"
+
 
 @dataclass(frozen=True, slots=True)
 class LayoutMetadata:
@@ -116,43 +278,210 @@ class LayoutMetadata:
     placeholders: list[dict[str, Any]]
 
 
-class _ManagedTemplateFile:
-    def __init__(self, template: str | os.PathLike[str] | None, timeout_s: int):
-        self.template = template
-        self.timeout_s = timeout_s
-        self._temp_path: str | None = None
-        self.path: str | None = None
+@dataclass(frozen=True, slots=True)
+class LayoutDescriptor:
+    layout_id: str
+    layout: LayoutMetadata
+    slots: tuple[str, ...]
+    layout_names: tuple[str, ...]
+
+
+@dataclass(slots=True)
+class _CachedTemplate:
+    data: bytes
+    digest: str
+    validator: tuple[Any, ...]
+    checked_at: float
+
+
+class _TemplateCache:
+    """Template bytes, extracted layout metadata and layout descriptors shared
+    across exports.
+
+    Remote templates are reused for `ttl_s` seconds and then revalidated with
+    `If-None-Match` / `If-Modified-Since`. Local templates are re-read only when
+    their size or modification time changes. Layout metadata and descriptors
+    are keyed by the SHA-256 of the template bytes.
+
+    Templates are loaded in worker threads, so every store access holds a lock.
+    """
+
+    def __init__(self, max_entries: int = TEMPLATE_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._templates: OrderedDict[str, _CachedTemplate] = OrderedDict()
+        self._layouts: OrderedDict[str, list[LayoutMetadata]] = OrderedDict()
+        self._descriptors: OrderedDict[str, list[LayoutDescriptor]] = OrderedDict()
+
+    def _lookup(self, store: OrderedDict, key: str) -> Any:
+        with self._lock:
+            value = store.get(key)
+            if value is not None:
+                store.move_to_end(key)
+            return value
+
+    def _remember(self, store: OrderedDict, key: str, value: Any) -> None:
+        with self._lock:
+            store[key] = value
+            store.move_to_end(key)
+            while len(store) > self.max_entries:
+                store.popitem(last=False)
 
-    def __enter__(self) -> str | None:
-        if self.template is None:
-            self.path = None
+    def load(
+        self,
+        template: str | os.PathLike[str] | None,
+        *,
+        timeout_s: int,
+        ttl_s: int,
+    ) -> _CachedTemplate | None:
+        if template is None:
             return None
 
-        template_str = str(self.template).strip()
+        template_str = str(template).strip()
         if not template_str:
-            self.path = None
             return None
 
         if _is_url(template_str):
-            self._temp_path = _download_template(template_str, self.timeout_s)
-            self.path = self._temp_path
-            return self.path
+            return self._load_url(template_str, timeout_s, ttl_s)
+        return self._load_file(template_str)
 
+    def _load_file(self, template_str: str) -> _CachedTemplate:
         local_path = Path(template_str).expanduser().resolve()
         if not local_path.exists():
             raise FileNotFoundError(f"Template not found: {local_path}")
         if local_path.suffix.lower() != ".pptx":
             raise ValueError(f"Template must be a .pptx file: {local_path}")
 
-        self.path = str(local_path)
-        return self.path
+        stat = local_path.stat()
+        validator = (stat.st_mtime_ns, stat.st_size)
+        key = str(local_path)
+        cached = self._lookup(self._templates, key)
+        if cached is not None and cached.validator == validator:
+            return cached
+
+        data = local_path.read_bytes()
+        entry = _CachedTemplate(
+            data=data,
+            digest=hashlib.sha256(data).hexdigest(),
+            validator=validator,
+            checked_at=time.monotonic(),
+        )
+        self._remember(self._templates, key, entry)
+        return entry
+
+    def _load_url(self, url: str, timeout_s: int, ttl_s: int) -> _CachedTemplate:
+        now = time.monotonic()
+        cached = self._lookup(self._templates, url)
+        if cached is not None and now - cached.checked_at < ttl_s:
+            return cached
+
+        request = urllib.request.Request(url)
+        if cached is not None:
+            etag, last_modified = cached.validator
+            if etag:
+                request.add_header("If-None-Match", etag)
+            if last_modified:
+                request.add_header("If-Modified-Since", last_modified)
 
-    def __exit__(self, exc_type, exc, tb) -> None:
-        if self._temp_path and os.path.exists(self._temp_path):
-            try:
-                os.remove(self._temp_path)
-            except OSError:
-                pass
+        try:
+            with urllib.request.urlopen(request, timeout=timeout_s) as response:
+                data = response.read()
+                validator = (
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                )
+        except urllib.error.HTTPError as exc:
+            if exc.code != 304 or cached is None:
+                raise
+            cached.checked_at = now
+            return cached
+
+        entry = _CachedTemplate(
+            data=data,
+            digest=hashlib.sha256(data).hexdigest(),
+            validator=validator,
+            checked_at=now,
+        )
+        self._remember(self._templates, url, entry)
+        return entry
+
+    def layouts(self, digest: str) -> list[LayoutMetadata] | None:
+        return self._lookup(self._layouts, digest)
+
+    def store_layouts(self, digest: str, layouts: list[LayoutMetadata]) -> None:
+        self._remember(self._layouts, digest, layouts)
+
+    def descriptors(self, digest: str) -> list[LayoutDescriptor] | None:
+        return self._lookup(self._descriptors, digest)
+
+    def store_descriptors(
+        self, digest: str, descriptors: list[LayoutDescriptor]
+    ) -> None:
+        self._remember(self._descriptors, digest, descriptors)
+
+
+class _SlidePlanStream:
+    """Incremental parser for a streamed slide plan.
+
+    `feed` takes the next piece of model output and returns the elements of the
+    top-level `slides` array that closed in it, so slides can be rendered before
+    the plan is complete.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.position: int | None = None
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.item_start: int | None = None
+        self.slide_count: int | None = None
+        self.closed = False
+
+    def feed(self, text: str) -> list[dict[str, Any]]:
+        self.buffer += text
+        if self.position is None:
+            if self.slide_count is None:
+                count_match = SLIDE_COUNT_RE.search(self.buffer)
+                if count_match:
+                    self.slide_count = int(count_match.group(1))
+            array_match = SLIDES_ARRAY_RE.search(self.buffer)
+            if array_match is None:
+                return []
+            self.position = array_match.end()
+
+        slides: list[dict[str, Any]] = []
+        while self.position < len(self.buffer) and not self.closed:
+            char = self.buffer[self.position]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "{[":
+                if self.depth == 0:
+                    self.item_start = self.position
+                self.depth += 1
+            elif char in "}]":
+                if self.depth == 0:
+                    self.closed = True
+                else:
+                    self.depth -= 1
+                    if self.depth == 0 and self.item_start is not None:
+                        item_text = self.buffer[self.item_start : self.position + 1]
+                        self.item_start = None
+                        try:
+                            item = json.loads(item_text)
+                        except json.JSONDecodeError:
+                            item = None
+                        if isinstance(item, dict):
+                            slides.append(item)
+            self.position += 1
+        return slides
 
 
 def _is_url(value: str) -> bool:
@@ -160,22 +489,245 @@ def _is_url(value: str) -> bool:
     return parsed.scheme in {"http", "https"} and bool(parsed.netloc)
 
 
-def _download_template(url: str, timeout_s: int) -> str:
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pptx") as tmp:
-        temp_path = tmp.name
+class _CompletionError(RuntimeError):
+    def __init__(self, message: str, status_code: int | None = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class _CompletionClient:
+    """Open WebUI chat completions with a deadline, hedged retries, a response
+    cache and per-call token and latency metrics.
+
+    Open WebUI loads every action as a single file, so each action that calls
+    the chat model carries its own copy of this class. Keep the copies identical.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = COMPLETION_CACHE_ENTRIES,
+        ttl_seconds: float = COMPLETION_CACHE_TTL_SECONDS,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._cache: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._calls: contextvars.ContextVar[list[dict[str, Any]] | None] = (
+            contextvars.ContextVar(f"completion_calls_{id(self)}", default=None)
+        )
+
+    @staticmethod
+    def _digest(value: Any) -> str:
+        encoded = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def cache_key(self, payload: dict[str, Any], user_id: str | None = None) -> str:
+        messages = payload.get("messages") or []
+        prompt = [message for message in messages if message.get("role") == "system"]
+        inputs = [message for message in messages if message.get("role") != "system"]
+        options = {
+            key: value
+            for key, value in payload.items()
+            if key not in ("model", "messages")
+        }
+        return self._digest(
+            [
+                user_id,
+                payload.get("model"),
+                self._digest(prompt),
+                self._digest([inputs, options]),
+            ]
+        )
+
+    def _cache_get(self, key: str) -> dict[str, Any] | None:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        stored_at, response = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            self._cache.pop(key, None)
+            return None
+        self._cache.move_to_end(key)
+        return response
+
+    def _cache_put(self, key: str, response: dict[str, Any]) -> None:
+        self._cache[key] = (time.monotonic(), response)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def track(self) -> list[dict[str, Any]]:
+        """Collect the metrics of every completion made by the current task and
+        the tasks it starts."""
+        calls: list[dict[str, Any]] = []
+        self._calls.set(calls)
+        return calls
+
+    def record(self, model: Any) -> dict[str, Any]:
+        """Register one call with the current tracker and return its metrics,
+        which the caller updates in place. Calls made outside `complete`, such
+        as streamed completions, use this to appear in the summary."""
+        metrics: dict[str, Any] = {
+            "model": model,
+            "ok": False,
+            "cached": False,
+            "attempts": 0,
+            "hedged": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "total_tokens": 0,
+            "latency_ms": 0,
+        }
+        calls = self._calls.get()
+        if calls is not None:
+            calls.append(metrics)
+        return metrics
+
+    @staticmethod
+    def summarize(calls: list[dict[str, Any]]) -> dict[str, Any]:
+        return {
+            "calls": len(calls),
+            "cache_hits": sum(call["cached"] for call in calls),
+            "attempts": sum(call["attempts"] for call in calls),
+            "hedged": sum(call["hedged"] for call in calls),
+            "failures": sum(not call["ok"] for call in calls),
+            "prompt_tokens": sum(call["prompt_tokens"] for call in calls),
+            "completion_tokens": sum(call["completion_tokens"] for call in calls),
+            "total_tokens": sum(call["total_tokens"] for call in calls),
+            "latency_ms": sum(call["latency_ms"] for call in calls),
+            "max_latency_ms": max((call["latency_ms"] for call in calls), default=0),
+        }
+
+    @staticmethod
+    def _retryable(error: BaseException) -> bool:
+        status_code = getattr(error, "status_code", None)
+        return status_code is None or status_code >= 500 or status_code in (408, 429)
+
+    async def _attempt(self, request, payload: dict[str, Any], user) -> dict[str, Any]:
+        response = await generate_chat_completion(
+            request,
+            payload,
+            user,
+            bypass_system_prompt=True,
+        )
+        if isinstance(response, dict):
+            return response
+
+        status_code = getattr(response, "status_code", 200)
+        body = getattr(response, "body", None)
+        try:
+            parsed = json.loads(body.decode("utf-8")) if body else {}
+        except Exception:
+            parsed = {}
+        if status_code >= 400:
+            detail = body.decode("utf-8", errors="replace") if body else ""
+            raise _CompletionError(
+                f"Chat completion failed with HTTP {status_code}: {detail[:300]}",
+                status_code,
+            )
+        return parsed if isinstance(parsed, dict) else {}
+
+    async def complete(
+        self,
+        request,
+        payload: dict[str, Any],
+        user,
+        *,
+        timeout_seconds: float,
+        max_retries: int,
+        hedge_after_seconds: float,
+        use_cache: bool = True,
+    ) -> dict[str, Any]:
+        """Return the chat completion response for `payload` as a dict.
+
+        The first attempt starts at once. If it has not answered after
+        `hedge_after_seconds`, an identical request races it and the first
+        answer wins. Failed attempts are retried with exponential backoff. Hedges
+        and retries together are capped at `max_retries` extra attempts, and
+        everything must finish within `timeout_seconds`.
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + timeout_seconds
+        metrics = self.record(payload.get("model"))
+
+        key = self.cache_key(payload, getattr(user, "id", None))
+        if use_cache:
+            cached = self._cache_get(key)
+            if cached is not None:
+                metrics.update(ok=True, cached=True)
+                return cached
+
+        pending: set[asyncio.Task] = set()
+        failures = 0
+        last_error: BaseException | None = None
+
+        def launch() -> None:
+            metrics["attempts"] += 1
+            pending.add(asyncio.create_task(self._attempt(request, payload, user)))
 
-    try:
-        with urllib.request.urlopen(url, timeout=timeout_s) as response:
-            with open(temp_path, "wb") as output:
-                output.write(response.read())
-    except Exception:
         try:
-            os.remove(temp_path)
-        except OSError:
-            pass
-        raise
+            launch()
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                can_hedge = (
+                    hedge_after_seconds > 0
+                    and len(pending) == 1
+                    and metrics["attempts"] <= max_retries
+                )
+                wait_seconds = (
+                    min(remaining, hedge_after_seconds) if can_hedge else remaining
+                )
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=wait_seconds,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                pending.difference_update(done)
+                if not done:
+                    if can_hedge:
+                        metrics["hedged"] += 1
+                        launch()
+                    continue
+
+                for task in done:
+                    error = task.exception()
+                    if error is None:
+                        response = task.result()
+                        usage = response.get("usage") or {}
+                        for field in COMPLETION_USAGE_FIELDS:
+                            metrics[field] = int(usage.get(field) or 0)
+                        metrics["ok"] = True
+                        if use_cache and response.get("choices"):
+                            self._cache_put(key, response)
+                        return response
+                    if not self._retryable(error):
+                        raise error
+                    failures += 1
+                    last_error = error
+
+                if not pending and metrics["attempts"] <= max_retries:
+                    delay = COMPLETION_RETRY_BACKOFF_SECONDS * 2 ** (failures - 1)
+                    delay *= random.uniform(0.5, 1.0)
+                    if loop.time() + delay >= deadline:
+                        break
+                    await asyncio.sleep(delay)
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+            metrics["latency_ms"] = round((loop.time() - started) * 1000)
+
+        if last_error is not None and not pending:
+            raise last_error
+        raise TimeoutError(
+            f"Chat completion did not finish within {timeout_seconds:g} seconds."
+        )
+
 
-    return temp_path
+_COMPLETIONS = _CompletionClient()
+_TEMPLATES = _TemplateCache()
 
 
 class Action:
@@ -205,6 +757,24 @@ class Action:
             le=300,
             description="HTTP timeout in seconds when downloading a remote template.",
         )
+        build_timeout_seconds: int = Field(
+            default=120,
+            ge=5,
+            le=1800,
+            description=(
+                "Maximum seconds allowed for each off-loop PPTX step: parsing the "
+                "template, rendering slides and saving the file."
+            ),
+        )
+        template_cache_ttl_s: int = Field(
+            default=300,
+            ge=0,
+            le=86400,
+            description=(
+                "Seconds a downloaded template is reused before it is revalidated "
+                "with the server. 0 revalidates on every export."
+            ),
+        )
         llm_model: str = Field(
             default="",
             description=(
@@ -224,6 +794,93 @@ class Action:
             le=16384,
             description="Maximum tokens used for each slide-planning LLM call.",
         )
+        llm_timeout_seconds: float = Field(
+            default=180.0,
+            ge=1.0,
+            le=900.0,
+            description=(
+                "Deadline for each chat completion, including retries and hedged "
+                "requests."
+            ),
+        )
+        llm_max_retries: int = Field(
+            default=2,
+            ge=0,
+            le=5,
+            description=(
+                "Extra attempts after a failed or slow chat completion. Hedged "
+                "requests count as attempts."
+            ),
+        )
+        llm_hedge_after_seconds: float = Field(
+            default=60.0,
+            ge=0.0,
+            le=600.0,
+            description=(
+                "Send a second identical request when the first has not answered "
+                "after this many seconds; the first answer wins. 0 disables hedging."
+            ),
+        )
+        llm_cache_enabled: bool = Field(
+            default=True,
+            description=(
+                "Reuse the answer for the same user, model, prompt and input "
+                "within this Open WebUI process."
+            ),
+        )
+        planning_mode: str = Field(
+            default="whole_deck",
+            description=(
+                "`whole_deck` plans every slide in one completion per pass. "
+                "`per_slide` asks for a short outline, then writes the slides "
+                "concurrently and renders each one as soon as it arrives. It skips "
+                "the preprocessing pass and replaces the repair pass with local "
+                "validation."
+            ),
+            json_schema_extra={"enum": PLANNING_MODES},
+        )
+        local_planning: str = Field(
+            default="auto",
+            description=(
+                "Plan slides from markdown structure (Marp `---` separators, "
+                "headings, bullets, tables, two `###` columns) without the model. "
+                "`auto` falls back to the model when no usable structure is found; "
+                "`only` never calls the model."
+            ),
+            json_schema_extra={"enum": LOCAL_PLANNING_MODES},
+        )
+        stream_slide_plan: bool = Field(
+            default=False,
+            description=(
+                "In `whole_deck` mode, stream the slide plan and render each slide "
+                "as soon as the model finishes it. The repair pass is replaced by "
+                "local validation, and slides rendered before a truncated or failed "
+                "stream are kept."
+            ),
+        )
+        autofit_text: bool = Field(
+            default=True,
+            description=(
+                "Estimate text size from the template fonts and placeholder sizes. "
+                "Shrinks the font when text would overflow and moves content that "
+                "still does not fit onto continuation slides."
+            ),
+        )
+        min_font_scale: float = Field(
+            default=0.6,
+            ge=0.3,
+            le=1.0,
+            description=(
+                "Smallest font size autofit may use, as a fraction of the "
+                "template's size for that placeholder."
+            ),
+        )
+        slide_concurrency: int = Field(
+            default=4,
+            ge=1,
+            le=16,
+            description="Slides written at the same time in `per_slide` mode.",
+        )
         enable_preprocessing: bool = Field(
             default=True,
             description=(
@@ -249,6 +906,14 @@ class Action:
             default=DEFAULT_POSTPROCESSING_PROMPT,
             description="System prompt used for the optional repair pass.",
         )
+        outline_prompt: str = Field(
+            default=DEFAULT_OUTLINE_PROMPT,
+            description="System prompt used for the outline call in `per_slide` mode.",
+        )
+        slide_prompt: str = Field(
+            default=DEFAULT_SLIDE_PROMPT,
+            description="System prompt used for each slide call in `per_slide` mode.",
+        )
 
     def __init__(self) -> None:
         self.valves = self.Valves()
@@ -514,6 +1179,14 @@ class Action:
         )
         return ""
 
+    def _completion_options(self) -> dict[str, Any]:
+        return {
+            "timeout_seconds": self.valves.llm_timeout_seconds,
+            "max_retries": self.valves.llm_max_retries,
+            "hedge_after_seconds": self.valves.llm_hedge_after_seconds,
+            "use_cache": self.valves.llm_cache_enabled,
+        }
+
     def _get_user_model(self, user_data: Any) -> UserModel | None:
         if isinstance(user_data, UserModel):
             return user_data
@@ -595,11 +1268,11 @@ class Action:
         )
 
         try:
-            response = await generate_chat_completion(
+            response = await _COMPLETIONS.complete(
                 __request__,
                 payload,
                 user_model,
-                bypass_system_prompt=True,
+                **self._completion_options(),
             )
             content = self._extract_chat_completion_text(response).strip()
             if content:
@@ -617,11 +1290,11 @@ class Action:
         if response_format is not None:
             retry_payload = dict(payload)
             retry_payload.pop("response_format", None)
-            response = await generate_chat_completion(
+            response = await _COMPLETIONS.complete(
                 __request__,
                 retry_payload,
                 user_model,
-                bypass_system_prompt=True,
+                **self._completion_options(),
             )
             content = self._extract_chat_completion_text(response).strip()
             if content:
@@ -629,11 +1302,137 @@ class Action:
 
         raise ValueError("Chat completion returned empty content.")
 
+    async def _stream_chat_completion(
+        self,
+        *,
+        model_id: str,
+        messages: list[dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        __request__,
+        user_model: UserModel,
+        response_format: dict[str, Any] | None = None,
+    ):
+        """Yield the content deltas of a streamed chat completion."""
+        payload: dict[str, Any] = {
+            "model": model_id,
+            "stream": True,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "messages": messages,
+        }
+        if response_format is not None:
+            payload["response_format"] = response_format
+
+        self._debug_log(
+            "Streaming Open WebUI chat completion",
+            model_id=model_id,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            message_count=len(messages),
+            response_format=response_format,
+        )
+
+        # Streams bypass `_COMPLETIONS.complete` (a half-read stream cannot be
+        # hedged or retried), but are still counted in the `llm` summary.
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        metrics = _COMPLETIONS.record(model_id)
+        metrics["attempts"] = 1
+        iterator = None
+        deadline = started + self.valves.llm_timeout_seconds
+        try:
+            try:
+                response = await asyncio.wait_for(
+                    generate_chat_completion(
+                        __request__,
+                        payload,
+                        user_model,
+                        bypass_system_prompt=True,
+                    ),
+                    self.valves.llm_timeout_seconds,
+                )
+            except asyncio.TimeoutError as exc:
+                raise TimeoutError(
+                    "Chat completion stream did not start within "
+                    f"{self.valves.llm_timeout_seconds:g} seconds."
+                ) from exc
+            status_code = getattr(response, "status_code", 200)
+            iterator = getattr(response, "body_iterator", None)
+            if isinstance(response, dict) or (iterator is None and status_code < 400):
+                # The backend answered without streaming.
+                self._record_usage(metrics, response)
+                content = self._extract_chat_completion_text(response)
+                metrics["ok"] = True
+                if content:
+                    yield content
+                return
+            if status_code >= 400 or iterator is None:
+                body = getattr(response, "body", None) or b""
+                detail = body.decode("utf-8", errors="replace")
+                raise _CompletionError(
+                    f"Chat completion failed with HTTP {status_code}: {detail[:300]}",
+                    status_code,
+                )
+
+            pending = ""
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise TimeoutError(
+                        "Chat completion stream did not finish within "
+                        f"{self.valves.llm_timeout_seconds:g} seconds."
+                    )
+                try:
+                    chunk = await asyncio.wait_for(anext(iterator), remaining)
+                except StopAsyncIteration:
+                    metrics["ok"] = True
+                    return
+
+                if isinstance(chunk, bytes):
+                    chunk = chunk.decode("utf-8", errors="replace")
+                pending += chunk
+                *lines, pending = pending.split("\n")
+                for line in lines:
+                    line = line.strip()
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:") :].strip()
+                    if data == "[DONE]":
+                        metrics["ok"] = True
+                        return
+                    try:
+                        event = json.loads(data)
+                    except json.JSONDecodeError:
+                        continue
+                    self._record_usage(metrics, event)
+                    for choice in event.get("choices") or []:
+                        delta = (choice.get("delta") or {}).get("content")
+                        if delta:
+                            yield delta
+                        if choice.get("finish_reason") == "length":
+                            self._debug_log(
+                                "Chat completion stream hit llm_max_tokens",
+                                max_tokens=max_tokens,
+                            )
+        finally:
+            metrics["latency_ms"] = round((loop.time() - started) * 1000)
+            close = getattr(iterator, "aclose", None)
+            if close is not None:
+                await close()
+
+    @staticmethod
+    def _record_usage(metrics: dict[str, Any], response: Any) -> None:
+        usage = response.get("usage") if isinstance(response, dict) else None
+        if isinstance(usage, dict):
+            for field in COMPLETION_USAGE_FIELDS:
+                metrics[field] = int(usage.get(field) or 0)
+
     async def _run_preprocessing(
         self,
         *,
         text: str,
-        layouts: list[LayoutMetadata],
+        descriptors: list[LayoutDescriptor],
         model_id: str,
         user_model: UserModel,
         __request__,
@@ -645,10 +1444,10 @@ class Action:
                 "content": json.dumps(
                     {
                         "text": text,
-                        "available_layouts": self._layouts_to_jsonable(layouts),
+                        "available_layouts": self._descriptors_to_jsonable(descriptors),
                     },
                     ensure_ascii=False,
-                    indent=2,
+                    separators=(",", ":"),
                 ),
             },
         ]
@@ -668,43 +1467,127 @@ class Action:
         self,
         *,
         text: str,
-        layouts: list[LayoutMetadata],
+        descriptors: list[LayoutDescriptor],
         model_id: str,
         user_model: UserModel,
         __request__,
     ) -> dict[str, Any]:
-        messages = [
+        content = await self._call_chat_completion(
+            model_id=model_id,
+            messages=self._processing_messages(text, descriptors),
+            temperature=self.valves.llm_temperature,
+            max_tokens=self.valves.llm_max_tokens,
+            __request__=__request__,
+            user_model=user_model,
+            response_format={"type": "json_object"},
+        )
+        slide_plan = self._parse_json_object(content)
+        self._validate_slide_plan_shape(slide_plan)
+        return slide_plan
+
+    def _processing_messages(
+        self,
+        text: str,
+        descriptors: list[LayoutDescriptor],
+    ) -> list[dict[str, str]]:
+        return [
             {"role": "system", "content": self.valves.processing_prompt.strip()},
             {
                 "role": "user",
                 "content": json.dumps(
                     {
                         "text": text,
-                        "available_layouts": self._layouts_to_jsonable(layouts),
+                        "available_layouts": self._descriptors_to_jsonable(descriptors),
                     },
                     ensure_ascii=False,
-                    indent=2,
+                    separators=(",", ":"),
                 ),
             },
         ]
-        content = await self._call_chat_completion(
+
+    async def _stream_and_render_processing(
+        self,
+        *,
+        presentation: Presentation,
+        text: str,
+        layout_by_name: dict[str, LayoutMetadata],
+        descriptors: list[LayoutDescriptor],
+        model_id: str,
+        user_model: UserModel,
+        __request__,
+        on_progress=None,
+    ) -> dict[str, Any] | None:
+        """Stream the slide plan and render each slide as it closes.
+
+        Returns None when the stream failed before any slide was rendered, so
+        the caller can fall back to the regular request. Only stream errors are
+        handled here; a failed or timed-out render aborts the export. When the
+        stream stops early, the plan's `incomplete` entry says how far it got.
+        """
+        stream = _SlidePlanStream()
+        slides: list[dict[str, Any]] = []
+        stream_error: Exception | None = None
+        deltas = self._stream_chat_completion(
             model_id=model_id,
-            messages=messages,
+            messages=self._processing_messages(text, descriptors),
             temperature=self.valves.llm_temperature,
             max_tokens=self.valves.llm_max_tokens,
             __request__=__request__,
             user_model=user_model,
             response_format={"type": "json_object"},
         )
-        slide_plan = self._parse_json_object(content)
-        self._validate_slide_plan_shape(slide_plan)
-        return slide_plan
+        try:
+            while True:
+                try:
+                    delta = await anext(deltas)
+                except StopAsyncIteration:
+                    break
+                except Exception as exc:
+                    stream_error = exc
+                    break
+
+                for slide_data in stream.feed(delta):
+                    slide = self._repair_slide(slide_data, {}, layout_by_name)
+                    await self._off_loop(
+                        self._render_slide, presentation, slide, layout_by_name
+                    )
+                    slides.append(slide)
+                    if on_progress is not None:
+                        await on_progress(len(slides), stream.slide_count)
+        finally:
+            await deltas.aclose()
+
+        if not slides:
+            self._debug_log(
+                "Slide plan stream produced no slides; requesting the plan "
+                "without streaming",
+                error=str(stream_error) if stream_error else None,
+            )
+            return None
+        if stream.closed:
+            return {"slides": slides}
+
+        progress = (
+            f"{len(slides)}/{stream.slide_count}"
+            if stream.slide_count
+            else str(len(slides))
+        )
+        self._debug_log(
+            "Slide plan stream stopped before the slides list closed",
+            error=str(stream_error) if stream_error else None,
+            slide_count=len(slides),
+            expected_slide_count=stream.slide_count,
+        )
+        return {
+            "slides": slides,
+            "incomplete": f"the model stopped after {progress} slides",
+        }
 
     async def _run_postprocessing(
         self,
         *,
         slide_plan: dict[str, Any],
-        layouts: list[LayoutMetadata],
+        descriptors: list[LayoutDescriptor],
         model_id: str,
         user_model: UserModel,
         __request__,
@@ -716,10 +1599,10 @@ class Action:
                 "content": json.dumps(
                     {
                         "slide_plan": slide_plan,
-                        "available_layouts": self._layouts_to_jsonable(layouts),
+                        "available_layouts": self._descriptors_to_jsonable(descriptors),
                     },
                     ensure_ascii=False,
-                    indent=2,
+                    separators=(",", ":"),
                 ),
             },
         ]
@@ -736,6 +1619,473 @@ class Action:
         self._validate_slide_plan_shape(repaired_plan)
         return repaired_plan
 
+    async def _run_outline(
+        self,
+        *,
+        text: str,
+        descriptors: list[LayoutDescriptor],
+        model_id: str,
+        user_model: UserModel,
+        __request__,
+    ) -> dict[str, Any]:
+        messages = [
+            {"role": "system", "content": self.valves.outline_prompt.strip()},
+            {
+                "role": "user",
+                "content": json.dumps(
+                    {
+                        "text": text,
+                        "available_layouts": self._descriptors_to_jsonable(descriptors),
+                    },
+                    ensure_ascii=False,
+                    separators=(",", ":"),
+                ),
+            },
+        ]
+        content = await self._call_chat_completion(
+            model_id=model_id,
+            messages=messages,
+            temperature=self.valves.llm_temperature,
+            max_tokens=self.valves.llm_max_tokens,
+            __request__=__request__,
+            user_model=user_model,
+            response_format={"type": "json_object"},
+        )
+        outline = self._parse_json_object(content)
+        self._validate_slide_plan_shape(outline)
+        if not outline["slides"]:
+            raise ValueError("Outline did not contain any slides.")
+        return outline
+
+    async def _run_slide_content(
+        self,
+        *,
+        text: str,
+        outline: dict[str, Any],
+        position: int,
+        descriptor: LayoutDescriptor | None,
+        model_id: str,
+        user_model: UserModel,
+        __request__,
+    ) -> dict[str, Any]:
+        # The source text leads the user message so every slide call shares the
+        # same prompt prefix, which lets providers with prompt caching reuse it.
+        messages = [
+            {"role": "system", "content": self.valves.slide_prompt.strip()},
+            {
+                "role": "user",
+                "content": json.dumps(
+                    {
+                        "text": text,
+                        "outline": [
+                            self._as_clean_text(entry.get("title"))
+                            for entry in outline["slides"]
+                        ],
+                        "slide_number": position + 1,
+                        "slide": outline["slides"][position],
+                        "layout": (
+                            self._descriptors_to_jsonable([descriptor])[0]
+                            if descriptor
+                            else None
+                        ),
+                    },
+                    ensure_ascii=False,
+                    separators=(",", ":"),
+                ),
+            },
+        ]
+        content = await self._call_chat_completion(
+            model_id=model_id,
+            messages=messages,
+            temperature=self.valves.llm_temperature,
+            max_tokens=min(self.valves.llm_max_tokens, SLIDE_MAX_TOKENS),
+            __request__=__request__,
+            user_model=user_model,
+            response_format={"type": "json_object"},
+        )
+        slide = self._parse_json_object(content)
+
+        # Some models wrap the single slide the way the whole-deck prompt does.
+        nested = slide.get("slides")
+        if isinstance(nested, list) and nested and isinstance(nested[0], dict):
+            return nested[0]
+        if isinstance(slide.get("slide"), dict):
+            return slide["slide"]
+        return slide
+
+    def _repair_slide(
+        self,
+        slide_data: dict[str, Any],
+        outline_entry: dict[str, Any],
+        layout_by_name: dict[str, LayoutMetadata],
+    ) -> dict[str, Any]:
+        """Validate one generated slide locally instead of with a repair call."""
+        known_layouts = {name.casefold() for name in layout_by_name}
+        layout_name = self._as_clean_text(slide_data.get("layout_name"))
+        if layout_name.casefold() not in known_layouts:
+            layout_name = self._as_clean_text(outline_entry.get("layout_name"))
+
+        repaired: dict[str, Any] = {"layout_name": layout_name}
+        for field in SLIDE_TEXT_FIELDS:
+            value = self._as_clean_text(slide_data.get(field))
+            if value:
+                repaired[field] = value
+        for field in SLIDE_LIST_FIELDS:
+            items = [
+                BULLET_MARKER_RE.sub("", item, count=1).strip()
+                for item in self._as_clean_list(slide_data.get(field))
+            ]
+            items = [item for item in items if item][:MAX_BULLETS_PER_SLIDE]
+            if items:
+                repaired[field] = items
+
+        if "title" not in repaired:
+            title = self._as_clean_text(outline_entry.get("title"))
+            if title:
+                repaired["title"] = title
+        return repaired
+
+    async def _plan_and_render_per_slide(
+        self,
+        *,
+        presentation: Presentation,
+        text: str,
+        layouts: list[LayoutMetadata],
+        descriptors: list[LayoutDescriptor],
+        model_id: str,
+        user_model: UserModel,
+        __request__,
+        on_progress=None,
+    ) -> dict[str, Any]:
+        outline = await self._run_outline(
+            text=text,
+            descriptors=descriptors,
+            model_id=model_id,
+            user_model=user_model,
+            __request__=__request__,
+        )
+        entries = outline["slides"]
+        layout_by_name = self._layout_by_name(layouts, descriptors)
+        descriptors_by_key: dict[str, LayoutDescriptor] = {}
+        for descriptor in descriptors:
+            descriptors_by_key.setdefault(descriptor.layout_id.casefold(), descriptor)
+            for layout_name in descriptor.layout_names:
+                descriptors_by_key.setdefault(layout_name.casefold(), descriptor)
+        semaphore = asyncio.Semaphore(self.valves.slide_concurrency)
+        self._debug_log(
+            "Writing slides from outline",
+            slide_count=len(entries),
+            concurrency=self.valves.slide_concurrency,
+        )
+
+        async def write_slide(position: int) -> tuple[int, dict[str, Any]]:
+            entry = entries[position]
+            layout_key = self._as_clean_text(entry.get("layout_name")).casefold()
+            async with semaphore:
+                try:
+                    slide_data = await self._run_slide_content(
+                        text=text,
+                        outline=outline,
+                        position=position,
+                        descriptor=descriptors_by_key.get(layout_key),
+                        model_id=model_id,
+                        user_model=user_model,
+                        __request__=__request__,
+                    )
+                except Exception as exc:
+                    self._debug_log(
+                        "Slide content call failed; rendering the outline entry",
+                        slide_number=position + 1,
+                        error=str(exc),
+                    )
+                    slide_data = {"body": self._as_clean_text(entry.get("focus"))}
+            return position, self._repair_slide(slide_data, entry, layout_by_name)
+
+        slides: list[dict[str, Any]] = [{} for _ in entries]
+        arrival_order: list[tuple[int, int]] = []
+        tasks = [
+            asyncio.create_task(write_slide(position))
+            for position in range(len(entries))
+        ]
+        try:
+            for next_slide in asyncio.as_completed(tasks):
+                position, slide_data = await next_slide
+                slides[position] = slide_data
+                added = await self._off_loop(
+                    self._render_slide, presentation, slide_data, layout_by_name
+                )
+                arrival_order.append((position, added))
+                if on_progress is not None:
+                    await on_progress(len(arrival_order), len(entries))
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        self._reorder_new_slides(presentation, arrival_order)
+        return {"slides": slides}
+
+    def _reorder_new_slides(
+        self, presentation: Presentation, arrival_order: list[tuple[int, int]]
+    ) -> None:
+        """Put slides rendered in arrival order back into outline order.
+
+        `arrival_order` holds `(outline position, slides added)` pairs; one
+        outline entry may have added continuation slides. python-pptx has no
+        public reordering API; the slide id list is the documented way to change
+        slide order without touching slide parts.
+        """
+        total = sum(added for _, added in arrival_order)
+        if not total:
+            return
+        slide_id_list = presentation.slides._sldIdLst
+        new_ids = list(slide_id_list)[-total:]
+        for slide_id in new_ids:
+            slide_id_list.remove(slide_id)
+
+        groups: list[tuple[int, list[Any]]] = []
+        offset = 0
+        for position, added in arrival_order:
+            groups.append((position, new_ids[offset : offset + added]))
+            offset += added
+        for _, slide_ids in sorted(groups, key=lambda group: group[0]):
+            for slide_id in slide_ids:
+                slide_id_list.append(slide_id)
+
+    def _plan_locally(
+        self,
+        text: str,
+        descriptors: list[LayoutDescriptor],
+    ) -> dict[str, Any] | None:
+        """Build a slide plan from markdown structure, or return None when the
+        text is not structured enough to skip the model."""
+        sections = self._split_local_sections(text)
+        if len(sections) < 2:
+            return None
+
+        slides: list[dict[str, Any]] = []
+        for index, (level, lines) in enumerate(sections):
+            title_slide = index == 0 and level == 1
+            slide = self._parse_local_slide(lines, title_slide=title_slide)
+            if slide is None:
+                return None
+            layout_id = self._pick_local_layout(slide, descriptors)
+            if layout_id is None and "left_bullets" in slide:
+                slide = self._flatten_columns(slide)
+                layout_id = self._pick_local_layout(slide, descriptors)
+            if layout_id is None:
+                return None
+            slide["layout_name"] = layout_id
+            slides.append(slide)
+
+        return {"slides": slides}
+
+    def _split_local_sections(self, text: str) -> list[tuple[int, list[str]]]:
+        lines = text.strip().splitlines()
+        if lines and lines[0].strip() == "---":
+            # Marp front matter: `---`, `key: value` lines, `---`.
+            for end in range(1, len(lines)):
+                if lines[end].strip() == "---":
+                    lines = lines[end + 1 :]
+                    break
+                if ":" not in lines[end]:
+                    break
+
+        headings: list[tuple[int, int]] = []
+        separators: list[int] = []
+        in_fence = False
+        for number, line in enumerate(lines):
+            if MARKDOWN_FENCE_RE.match(line):
+                in_fence = not in_fence
+            elif not in_fence and line.strip() in {"---", "***", "___"}:
+                separators.append(number)
+            elif not in_fence and (match := MARKDOWN_HEADING_RE.match(line)):
+                headings.append((number, len(match.group(1))))
+
+        if separators:
+            bounds = [-1, *separators, len(lines)]
+            chunks = [lines[start + 1 : end] for start, end in zip(bounds, bounds[1:])]
+            sections = []
+            for chunk in chunks:
+                if not any(line.strip() for line in chunk):
+                    continue
+                first = next(line for line in chunk if line.strip())
+                match = MARKDOWN_HEADING_RE.match(first)
+                sections.append((len(match.group(1)) if match else 0, chunk))
+            return sections
+
+        if not headings:
+            return []
+
+        levels = [level for _, level in headings]
+        split_level = min(levels)
+        deeper = [level for level in levels if level > split_level]
+        if levels.count(split_level) == 1 and deeper:
+            # One top heading above several sections: it becomes the title slide.
+            split_level = min(deeper)
+
+        starts = [number for number, level in headings if level <= split_level]
+        if any(line.strip() for line in lines[: starts[0]]):
+            return []
+        bounds = [*starts, len(lines)]
+        return [
+            (
+                len(MARKDOWN_HEADING_RE.match(lines[start]).group(1)),
+                lines[start:end],
+            )
+            for start, end in zip(bounds, bounds[1:])
+        ]
+
+    def _parse_local_slide(
+        self,
+        lines: list[str],
+        *,
+        title_slide: bool,
+    ) -> dict[str, Any] | None:
+        content = list(lines)
+        while content and not content[0].strip():
+            content.pop(0)
+        match = MARKDOWN_HEADING_RE.match(content[0]) if content else None
+        if match is None:
+            return None
+
+        title_level = len(match.group(1))
+        title = self._strip_markdown_inline(match.group(2))
+        paragraphs: list[str] = []
+        bullets: list[str] = []
+        columns: list[tuple[str, list[str]]] = []
+        paragraph: list[str] = []
+        table_header: list[str] | None = None
+        in_fence = False
+
+        def flush_paragraph() -> None:
+            if paragraph:
+                paragraphs.append(" ".join(paragraph))
+                paragraph.clear()
+
+        for line in content[1:]:
+            stripped = line.strip()
+            if MARKDOWN_FENCE_RE.match(line):
+                flush_paragraph()
+                in_fence = not in_fence
+                continue
+            if in_fence:
+                paragraphs.append(line.rstrip())
+                continue
+
+            heading = MARKDOWN_HEADING_RE.match(line)
+            bullet = MARKDOWN_BULLET_RE.match(line)
+            if heading and len(heading.group(1)) > title_level:
+                flush_paragraph()
+                columns.append((self._strip_markdown_inline(heading.group(2)), []))
+            elif heading:
+                return None
+            elif stripped.startswith("|"):
+                flush_paragraph()
+                if MARKDOWN_TABLE_SEPARATOR_RE.match(stripped):
+                    continue
+                cells = [
+                    self._strip_markdown_inline(cell)
+                    for cell in stripped.strip("|").split("|")
+                ]
+                if table_header is None:
+                    table_header = cells
+                    continue
+                row = cells[0] + (": " + ", ".join(cells[1:]) if cells[1:] else "")
+                (columns[-1][1] if columns else bullets).append(row)
+            elif bullet:
+                flush_paragraph()
+                item = self._strip_markdown_inline(bullet.group(1))
+                (columns[-1][1] if columns else bullets).append(item)
+            elif not stripped:
+                flush_paragraph()
+                table_header = None
+            else:
+                paragraph.append(self._strip_markdown_inline(stripped))
+        flush_paragraph()
+
+        body = "\n".join(paragraphs).strip()
+        if len(body) > LOCAL_PLAN_MAX_BODY_CHARS:
+            return None
+
+        slide: dict[str, Any] = {"title": title}
+        if len(columns) == 2 and not bullets and all(items for _, items in columns):
+            (left_title, left_items), (right_title, right_items) = columns
+            slide.update(
+                left_title=left_title,
+                left_bullets=left_items,
+                right_title=right_title,
+                right_bullets=right_items,
+            )
+            if body:
+                slide["body"] = body
+            return self._within_local_limits(slide)
+
+        for column_title, items in columns:
+            bullets.append(column_title)
+            bullets.extend(items)
+
+        if title_slide and not bullets and body and "\n" not in body:
+            slide["subtitle"] = body
+            return slide
+        if body:
+            slide["body"] = body
+        if bullets:
+            slide["bullets"] = bullets
+        return self._within_local_limits(slide)
+
+    def _within_local_limits(self, slide: dict[str, Any]) -> dict[str, Any] | None:
+        for field in SLIDE_LIST_FIELDS:
+            if len(slide.get(field, [])) > LOCAL_PLAN_MAX_BULLETS:
+                return None
+        return slide
+
+    def _flatten_columns(self, slide: dict[str, Any]) -> dict[str, Any]:
+        flattened = {"title": slide["title"]}
+        if slide.get("body"):
+            flattened["body"] = slide["body"]
+        flattened["bullets"] = [
+            slide["left_title"],
+            *slide["left_bullets"],
+            slide["right_title"],
+            *slide["right_bullets"],
+        ]
+        return flattened
+
+    def _pick_local_layout(
+        self,
+        slide: dict[str, Any],
+        descriptors: list[LayoutDescriptor],
+    ) -> str | None:
+        if "left_bullets" in slide:
+            wanted = [("title", "two_column")]
+        elif "subtitle" in slide:
+            wanted = [("title", "subtitle"), ("title", "body")]
+        elif "body" in slide or "bullets" in slide:
+            wanted = [("title", "body")]
+        else:
+            wanted = [("title",), ("title", "subtitle"), ("title", "body")]
+
+        for slots in wanted:
+            for descriptor in descriptors:
+                if descriptor.slots == slots:
+                    return descriptor.layout_id
+
+        # Otherwise take the smallest layout that still has every wanted slot.
+        needed = set(wanted[0])
+        candidates = [
+            descriptor for descriptor in descriptors if needed <= set(descriptor.slots)
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda descriptor: len(descriptor.slots)).layout_id
+
+    def _strip_markdown_inline(self, text: str) -> str:
+        text = MARKDOWN_LINK_RE.sub(r"\1", text)
+        text = MARKDOWN_EMPHASIS_RE.sub(r"\2", text)
+        text = MARKDOWN_UNDERSCORE_RE.sub(r"\1", text)
+        return text.strip()
+
     async def _text_to_pptx(
         self,
         *,
@@ -744,57 +2094,156 @@ class Action:
         model_id: str,
         user_model: UserModel,
         __request__,
+        on_progress=None,
     ) -> tuple[Presentation, dict[str, Any]]:
         if not isinstance(text, str) or not text.strip():
             raise ValueError("`text` must be a non-empty string.")
 
-        with _ManagedTemplateFile(
+        # The fetch has its own HTTP timeout, so it is not bounded again here.
+        template_entry = await asyncio.to_thread(
+            _TEMPLATES.load,
             template,
             timeout_s=self.valves.template_request_timeout_s,
-        ) as template_path:
-            presentation = self._load_presentation(template_path)
-            layouts = self._extract_layout_metadata(presentation)
+            ttl_s=self.valves.template_cache_ttl_s,
+        )
+        presentation, layouts, descriptors = await self._off_loop(
+            self._prepare_template, template_entry, str(template or "")
+        )
 
-            self._debug_log(
-                "Loaded presentation template",
-                template_path=template_path,
-                layout_count=len(layouts),
+        if self.valves.local_planning != "off":
+            slide_plan = self._plan_locally(text, descriptors)
+            if slide_plan is not None:
+                self._debug_log(
+                    "Planned slides from markdown structure",
+                    slide_count=len(slide_plan["slides"]),
+                )
+                await self._off_loop(
+                    self._render_slide_plan,
+                    presentation,
+                    slide_plan,
+                    self._layout_by_name(layouts, descriptors),
+                )
+                return presentation, slide_plan
+            if self.valves.local_planning == "only":
+                raise ValueError(
+                    "The message has no slide structure the local planner can use."
+                )
+            self._debug_log("No usable markdown structure; planning with the model")
+
+        if self.valves.planning_mode == "per_slide":
+            slide_plan = await self._plan_and_render_per_slide(
+                presentation=presentation,
+                text=text,
+                layouts=layouts,
+                descriptors=descriptors,
+                model_id=model_id,
+                user_model=user_model,
+                __request__=__request__,
+                on_progress=on_progress,
             )
+            return presentation, slide_plan
 
-            working_text = text
-            if self.valves.enable_preprocessing:
-                working_text = await self._run_preprocessing(
-                    text=text,
-                    layouts=layouts,
-                    model_id=model_id,
-                    user_model=user_model,
-                    __request__=__request__,
-                )
+        layout_by_name = self._layout_by_name(layouts, descriptors)
+        working_text = text
+        if self.valves.enable_preprocessing:
+            working_text = await self._run_preprocessing(
+                text=text,
+                descriptors=descriptors,
+                model_id=model_id,
+                user_model=user_model,
+                __request__=__request__,
+            )
 
-            slide_plan = await self._run_processing(
+        if self.valves.stream_slide_plan:
+            slide_plan = await self._stream_and_render_processing(
+                presentation=presentation,
                 text=working_text,
-                layouts=layouts,
+                layout_by_name=layout_by_name,
+                descriptors=descriptors,
                 model_id=model_id,
                 user_model=user_model,
                 __request__=__request__,
+                on_progress=on_progress,
             )
+            if slide_plan is not None:
+                return presentation, slide_plan
 
-            if self.valves.enable_postprocessing:
-                slide_plan = await self._run_postprocessing(
-                    slide_plan=slide_plan,
-                    layouts=layouts,
-                    model_id=model_id,
-                    user_model=user_model,
-                    __request__=__request__,
-                )
+        slide_plan = await self._run_processing(
+            text=working_text,
+            descriptors=descriptors,
+            model_id=model_id,
+            user_model=user_model,
+            __request__=__request__,
+        )
 
-            self._render_slide_plan(presentation, slide_plan, layouts)
-            return presentation, slide_plan
+        if self.valves.enable_postprocessing:
+            slide_plan = await self._run_postprocessing(
+                slide_plan=slide_plan,
+                descriptors=descriptors,
+                model_id=model_id,
+                user_model=user_model,
+                __request__=__request__,
+            )
 
-    def _load_presentation(self, template_path: str | None) -> Presentation:
-        if template_path is None:
+        await self._off_loop(
+            self._render_slide_plan, presentation, slide_plan, layout_by_name
+        )
+        return presentation, slide_plan
+
+    async def _off_loop(self, function, *args) -> Any:
+        """Run blocking python-pptx work in a worker thread so large templates do
+        not stall the event loop. Calls are awaited one at a time.
+
+        A timeout cannot stop the worker thread, which may keep changing the
+        presentation afterwards. Callers must let the TimeoutError end the
+        export and never render into or save that presentation again."""
+        try:
+            return await asyncio.wait_for(
+                asyncio.to_thread(function, *args),
+                timeout=self.valves.build_timeout_seconds,
+            )
+        except asyncio.TimeoutError as exc:
+            raise TimeoutError(
+                "building the PPTX took longer than "
+                f"{self.valves.build_timeout_seconds} seconds."
+            ) from exc
+
+    def _prepare_template(
+        self,
+        template_entry: _CachedTemplate | None,
+        template_label: str,
+    ) -> tuple[Presentation, list[LayoutMetadata], list[LayoutDescriptor]]:
+        presentation = self._load_presentation(template_entry)
+        layouts_key = DEFAULT_TEMPLATE_KEY
+        if template_entry is not None:
+            layouts_key = template_entry.digest
+        layouts = _TEMPLATES.layouts(layouts_key)
+        layouts_cached = layouts is not None
+        if layouts is None:
+            layouts = self._extract_layout_metadata(presentation)
+            _TEMPLATES.store_layouts(layouts_key, layouts)
+
+        descriptors = self._describe_layouts(layouts, layouts_key)
+
+        self._debug_log(
+            "Loaded presentation template",
+            template=template_label,
+            template_digest=layouts_key,
+            layout_count=len(layouts),
+            descriptor_count=len(descriptors),
+            layouts_cached=layouts_cached,
+        )
+        return presentation, layouts, descriptors
+
+    def _save_presentation(self, presentation: Presentation) -> bytes:
+        output = io.BytesIO()
+        presentation.save(output)
+        return output.getvalue()
+
+    def _load_presentation(self, template: _CachedTemplate | None) -> Presentation:
+        if template is None:
             return Presentation()
-        return Presentation(template_path)
+        return Presentation(io.BytesIO(template.data))
 
     def _extract_layout_metadata(
         self,
@@ -803,20 +2252,27 @@ class Action:
         layouts: list[LayoutMetadata] = []
 
         for master_index, master in enumerate(presentation.slide_masters):
+            theme_fonts = self._theme_fonts(master)
             for layout_index, layout in enumerate(master.slide_layouts):
                 placeholder_rows: list[dict[str, Any]] = []
 
                 for placeholder in layout.placeholders:
                     pformat = placeholder.placeholder_format
+                    placeholder_type = self._enum_name(pformat.type)
+                    font_size, typeface = self._placeholder_font(
+                        master, placeholder, placeholder_type, theme_fonts
+                    )
                     placeholder_rows.append(
                         {
                             "idx": pformat.idx,
-                            "type": self._enum_name(pformat.type),
+                            "type": placeholder_type,
                             "name": placeholder.name,
                             "left": int(placeholder.left),
                             "top": int(placeholder.top),
                             "width": int(placeholder.width),
                             "height": int(placeholder.height),
+                            "font_size": font_size,
+                            "typeface": typeface,
                         }
                     )
 
@@ -834,6 +2290,70 @@ class Action:
 
         return layouts
 
+    def _theme_fonts(self, master: Any) -> dict[str, str]:
+        """Return the theme's major (headings) and minor (body) latin fonts."""
+        try:
+            theme = parse_xml(master.part.part_related_by(RT.THEME).blob)
+        except Exception:
+            return {}
+
+        fonts: dict[str, str] = {}
+        for key, tag in (("+mj", "a:majorFont"), ("+mn", "a:minorFont")):
+            typeface = theme.xpath(f".//a:fontScheme/{tag}/a:latin/@typeface")
+            if typeface and typeface[0]:
+                fonts[key] = typeface[0]
+        return fonts
+
+    def _placeholder_font(
+        self,
+        master: Any,
+        placeholder: Any,
+        placeholder_type: str,
+        theme_fonts: dict[str, str],
+    ) -> tuple[float, str]:
+        """Resolve the first-level font size (pt) and typeface of a layout
+        placeholder through the layout, the master placeholder and the master
+        text styles."""
+        is_title = placeholder_type in TITLE_PLACEHOLDER_TYPES
+        master_type = "TITLE" if is_title else placeholder_type
+        master_placeholders = {
+            self._enum_name(item.placeholder_format.type): item
+            for item in master.placeholders
+        }
+        master_placeholder = master_placeholders.get(master_type)
+        is_footer = placeholder_type in FOOTER_PLACEHOLDER_TYPES
+        if master_placeholder is None and not is_footer:
+            master_placeholder = master_placeholders.get("BODY")
+
+        run_properties = "./p:txBody/a:lstStyle/a:lvl1pPr/a:defRPr"
+        if is_title:
+            style = "titleStyle"
+        elif is_footer:
+            style = "otherStyle"
+        else:
+            style = "bodyStyle"
+        sources = [
+            (placeholder.element, run_properties),
+            (getattr(master_placeholder, "element", None), run_properties),
+            (master.element, f"./p:txStyles/p:{style}/a:lvl1pPr/a:defRPr"),
+        ]
+
+        size: str | None = None
+        typeface: str | None = None
+        for element, path in sources:
+            if element is None:
+                continue
+            size = size or next(iter(element.xpath(f"{path}/@sz")), None)
+            typeface = typeface or next(
+                iter(element.xpath(f"{path}/a:latin/@typeface")), None
+            )
+
+        if not typeface or typeface.startswith("+"):
+            theme_key = (typeface or ("+mj" if is_title else "+mn"))[:3]
+            typeface = theme_fonts.get(theme_key, DEFAULT_TYPEFACE)
+        font_size = int(size) / 100 if size and size.isdigit() else DEFAULT_FONT_SIZE_PT
+        return font_size, typeface
+
     def _enum_name(self, value: Any) -> str:
         return getattr(value, "name", str(value))
 
@@ -851,6 +2371,93 @@ class Action:
             for layout in layouts
         ]
 
+    def _describe_layouts(
+        self,
+        layouts: list[LayoutMetadata],
+        cache_key: str,
+    ) -> list[LayoutDescriptor]:
+        """Summarize layouts for prompts: one entry per distinct name and slot
+        set, with a short id and semantic slots instead of placeholder rows."""
+        cached = _TEMPLATES.descriptors(cache_key)
+        if cached is not None:
+            return cached
+
+        groups: dict[tuple[str, tuple[str, ...]], list[LayoutMetadata]] = {}
+        for layout in layouts:
+            signature = (layout.layout_name.casefold(), self._layout_slots(layout))
+            groups.setdefault(signature, []).append(layout)
+
+        descriptors = [
+            LayoutDescriptor(
+                layout_id=f"L{number}",
+                layout=group[0],
+                slots=slots,
+                layout_names=tuple(dict.fromkeys(item.layout_name for item in group)),
+            )
+            for number, ((_, slots), group) in enumerate(groups.items(), start=1)
+        ]
+        _TEMPLATES.store_descriptors(cache_key, descriptors)
+
+        raw_chars = len(
+            json.dumps(self._layouts_to_jsonable(layouts), ensure_ascii=False, indent=2)
+        )
+        compact_chars = len(
+            json.dumps(
+                self._descriptors_to_jsonable(descriptors),
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+        )
+        self._debug_log(
+            "Summarized template layouts",
+            layout_count=len(layouts),
+            descriptor_count=len(descriptors),
+            raw_tokens_estimate=raw_chars // CHARS_PER_TOKEN_ESTIMATE,
+            compact_tokens_estimate=compact_chars // CHARS_PER_TOKEN_ESTIMATE,
+            reduction=f"{1 - compact_chars / max(raw_chars, 1):.0%}",
+        )
+        return descriptors
+
+    def _layout_slots(self, layout: LayoutMetadata) -> tuple[str, ...]:
+        slots: list[str] = []
+        bodies: list[dict[str, Any]] = []
+        rows = sorted(layout.placeholders, key=lambda row: (row["top"], row["left"]))
+        for row in rows:
+            slot = PLACEHOLDER_SLOTS.get(row["type"])
+            if slot == "body":
+                bodies.append(row)
+            elif slot:
+                slots.append(slot)
+
+        if len(bodies) >= 2 and self._side_by_side(bodies[0], bodies[1]):
+            slots.append("two_column")
+            bodies = bodies[2:]
+        slots.extend("body" for _ in bodies)
+        return tuple(sorted(slots, key=SLOT_ORDER.index))
+
+    def _side_by_side(self, first: dict[str, Any], second: dict[str, Any]) -> bool:
+        overlap = min(
+            first["top"] + first["height"], second["top"] + second["height"]
+        ) - max(first["top"], second["top"])
+        apart = (
+            first["left"] + first["width"] <= second["left"]
+            or second["left"] + second["width"] <= first["left"]
+        )
+        return apart and overlap > min(first["height"], second["height"]) / 2
+
+    def _descriptors_to_jsonable(
+        self,
+        descriptors: Iterable[LayoutDescriptor],
+    ) -> list[dict[str, Any]]:
+        return [
+            {
+                "id": descriptor.layout_id,
+                "name": descriptor.layout.layout_name,
+                "slots": list(descriptor.slots),
+            }
+            for descriptor in descriptors
+        ]
+
     def _parse_json_object(self, content: str) -> dict[str, Any]:
         stripped = content.strip()
         fence_match = re.fullmatch(r"```(?:json)?\s*(.*?)\s*```", stripped, re.DOTALL)
@@ -880,20 +2487,20 @@ class Action:
                     f"Slide {index} must include a non-empty 'layout_name'."
                 )
 
-    def _resolve_layout_identity(
+    def _resolve_layout(
         self,
         requested_layout_name: str,
-        layout_index_by_name: dict[str, tuple[int, int]],
-    ) -> tuple[int, int]:
-        if requested_layout_name in layout_index_by_name:
-            return layout_index_by_name[requested_layout_name]
+        layout_by_name: dict[str, LayoutMetadata],
+    ) -> LayoutMetadata:
+        if requested_layout_name in layout_by_name:
+            return layout_by_name[requested_layout_name]
 
         normalized = requested_layout_name.casefold()
-        for layout_name, identity in layout_index_by_name.items():
+        for layout_name, layout in layout_by_name.items():
             if layout_name.casefold() == normalized:
-                return identity
+                return layout
 
-        first_available = next(iter(layout_index_by_name.values()), None)
+        first_available = next(iter(layout_by_name.values()), None)
         if first_available is None:
             raise ValueError("No slide layouts are available in the presentation.")
 
@@ -903,31 +2510,50 @@ class Action:
         )
         return first_available
 
+    def _layout_by_name(
+        self,
+        layouts: list[LayoutMetadata],
+        descriptors: list[LayoutDescriptor],
+    ) -> dict[str, LayoutMetadata]:
+        layout_by_name = {layout.layout_name: layout for layout in layouts}
+        for descriptor in descriptors:
+            layout_by_name[descriptor.layout_id] = descriptor.layout
+        return layout_by_name
+
+    def _render_slide(
+        self,
+        presentation: Presentation,
+        slide_data: dict[str, Any],
+        layout_by_name: dict[str, LayoutMetadata],
+    ) -> int:
+        """Add one planned slide, plus continuation slides when its content
+        cannot fit, and return the number of slides added."""
+        requested_layout = str(slide_data.get("layout_name", "")).strip()
+        layout = self._resolve_layout(requested_layout, layout_by_name)
+        slide_layout = presentation.slide_masters[layout.master_index].slide_layouts[
+            layout.layout_index
+        ]
+        pieces = self._split_overflowing_slide(slide_data, layout)
+        for piece in pieces:
+            slide = presentation.slides.add_slide(slide_layout)
+            self._populate_slide(slide, piece, layout)
+        return len(pieces)
+
     def _render_slide_plan(
         self,
         presentation: Presentation,
         slide_plan: dict[str, Any],
-        layouts: list[LayoutMetadata],
+        layout_by_name: dict[str, LayoutMetadata],
     ) -> None:
-        layout_index_by_name = {
-            layout.layout_name: (layout.master_index, layout.layout_index)
-            for layout in layouts
-        }
-
-        slides = slide_plan.get("slides", [])
-        for slide_data in slides:
-            requested_layout = str(slide_data.get("layout_name", "")).strip()
-            master_index, layout_index = self._resolve_layout_identity(
-                requested_layout,
-                layout_index_by_name,
-            )
-            slide_layout = presentation.slide_masters[master_index].slide_layouts[
-                layout_index
-            ]
-            slide = presentation.slides.add_slide(slide_layout)
-            self._populate_slide(slide, slide_data)
+        for slide_data in slide_plan.get("slides", []):
+            self._render_slide(presentation, slide_data, layout_by_name)
 
-    def _populate_slide(self, slide: Any, slide_data: dict[str, Any]) -> None:
+    def _populate_slide(
+        self,
+        slide: Any,
+        slide_data: dict[str, Any],
+        layout: LayoutMetadata | None = None,
+    ) -> None:
         title_text = self._as_clean_text(slide_data.get("title"))
         subtitle_text = self._as_clean_text(slide_data.get("subtitle"))
         body_text = self._as_clean_text(slide_data.get("body"))
@@ -937,9 +2563,15 @@ class Action:
         right_title = self._as_clean_text(slide_data.get("right_title"))
         right_bullets = self._as_clean_list(slide_data.get("right_bullets"))
 
+        rows_by_idx = {row["idx"]: row for row in layout.placeholders} if layout else {}
+
+        def write(placeholder: Any, text: str) -> None:
+            row = rows_by_idx.get(placeholder.placeholder_format.idx)
+            self._write_text_to_placeholder(placeholder, text, row)
+
         if title_text and getattr(slide.shapes, "title", None) is not None:
             try:
-                slide.shapes.title.text = title_text
+                write(slide.shapes.title, title_text)
             except Exception:
                 pass
 
@@ -954,23 +2586,23 @@ class Action:
             left_text = self._combine_heading_and_bullets(left_title, left_bullets)
             right_text = self._combine_heading_and_bullets(right_title, right_bullets)
             if left_text:
-                self._write_text_to_placeholder(non_title_placeholders[0], left_text)
+                write(non_title_placeholders[0], left_text)
             if right_text:
-                self._write_text_to_placeholder(non_title_placeholders[1], right_text)
+                write(non_title_placeholders[1], right_text)
             return
 
         if subtitle_text and non_title_placeholders:
-            self._write_text_to_placeholder(non_title_placeholders[0], subtitle_text)
+            write(non_title_placeholders[0], subtitle_text)
             if len(non_title_placeholders) >= 2:
                 main_text = self._combine_body_and_bullets(body_text, bullets)
                 if main_text:
-                    self._write_text_to_placeholder(non_title_placeholders[1], main_text)
+                    write(non_title_placeholders[1], main_text)
                 return
 
         if non_title_placeholders:
             main_text = self._combine_body_and_bullets(body_text, bullets)
             if main_text:
-                self._write_text_to_placeholder(non_title_placeholders[0], main_text)
+                write(non_title_placeholders[0], main_text)
 
     def _get_non_title_placeholders(self, slide: Any) -> list[Any]:
         placeholders: list[Any] = []
@@ -986,11 +2618,167 @@ class Action:
 
         return sorted(placeholders, key=lambda shape: (int(shape.top), int(shape.left)))
 
-    def _write_text_to_placeholder(self, placeholder: Any, text: str) -> None:
+    def _write_text_to_placeholder(
+        self,
+        placeholder: Any,
+        text: str,
+        row: dict[str, Any] | None = None,
+    ) -> None:
         if not text or not getattr(placeholder, "has_text_frame", False):
             return
 
         placeholder.text = text
+        if row is None or not self.valves.autofit_text:
+            return
+
+        font_size = self._fitted_font_size(text, row)
+        if font_size is None:
+            font_size = self._autofit_floor(row)
+        if font_size < row["font_size"]:
+            for paragraph in placeholder.text_frame.paragraphs:
+                for run in paragraph.runs:
+                    run.font.size = Pt(font_size)
+
+    def _autofit_floor(self, row: dict[str, Any]) -> float:
+        scaled = round(row["font_size"] * self.valves.min_font_scale)
+        return min(row["font_size"], max(MIN_FONT_PT, scaled))
+
+    def _text_fits(self, text: str, row: dict[str, Any], font_size: float) -> bool:
+        width = row["width"] - 2 * TEXT_INSET_X_EMU
+        height = row["height"] - 2 * TEXT_INSET_Y_EMU
+        width_factor = FONT_WIDTH_FACTORS.get(
+            str(row.get("typeface", "")).casefold(), DEFAULT_FONT_WIDTH_FACTOR
+        )
+        em = font_size * EMU_PER_POINT
+        chars_per_line = max(1, int(width / (em * width_factor)))
+
+        paragraphs = text.split("\n")
+        lines = 0
+        for paragraph in paragraphs:
+            # Greedy word wrap, the way PowerPoint breaks lines.
+            line_count, used = 1, 0
+            for word in paragraph.split():
+                if used and used + 1 + len(word) <= chars_per_line:
+                    used += 1 + len(word)
+                    continue
+                if used:
+                    line_count += 1
+                used = len(word)
+                while used > chars_per_line:
+                    line_count += 1
+                    used -= chars_per_line
+            lines += line_count
+
+        needed = em * (lines * LINE_HEIGHT + (len(paragraphs) - 1) * PARAGRAPH_GAP)
+        return needed <= height
+
+    def _fitted_font_size(self, text: str, row: dict[str, Any]) -> float | None:
+        """Largest size between the template size and the autofit floor at which
+        the text fits the placeholder, or None when it overflows even the floor."""
+        font_size = row["font_size"]
+        floor = self._autofit_floor(row)
+        while font_size >= floor:
+            if self._text_fits(text, row, font_size):
+                return font_size
+            font_size -= 1
+        return None
+
+    def _content_rows(self, layout: LayoutMetadata) -> list[dict[str, Any]]:
+        """Layout placeholders that receive body text, in the order
+        `_get_non_title_placeholders` fills them."""
+        rows = [
+            row
+            for row in layout.placeholders
+            if row["type"] not in TITLE_PLACEHOLDER_TYPES
+            and row["type"] not in FOOTER_PLACEHOLDER_TYPES
+        ]
+        return sorted(rows, key=lambda row: (row["top"], row["left"]))
+
+    def _items_that_fit(
+        self,
+        row: dict[str, Any],
+        lead: str,
+        items: list[str],
+    ) -> int:
+        floor = self._autofit_floor(row)
+        count = len(items)
+        while count > 1:
+            text = self._combine_body_and_bullets(lead, items[:count])
+            if self._text_fits(text, row, floor):
+                break
+            count -= 1
+        return count
+
+    def _body_lines_that_fit(self, row: dict[str, Any], lines: list[str]) -> int:
+        floor = self._autofit_floor(row)
+        count = len(lines)
+        while count > 1:
+            if self._text_fits("\n".join(lines[:count]).strip(), row, floor):
+                break
+            count -= 1
+        return count
+
+    def _split_overflowing_slide(
+        self,
+        slide_data: dict[str, Any],
+        layout: LayoutMetadata,
+    ) -> list[dict[str, Any]]:
+        """Move content that does not fit at the autofit floor onto continuation
+        slides with the same layout."""
+        if not self.valves.autofit_text:
+            return [slide_data]
+
+        rows = self._content_rows(layout)
+        title = self._as_clean_text(slide_data.get("title"))
+        if title.endswith(CONTINUATION_SUFFIX):
+            title = title[: -len(CONTINUATION_SUFFIX)]
+        continuation: dict[str, Any] = {
+            "layout_name": slide_data.get("layout_name"),
+            "title": f"{title}{CONTINUATION_SUFFIX}" if title else "",
+        }
+        first = dict(slide_data)
+
+        left = self._as_clean_list(slide_data.get("left_bullets"))
+        right = self._as_clean_list(slide_data.get("right_bullets"))
+        if (left or right) and len(rows) >= 2:
+            columns = (("left", left, rows[0]), ("right", right, rows[1]))
+            for side, items, row in columns:
+                heading = self._as_clean_text(slide_data.get(f"{side}_title"))
+                keep = self._items_that_fit(row, heading, items)
+                first[f"{side}_bullets"] = items[:keep]
+                if items[keep:]:
+                    continuation[f"{side}_title"] = heading
+                    continuation[f"{side}_bullets"] = items[keep:]
+        else:
+            subtitle = self._as_clean_text(slide_data.get("subtitle"))
+            main_index = 1 if subtitle else 0
+            if len(rows) <= main_index:
+                return [slide_data]
+            row = rows[main_index]
+            body = self._as_clean_text(slide_data.get("body"))
+            bullets = self._as_clean_list(slide_data.get("bullets"))
+            if bullets:
+                keep = self._items_that_fit(row, body, bullets)
+                first["bullets"] = bullets[:keep]
+                if bullets[keep:]:
+                    continuation["bullets"] = bullets[keep:]
+            else:
+                lines = body.split("\n")
+                keep = self._body_lines_that_fit(row, lines)
+                if "\n".join(lines[keep:]).strip():
+                    # Lines are joined back exactly as they were split, so the
+                    # measured text is the text the placeholder receives.
+                    first["body"] = "\n".join(lines[:keep]).strip()
+                    continuation["body"] = "\n".join(lines[keep:]).strip()
+
+        if len(continuation) == 2:
+            return [slide_data]
+        self._debug_log(
+            "Slide content overflows; adding a continuation slide",
+            title=title,
+            layout_name=layout.layout_name,
+        )
+        return [first, *self._split_overflowing_slide(continuation, layout)]
 
     def _as_clean_text(self, value: Any) -> str:
         if value is None:
@@ -1103,6 +2891,7 @@ return {{ success: true, filename, size: bytes.length }};
         __model__=None,
         **kwargs,
     ) -> dict[str, Any]:
+        llm_calls = _COMPLETIONS.track()
         self._debug_log(
             "Action invoked",
             body_keys=sorted(body.keys()),
@@ -1171,6 +2960,12 @@ return {{ success: true, filename, size: bytes.length }};
 
         template = (self.valves.template or "").strip() or None
 
+        async def report_slide(done: int, total: int | None) -> None:
+            progress = f"{done}/{total}" if total else str(done)
+            await self.emit_status(
+                f"Writing slides ({progress})...", False, __event_emitter__
+            )
+
         try:
             await self.emit_status(
                 "Planning slides with the current chat model...",
@@ -1183,6 +2978,7 @@ return {{ success: true, filename, size: bytes.length }};
                 model_id=model_id,
                 user_model=user_model,
                 __request__=__request__,
+                on_progress=report_slide,
             )
         except Exception as exc:
             self._debug_log(
@@ -1197,9 +2993,14 @@ return {{ success: true, filename, size: bytes.length }};
 
         await self.emit_status("Building PPTX...", False, __event_emitter__)
 
-        output = io.BytesIO()
-        presentation.save(output)
-        pptx_bytes = output.getvalue()
+        try:
+            pptx_bytes = await self._off_loop(self._save_presentation, presentation)
+        except Exception as exc:
+            self._debug_log("PPTX save failed", error=str(exc), filename=filename)
+            await self.emit_error(f"PPTX export failed: {exc}", __event_emitter__)
+            await self.emit_status("PPTX export failed.", True, __event_emitter__)
+            return {"content": f"PPTX export failed: {exc}"}
+
         slide_count = len(presentation.slides)
         presentation_title = self._guess_presentation_title(slide_plan, message_id)
 
@@ -1219,11 +3020,21 @@ return {{ success: true, filename, size: bytes.length }};
             __event_call__=__event_call__,
         )
 
-        await self.emit_status("PPTX export complete.", True, __event_emitter__)
-        return {
+        incomplete = slide_plan.get("incomplete")
+        if incomplete:
+            await self.emit_status(
+                f"PPTX export complete, but {incomplete}.", True, __event_emitter__
+            )
+        else:
+            await self.emit_status("PPTX export complete.", True, __event_emitter__)
+        response = {
             "content": f"Exported message to PPTX: {filename}",
             "result": result,
             "presentation_title": presentation_title,
             "slide_count": slide_count,
             "template": template,
+            "llm": _COMPLETIONS.summarize(llm_calls),
         }
+        if incomplete:
+            response["incomplete"] = incomplete
+        return response